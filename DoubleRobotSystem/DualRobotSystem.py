@@ -7,11 +7,20 @@ import matplotlib.pyplot as plt
 import json
 
 
-from SingleRobotSystem.single_robot_system import plan_and_execute, load_robot_coord_mapping, generate_task_details
-from Planning.gpt_functions import extract_task_objects, generate_open_verification_prompt, chat_with_gpt
-from Perception.segmentation_layer import perform_segmentation, encode_and_match
-from Execution.client_script import send_command_to_robot
+from SingleRobotSystem.single_robot_system import plan_and_execute, plan_commands, STREAM_PLANNING
+from Planning.gpt_functions import extract_task_objects, generate_open_verification_prompt, get_backend, verify_with_gpt
+from Planning.template_planner import pick_and_place_commands
+from Planning.token_counter import count_tokens
+from Planning.local_verifier import LocalVerifier, COMPLETE, ESCALATE
+from Perception.segmentation_layer import perform_segmentation, encode_and_match, get_segmentation_session, scene_cache, capture_frame
+from Perception.clip_layer import text_cache
+from Perception import debug_writer
+from Perception.debug_writer import get_debug_writer
+from Execution.client_script import get_robot_connection, robot_connection_metrics, close_robot_connections, send_plan_to_robot, RobotCommandError, execute_command
+from Execution.command_parser import parse_plan, serialize_plan
+from DoubleRobotSystem.orchestrator import DualRobotOrchestrator, reports_completion, run_cycle
 from Mapping import image_to_robo_mapping
+from Mapping.calibration_store import load_bin_calibration
 from Planning.gpt_functions import generate_camera_commands
 
 
@@ -26,14 +35,6 @@ PRIMARY_PORT   = 'xxxx'
 VISION_IP      = 'xxxx'  # Camera robot IP
 VISION_PORT    = 'xxxx'
 
-with open("bin_calibration_simple.json", "r") as f:
-    _bin_map = json.load(f)
-
-GREEN_PIXEL = tuple(_bin_map["Green Bin"]["pixel"])
-GREEN_POSE6 = tuple(_bin_map["Green Bin"]["pose6d"])
-BLUE_PIXEL  = tuple(_bin_map["Blue Bin"]["pixel"])
-BLUE_POSE6  = tuple(_bin_map["Blue Bin"]["pose6d"])
-
 # Fixed bin poses (6D)
 BIN_FIXED_POSES = {
     "Green Bin": {
@@ -49,6 +50,19 @@ BIN_FIXED_POSES = {
 TABLE_THRESH = 0.1
 BIN_THRESH   = 0.1
 
+# Local verifier margins: how far confidences must clear the thresholds to skip GPT
+VERIFY_MARGIN    = 0.15
+VERIFY_TABLE_MAX = 0.1
+
+local_verifier = LocalVerifier(bin_thresh=BIN_THRESH, table_thresh=TABLE_THRESH,
+                               margin=VERIFY_MARGIN, table_max=VERIFY_TABLE_MAX)
+
+# Send the verification observations as a terse table instead of the prose prompt
+COMPACT_VERIFICATION = os.environ.get("FYP_COMPACT_VERIFICATION", "0") == "1"
+
+# Overlap the worker's plan with the camera robot's verification moves (DoubleRobotSystem.orchestrator)
+CONCURRENT_ORCHESTRATION = os.environ.get("FYP_CONCURRENT_ORCHESTRATION", "0") == "1"
+
 def get_device():
     if torch.cuda.is_available():
         return torch.device("cuda")
@@ -61,20 +75,17 @@ def send_vision_command(cmd: str):
     """
     Send 'home' or 'bins' to the vision robot and wait for 'DONE'.
     """
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.connect((VISION_IP, VISION_PORT))
-        sock.sendall(f"{cmd}\n".encode())
-        resp = sock.recv(1024).decode().strip()
-        if resp != "DONE":
-            print(f"[Verifier] Unexpected response: {resp}")
-        time.sleep(1)
-
-def verify_table_scene(task_objects, device, mapping):
+    resp = execute_command(get_robot_connection(VISION_IP, VISION_PORT, "Vision"), cmd)
+    if resp != "DONE":
+        print(f"[Verifier] Unexpected response: {resp}")
+
+def verify_table_scene(task_objects, device, mapping, frame=None):
     """
-    Capture table-view, segment, CLIP-match, and return confidences + 6D poses.
+    Capture table-view (or use the given frame), segment, CLIP-match, and
+    return confidences + 6D poses.
     """
     print("\n[Verifier] Capturing table-view for verification…")
-    _, cropped = perform_segmentation()
+    _, cropped = perform_segmentation(frame=frame)
     table_confidences = {}
     table_poses = {}
 
@@ -83,19 +94,21 @@ def verify_table_scene(task_objects, device, mapping):
         best_idxs, scores = encode_and_match(
             cropped_images, task_objects, device, return_scores=True
         )
+        found = {}
         for i, obj in enumerate(task_objects):
             conf = scores[i] if i < len(scores) else 0.0
             table_confidences[obj] = float(conf)
+            table_poses[obj] = None
             if conf > 0 and i < len(best_idxs):
                 idx = best_idxs[i]
                 if 0 <= idx < len(centers):
-                    pixel = centers[idx]
-                    pose6d = image_to_robo_mapping.find_closest_gripper_point(pixel, mapping)
-                    table_poses[obj] = tuple(pose6d)
-                else:
-                    table_poses[obj] = None
-            else:
-                table_poses[obj] = None
+                    found[obj] = centers[idx]
+
+        # Map every detected object in one batched lookup
+        if found:
+            poses = image_to_robo_mapping.as_gripper_mapping(mapping).query(list(found.values()))
+            for obj, pose6d in zip(found, poses):
+                table_poses[obj] = tuple(pose6d)
     else:
         for obj in task_objects:
             table_confidences[obj] = 0.0
@@ -104,41 +117,55 @@ def verify_table_scene(task_objects, device, mapping):
     print(f"[Verifier] Table confidences: {table_confidences}")
     return table_confidences, table_poses
 
-def verify_bin_scene(task_objects, device):
+def load_bin_map():
+    """
+    Loads the bin reference pixels and poses (calibration bundle, or the
+    legacy bin_calibration_simple.json) and checks both bins are present.
     """
-    Capture bin-view, segment & CLIP-match for each task object,
-    then assign each object to the closest bin reference pixel.
+    bin_map = load_bin_calibration()
+    missing = [name for name in BIN_FIXED_POSES if name not in bin_map]
+    if missing:
+        raise ValueError(f"bin calibration has no entry for {', '.join(missing)}")
+    return bin_map
+
+def verify_bin_scene(task_objects, device, bin_map, frame=None):
+    """
+    Capture bin-view (or use the given frame), segment & CLIP-match for each
+    task object, then assign each object to the closest bin reference pixel
+    in `bin_map` (see load_bin_map()).
 
     Returns:
       - bin_confidences: dict object_name -> confidence
       - bin_poses:       dict object_name -> 6D pose or None
     """
     print("\n[Verifier] Capturing bin-view for verification…")
-    original, cropped = perform_segmentation()
+    original, cropped = perform_segmentation(frame=frame, view="bins")
     bin_confidences = {}
     bin_poses = {}
 
     if cropped:
         cropped_images, centers = zip(*cropped)
-        _, scores = encode_and_match(cropped_images, task_objects, device, return_scores=True)
+        best_idxs, scores = encode_and_match(cropped_images, task_objects, device, return_scores=True)
 
         for i, obj in enumerate(task_objects):
             conf = scores[i] if i < len(scores) else 0.0
             bin_confidences[obj] = float(conf)
+            # The centre of the crop CLIP matched to this object, as in verify_table_scene()
+            idx = best_idxs[i] if i < len(best_idxs) else None
 
-            if conf >= BIN_THRESH:
-                u_m, v_m = centers[i]
+            if conf >= BIN_THRESH and idx is not None and 0 <= idx < len(centers):
+                u_m, v_m = centers[idx]
 
                 # Compare squared pixel‐space distances:
-                u_g, v_g = GREEN_PIXEL
-                u_b, v_b = BLUE_PIXEL
+                u_g, v_g = bin_map["Green Bin"]["pixel"]
+                u_b, v_b = bin_map["Blue Bin"]["pixel"]
                 d2g = (u_m - u_g)**2 + (v_m - v_g)**2
                 d2b = (u_m - u_b)**2 + (v_m - v_b)**2
 
                 if d2g <= d2b:
-                    bin_poses[obj] = GREEN_POSE6
+                    bin_poses[obj] = tuple(bin_map["Green Bin"]["pose6d"])
                 else:
-                    bin_poses[obj] = BLUE_POSE6
+                    bin_poses[obj] = tuple(bin_map["Blue Bin"]["pose6d"])
             else:
                 bin_poses[obj] = None
     else:
@@ -186,10 +213,18 @@ def main():
     send_vision_command("home")
 
     # 2) Load gripper-coordinate mapping once
-    mapping = load_robot_coord_mapping()
+    mapping = image_to_robo_mapping.load_pose_mapping()
     if not mapping:
         print("Failed to load robot coord mapping. Exiting.")
         return
+    try:
+        bin_map = load_bin_map()
+    except (OSError, ValueError) as e:
+        print(f"Failed to load bin calibration: {e}. Exiting.")
+        return
+
+    # Keep SAM2 resident for planning and both verification passes
+    get_segmentation_session().load()
 
     # 3) Read and parse the user's task
     task_desc = input("Enter your task description: ")
@@ -211,21 +246,63 @@ def main():
 
     device = get_device()
 
-    # 4) Execute the worker-robot plan (single pass)
-    success = plan_and_execute(task_desc, task_objs, mapping)
-    if not success:
-        print("\n Worker failed to complete the plan. Exiting.")
-        return
-
-    # 5) End-of-task table-view verification
-    print("\n[Verifier] Moving camera to table-view (home)…")
-    send_vision_command("home")
-    table_confidences, table_poses = verify_table_scene(task_objs, device, mapping)
+    if debug_writer.HEADLESS:
+        get_debug_writer().start_task("dual_robot")
+
+    concurrent = CONCURRENT_ORCHESTRATION
+    if concurrent:
+        primary = get_robot_connection(PRIMARY_IP, PRIMARY_PORT, "Primary")
+        vision = get_robot_connection(VISION_IP, VISION_PORT, "Vision")
+        try:
+            concurrent = reports_completion(primary, vision)
+        except ConnectionError as e:
+            print(f"\n Cannot reach the robots: {e}. Exiting.")
+            return
+        if not concurrent:
+            # Zones would be released on a timing guess; only the sequential order is safe
+            print("[Orchestrator] Both robots must report completion events (FYP_ROBOT_PROTOCOL=framed or binary); "
+                  "running sequentially.")
+
+    if concurrent:
+        # 4-6) Worker plan and both verification views, overlapped where the arms cannot conflict
+        instrs = plan_commands(task_desc, task_objs, mapping)
+        try:
+            instrs = serialize_plan(parse_plan(instrs or []))
+        except ValueError as e:
+            instrs = None
+            print(f"[Primary] {e}")
+        if not instrs:
+            print("\n Worker failed to plan the task. Exiting.")
+            return
+        orchestrator = DualRobotOrchestrator(
+            primary,
+            vision,
+            bin_positions=[data["position"] for data in BIN_FIXED_POSES.values()],
+            capture=capture_frame,
+            verify_table=lambda frame: verify_table_scene(task_objs, device, mapping, frame),
+            verify_bin=lambda frame: verify_bin_scene(task_objs, device, bin_map, frame),
+        )
+        try:
+            (table_confidences, table_poses), (bin_confidences, bin_poses) = run_cycle(orchestrator, instrs)
+        except (RuntimeError, ConnectionError) as e:
+            print(f"\n Task cycle failed: {e}. Exiting.")
+            return
+    else:
+        # 4) Execute the worker-robot plan (single pass)
+        success = plan_and_execute(task_desc, task_objs, mapping, stream=STREAM_PLANNING)
+        if not success:
+            print("\n Worker failed to complete the plan. Exiting.")
+            return
+
+        # 5) End-of-task table-view verification
+        print("\n[Verifier] Moving camera to table-view (home)…")
+        send_vision_command("home")
+        table_confidences, table_poses = verify_table_scene(task_objs, device, mapping)
 
-    # 6) End-of-task bin-view verification
-    print("\n[Verifier] Moving camera to bin-view…")
-    send_vision_command("bins")
-    bin_confidences, bin_poses = verify_bin_scene(task_objs, device)
+        # 6) End-of-task bin-view verification
+        print("\n[Verifier] Moving camera to bin-view…")
+        send_vision_command("bins")
+        bin_confidences, bin_poses = verify_bin_scene(task_objs, device, bin_map)
 
 
     # # 5) LLM-controlled table-view verification
@@ -239,90 +316,81 @@ def main():
     # bin_confidences, bin_poses = verify_bin_scene(task_objs, device)
 
 
-    # 7) Build the GPT verification prompt
-    prompt = generate_open_verification_prompt(
-        task_description=task_desc,
-        table_confidences=table_confidences,
-        table_poses=table_poses,
-        bin_confidences=bin_confidences,
-        bin_poses=bin_poses,
-        bin_fixed_poses=BIN_FIXED_POSES
+    # 7) Decide clear-cut scenes locally; only ambiguous ones go to GPT
+    decision, to_retry = local_verifier.decide(
+        task_objs, table_confidences, bin_confidences,
+        bin_poses=bin_poses, target_position=BIN_FIXED_POSES[desired_bin]["position"]
     )
-    print("\n[Verifier] GPT Verification Prompt:\n")
-    print(prompt)
-
-    verification_reply = chat_with_gpt(prompt)
-    print("\n[Verifier] GPT Verification Reply:\n")
-    print(verification_reply)
-
-    # 8) If GPT says "Yes", we’re done
-    reply_lower = verification_reply.strip().lower()
-    if reply_lower.startswith("yes"):
+    print(f"\n[Verifier] Local verification: {decision} (misplaced: {to_retry})")
+    if decision == COMPLETE:
         print("\n🎉 All objects verified as correctly placed. Task complete.")
         return
 
-    print("\n[Verifier] GPT indicates objects remain misplaced. Performing one retry…")
-
-    # 9) Decide which objects to retry:
-    to_retry = []
-    for obj in task_objs:
-        t_conf = table_confidences.get(obj, 0.0)
-        b_conf = bin_confidences.get(obj, 0.0)
-        if b_conf <= t_conf or b_conf < BIN_THRESH:
-            to_retry.append(obj)
+    # Bin each misplaced object should go to (from GPT's verdict; otherwise the task's bin)
+    retry_bins = {}
+    if decision == ESCALATE:
+        # Build the GPT verification prompt, asking for a JSON verdict per object
+        prompt = generate_open_verification_prompt(
+            task_description=task_desc,
+            table_confidences=table_confidences,
+            table_poses=table_poses,
+            bin_confidences=bin_confidences,
+            bin_poses=bin_poses,
+            bin_fixed_poses=BIN_FIXED_POSES,
+            compact=COMPACT_VERIFICATION,
+            structured=True
+        )
+        print(f"\n[Verifier] GPT Verification Prompt ({count_tokens(prompt)} tokens):\n")
+        print(prompt)
+
+        verdict = verify_with_gpt(prompt, task_objs)
+        print("\n[Verifier] GPT Verification Verdict:\n")
+        print(verdict)
+
+        # 8) If GPT says the task is complete, we’re done
+        if verdict.get("complete"):
+            print("\n🎉 All objects verified as correctly placed. Task complete.")
+            return
+
+        if verdict:
+            print("\n[Verifier] GPT indicates objects remain misplaced. Performing one retry…")
+            retry_bins = {obj: entry["target_bin"] for obj, entry in verdict["misplaced_objects"].items()}
+            to_retry = list(retry_bins)
+        else:
+            # 9) No usable verdict: decide which objects to retry from the confidences
+            print("\n[Verifier] No valid GPT verdict. Falling back to confidence comparison…")
+            to_retry = []
+            for obj in task_objs:
+                t_conf = table_confidences.get(obj, 0.0)
+                b_conf = bin_confidences.get(obj, 0.0)
+                if b_conf <= t_conf or b_conf < BIN_THRESH:
+                    to_retry.append(obj)
 
     if not to_retry:
         print("\n[Verifier] No clear misplaced objects to retry. Exiting.")
         return
 
-    # 10) For each misplaced object, generate a mini pick-and-place to the desired bin
+    # 10) For each misplaced object, build a pick-and-place to its bin directly from the poses
     for obj in to_retry:
         pose6d = table_poses.get(obj)
         if not pose6d:
             print(f"[Verifier] Cannot retry '{obj}'—no valid table pose. Skipping.")
             continue
 
-        pick_x, pick_y, pick_z, pick_r, pick_p, pick_yaw = pose6d
-        bin_data = BIN_FIXED_POSES[desired_bin]
-        place_x, place_y, place_z = bin_data["position"]
-        place_r, place_p, place_yaw = bin_data["orientation"]
-
-        # Build a minimal objects_dict for retry planning
-        retry_objects = {
-            obj: {
-                "position": (pick_x, pick_y, pick_z),
-                "orientation": (pick_r, pick_p, pick_yaw)
-            },
-            desired_bin: {
-                "position": (place_x, place_y, place_z),
-                "orientation": (place_r, place_p, place_yaw)
-            }
-        }
-
-        retry_prompt = (
-            f"Pick up the {obj} from "
-            f"({pick_x:.2f}, {pick_y:.2f}, {pick_z:.2f}; "
-            f"{pick_r:.2f}, {pick_p:.2f}, {pick_yaw:.2f}) "
-            f"and place it into the {desired_bin} "
-            f"({place_x:.2f}, {place_y:.2f}, {place_z:.2f}; "
-            f"{place_r:.2f}, {place_p:.2f}, {place_yaw:.2f})."
-        )
-        print(f"\n[Verifier] Retry GPT Prompt for {obj}:\n{retry_prompt}")
-
-        details = generate_task_details(retry_prompt, retry_objects)
-        instrs = __import__('client_script').generate_instructions(details)
+        target_bin = retry_bins.get(obj, desired_bin)
+        bin_data = BIN_FIXED_POSES[target_bin]
+        instrs = pick_and_place_commands(pose6d, (*bin_data["position"], *bin_data["orientation"]))
+        print(f"\n[Verifier] Retry commands for {obj} → {target_bin}: {instrs}")
 
         # Move vision robot out of the way before sending retry commands
         print("[Verifier] Moving vision robot to home (out of way)…")
         send_vision_command("home")
-        time.sleep(1)
 
         print(f"[Verifier] Sending retry commands for '{obj}'…")
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.connect((PRIMARY_IP, PRIMARY_PORT))
-            for cmd in instrs:
-                send_command_to_robot(sock, cmd)
-                time.sleep(1)
+        try:
+            send_plan_to_robot(get_robot_connection(PRIMARY_IP, PRIMARY_PORT, "Primary"), instrs)
+        except (ValueError, RobotCommandError, ConnectionError) as e:
+            print(f"[Verifier] Retry for '{obj}' not completed: {e}")
 
     # After the single retry, we stop here. User will verify by eye.
     print("\n[Verifier] Retry commands dispatched. Please verify placement visually.")
@@ -333,3 +401,18 @@ if __name__ == "__main__":
     main()
     end = time.perf_counter()
     print(f"\nElapsed time: {end - start:.4f} seconds")
+    llm = get_backend().stats()
+    print(f"LLM wait: {llm['wait_time']:.2f} s ({100 * llm['wait_time'] / (end - start):.0f}%) "
+          f"over {llm['calls']} {llm['backend']} calls")
+    print(f"LLM tokens: {llm['prompt_tokens']} prompt + {llm['completion_tokens']} completion "
+          f"(~${llm['cost_usd']:.4f})")
+    print(f"Segmentation latency: {get_segmentation_session().stats()}")
+    print(f"Scene cache: {scene_cache.stats()}")
+    print(f"Text embedding cache: {text_cache.stats()}")
+    print(f"Verification paths: {local_verifier.stats()}")
+    local_verifier.save()
+    print(f"Robot connections: {robot_connection_metrics()}")
+    close_robot_connections()
+    if debug_writer.HEADLESS:
+        get_debug_writer().flush()
+        print(f"Debug artifacts: {get_debug_writer().stats()}")
@@ -0,0 +1,246 @@
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from Execution.client_script import execute_command
+from Execution.command_parser import parse_command, Place
+
+# Drives the worker and camera robots concurrently, with zone interlocks and a timeline of the overlap
+
+# Shared workspace zones. The worker arm enters both; the camera arm only enters the bin zone
+# (bin view) - its home pose looks down on the table from outside the worker's reach.
+ZONE_TABLE = "table"
+ZONE_BINS  = "bins"
+
+# A move whose target lies within this distance (robot units) of a bin position is a move into the bin zone
+BIN_ZONE_RADIUS = 60.0
+
+
+def command_zone(command, bin_positions, radius=BIN_ZONE_RADIUS):
+    """Zone a worker command moves the arm into (places and moves near a bin are in the bin zone)."""
+    parsed = parse_command(command)
+    if isinstance(parsed, Place):
+        return ZONE_BINS
+    x, y, z = parsed.position
+    for bx, by, bz in bin_positions:
+        if (x - bx) ** 2 + (y - by) ** 2 + (z - bz) ** 2 <= radius ** 2:
+            return ZONE_BINS
+    return ZONE_TABLE
+
+
+def reports_completion(*connections):
+    """
+    Connects each robot and returns True if every one negotiated DONE events.
+    Zones are released when a motion ends, so without DONE the interlock
+    would be running on execute_command()'s fixed-delay guess.
+    """
+    for connection in connections:
+        connection.connect()
+    return all(connection.completion_events for connection in connections)
+
+
+class Timeline:
+    """Records (lane, label, start, end) spans and reports how much work ran in parallel."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans = []
+
+    @asynccontextmanager
+    async def span(self, lane, label):
+        start = time.perf_counter() - self.t0
+        try:
+            yield
+        finally:
+            self.spans.append((lane, label, start, time.perf_counter() - self.t0))
+
+    def summary(self):
+        """Makespan, total busy time over all lanes, and the time saved by overlapping them."""
+        if not self.spans:
+            return {"makespan": 0.0, "busy": 0.0, "overlap_gained": 0.0}
+        makespan = max(end for _, _, _, end in self.spans) - min(start for _, _, start, _ in self.spans)
+        busy = sum(end - start for _, _, start, end in self.spans)
+        return {"makespan": makespan, "busy": busy, "overlap_gained": max(busy - makespan, 0.0)}
+
+    def render(self, width=60):
+        """Text Gantt chart, one row per span, grouped by lane."""
+        summary = self.summary()
+        scale = width / summary["makespan"] if summary["makespan"] else 0.0
+        rows = []
+        for lane, label, start, end in sorted(self.spans, key=lambda s: (s[0], s[2])):
+            a, b = int(start * scale), max(int(end * scale), int(start * scale) + 1)
+            rows.append(f"{lane:>7} {label[:22]:<22} |{' ' * a}{'#' * (b - a)}{' ' * (width - b)}| "
+                        f"{start:6.2f}-{end:6.2f} s")
+        rows.append(f"makespan {summary['makespan']:.2f} s, busy {summary['busy']:.2f} s, "
+                    f"overlap gained {summary['overlap_gained']:.2f} s")
+        return "\n".join(rows)
+
+
+class ZoneInterlock:
+    """
+    One asyncio lock per workspace zone. An arm must hold a zone for as long
+    as it is inside it, so the two arms are never in the same zone at once.
+    Time spent waiting for a zone is accumulated in `waits`.
+    """
+
+    def __init__(self, zones=(ZONE_TABLE, ZONE_BINS)):
+        self.locks = {zone: asyncio.Lock() for zone in zones}
+        self.owners = {}
+        self.waits = {}
+
+    async def acquire(self, zone, robot):
+        start = time.perf_counter()
+        await self.locks[zone].acquire()
+        self.owners[zone] = robot
+        self.waits[robot] = self.waits.get(robot, 0.0) + time.perf_counter() - start
+
+    def release(self, zone, robot):
+        if self.owners.get(zone) != robot:
+            raise RuntimeError(f"{robot} released {zone} held by {self.owners.get(zone)}")
+        del self.owners[zone]
+        self.locks[zone].release()
+
+    @asynccontextmanager
+    async def hold(self, zone, robot):
+        await self.acquire(zone, robot)
+        try:
+            yield
+        finally:
+            self.release(zone, robot)
+
+
+class DualRobotOrchestrator:
+    """
+    Runs one task cycle with both robots at once:
+
+      worker: executes the plan; it holds each zone from the motion that
+              enters it until the motion that leaves it has finished (the
+              controller retracts after place, so the last zone is released
+              at the end).
+      camera: starts from its home (table-view) pose. As soon as the worker
+              has left the table for the last time it captures the table frame;
+              table segmentation runs while the camera waits for the bin zone
+              and moves to the bin view; bin segmentation runs while the
+              camera returns home.
+
+    The robot I/O helpers block, so they run in worker threads; capture,
+    verify_table(frame) and verify_bin(frame) are the caller's perception
+    callables (e.g. capture_frame and verify_*_scene bound to the task).
+    The two verify calls never run at the same time, since SAM2 and CLIP
+    are shared. Both connections must report completion events (see
+    reports_completion()); run() refuses to start otherwise.
+    """
+
+    def __init__(self, worker, vision, bin_positions, capture, verify_table, verify_bin):
+        self.worker = worker
+        self.vision = vision
+        self.bin_positions = bin_positions
+        self.capture = capture
+        self.verify_table = verify_table
+        self.verify_bin = verify_bin
+        self.timeline = Timeline()
+        self.interlock = ZoneInterlock()
+        self._perception_lock = threading.Lock()
+
+    def _perceive(self, verify, frame):
+        with self._perception_lock:
+            return verify(frame)
+
+    async def run_worker(self, commands, table_clear):
+        zones = [command_zone(cmd, self.bin_positions) for cmd in commands]
+        last_table = max((i for i, zone in enumerate(zones) if zone == ZONE_TABLE), default=-1)
+        if last_table < 0:
+            table_clear.set()   # the arm never enters the table zone
+        current = None
+        try:
+            for i, (cmd, zone) in enumerate(zip(commands, zones)):
+                left = None
+                if zone != current:
+                    # Enter the new zone before leaving the old one; the camera only ever holds one zone
+                    await self.interlock.acquire(zone, "worker")
+                    left, current = current, zone
+                async with self.timeline.span("worker", cmd.split("(", 1)[0] + f" [{zone}]"):
+                    await asyncio.to_thread(execute_command, self.worker, cmd)
+                # The arm is out of the old zone only once the motion leaving it is over
+                if left is not None:
+                    self.interlock.release(left, "worker")
+                    if left == ZONE_TABLE and i > last_table:
+                        table_clear.set()
+        finally:
+            for zone, owner in list(self.interlock.owners.items()):
+                if owner == "worker":
+                    self.interlock.release(zone, "worker")
+        # Only reached on success: a failed worker leaves the table as it is, so it is never captured
+        table_clear.set()
+
+    async def run_vision(self, table_clear):
+        await table_clear.wait()
+        async with self.timeline.span("camera", "capture table"):
+            table_frame = await asyncio.to_thread(self.capture)
+        if table_frame is None:
+            raise RuntimeError("table-view capture failed")
+
+        async def segment_table():
+            async with self.timeline.span("host", "segment table"):
+                return await asyncio.to_thread(self._perceive, self.verify_table, table_frame)
+        table_task = asyncio.create_task(segment_table())
+        bin_task = None
+
+        try:
+            await self.interlock.acquire(ZONE_BINS, "camera")
+            try:
+                async with self.timeline.span("camera", "move bins"):
+                    await asyncio.to_thread(execute_command, self.vision, "bins")
+                async with self.timeline.span("camera", "capture bins"):
+                    bin_frame = await asyncio.to_thread(self.capture)
+                if bin_frame is None:
+                    raise RuntimeError("bin-view capture failed")
+
+                async def segment_bins():
+                    async with self.timeline.span("host", "segment bins"):
+                        return await asyncio.to_thread(self._perceive, self.verify_bin, bin_frame)
+                bin_task = asyncio.create_task(segment_bins())
+
+                async with self.timeline.span("camera", "move home"):
+                    await asyncio.to_thread(execute_command, self.vision, "home")
+            finally:
+                self.interlock.release(ZONE_BINS, "camera")
+            return await table_task, await bin_task
+        except BaseException:
+            # Don't leave segmentation tasks behind (never awaited) when the cycle fails
+            tasks = [task for task in (table_task, bin_task) if task is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def run(self, commands):
+        """
+        Executes the plan and both verification captures; returns
+        (table_result, bin_result). Robot errors propagate, and a failed
+        worker stops the camera before it captures anything. A failed capture,
+        or a robot without completion events, raises RuntimeError.
+        """
+        if not await asyncio.to_thread(reports_completion, self.worker, self.vision):
+            raise RuntimeError("concurrent orchestration needs completion events (DONE) from both robots")
+        self.timeline = Timeline()
+        table_clear = asyncio.Event()
+        worker = asyncio.create_task(self.run_worker(commands, table_clear))
+        vision = asyncio.create_task(self.run_vision(table_clear))
+        try:
+            await worker
+        except BaseException:
+            vision.cancel()
+            await asyncio.gather(vision, return_exceptions=True)
+            raise
+        return await vision
+
+
+def run_cycle(orchestrator, commands):
+    """Synchronous entry point: runs one cycle, prints the timeline, returns the verification results."""
+    results = asyncio.run(orchestrator.run(commands))
+    print("\n[Orchestrator] Timeline:")
+    print(orchestrator.timeline.render())
+    print(f"[Orchestrator] Interlock waits: {orchestrator.interlock.waits}")
+    return results
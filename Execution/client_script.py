@@ -1,7 +1,442 @@
+import os
 import socket
+import select
 import re
+import time
+import queue
+import threading
+from collections import deque
 from Planning.gpt_functions import generate_instructions
+from Execution.command_parser import Command, parse_command, parse_plan, serialize_plan, PlanValidator
+from Execution.wire_format import BINARY_HELLO, encode_frame
 
+# Keepalive probing for idle robot connections (seconds), where the OS supports setting it
+KEEPALIVE_IDLE     = 10
+KEEPALIVE_INTERVAL = 3
+KEEPALIVE_COUNT    = 3
+
+# Wire protocols. "line" sends bare commands and waits for one ack each (the original
+# protocol); "framed" prefixes every command with a sequence id, keeps up to a window of
+# commands in flight, and matches the robot's "ACK <id>" / "ERR <id> <reason>" replies;
+# "binary" is framed with the commands packed as binary frames (Execution/wire_format.py), falling
+# back to framed text and then to line mode if the robot does not support it.
+PROTOCOL_LINE   = "line"
+PROTOCOL_FRAMED = "framed"
+PROTOCOL_BINARY = "binary"
+ROBOT_PROTOCOL  = os.environ.get("FYP_ROBOT_PROTOCOL", PROTOCOL_LINE)
+FRAMED_HELLO    = "HELLO SEQ1"
+DEFAULT_WINDOW  = 4
+
+# Robots that answer the hello with "HELLO SEQ1 OK DONE" (or "HELLO BIN1 OK DONE") also send "DONE <id>" when a motion
+# finishes; the executor then waits for that instead of sleeping. Seconds allowed per motion:
+MOTION_TIMEOUTS = {
+    "move": 20.0,
+    "pick_up": 10.0,
+    "place": 10.0,
+    "home": 20.0,
+    "bins": 20.0,
+}
+DEFAULT_MOTION_TIMEOUT = 20.0
+
+
+def command_verb(command):
+    """'move(1,2,3,...)' -> 'move'. Also accepts a parsed Command."""
+    if isinstance(command, Command):
+        return command.VERB
+    return command.split("(", 1)[0].strip()
+
+
+def motion_timeout(command, overrides=None):
+    """Seconds allowed for `command`'s motion; `overrides` maps verbs to timeouts that replace MOTION_TIMEOUTS."""
+    verb = command_verb(command)
+    if overrides and verb in overrides:
+        return overrides[verb]
+    return MOTION_TIMEOUTS.get(verb, DEFAULT_MOTION_TIMEOUT)
+
+
+def enable_keepalive(sock, idle=KEEPALIVE_IDLE, interval=KEEPALIVE_INTERVAL, count=KEEPALIVE_COUNT):
+    """Turns on TCP keepalive so a dead robot link is noticed while the connection sits idle."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+    elif hasattr(socket, "TCP_KEEPALIVE"):   # macOS
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+    elif hasattr(socket, "SIO_KEEPALIVE_VALS"):   # Windows
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
+
+
+class RobotCommandError(RuntimeError):
+    """Raised when the robot rejects a command (an ERR reply in the framed protocol)."""
+
+
+class MotionTimeoutError(RobotCommandError):
+    """Raised when a motion's DONE does not arrive within its timeout."""
+
+
+class RobotConnection:
+    """
+    One long-lived TCP connection to a robot controller, shared by every
+    helper that talks to that robot.
+
+    The socket is opened lazily with a connect timeout, TCP_NODELAY and
+    keepalive. If the connection is missing, or the robot closed it while it
+    was idle, the next exchange reconnects first, retrying with exponential
+    backoff. A command is never re-sent automatically after a failure part
+    way through an exchange, since the robot may already be moving; the
+    connection is dropped and ConnectionError is raised instead.
+
+    With protocol="framed" the connection offers the framed protocol on
+    connect ("HELLO SEQ1") and falls back to the line protocol if the robot
+    does not answer "HELLO SEQ1 OK"; `framed` tells which one is in use.
+    If the robot also reports motion completion ("HELLO SEQ1 OK DONE"),
+    `completion_events` is set, commands are finished when their DONE
+    arrives, and the real duration of every motion is recorded in
+    `motion_times`. `motion_timeouts` overrides MOTION_TIMEOUTS per verb for
+    this connection only.
+
+    With protocol="binary" the connection first offers "HELLO BIN1": if the
+    robot accepts, it behaves as framed but each command goes out as a
+    packed binary frame (Execution/wire_format.py; float32 fields unless
+    `float64` is set) and `binary` is set. Otherwise it falls back to the
+    framed text protocol, then to the line protocol.
+
+    All methods are thread-safe; one exchange (send + reply) runs at a time.
+    """
+
+    def __init__(self, host, port, name="Robot", connect_timeout=5.0, io_timeout=30.0,
+                 retries=5, backoff=0.25, max_backoff=4.0, protocol=ROBOT_PROTOCOL, window=DEFAULT_WINDOW,
+                 float64=False, motion_timeouts=None):
+        self.host = host
+        self.port = int(port)
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.io_timeout = io_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.protocol = protocol
+        self.window = window
+        self.float64 = float64
+        self.motion_timeouts = dict(motion_timeouts or {})
+        self.framed = False
+        self.binary = False
+        self.completion_events = False
+        self.motion_times = []
+        self._sock = None
+        self._rbuf = b""
+        self._next_id = 1
+        self._lock = threading.RLock()
+        # Metrics
+        self.connects = 0
+        self.reconnects = 0
+        self.handshake_times = []
+        self.reconnect_time = 0.0
+        self.exchanges = 0
+        self.errors = 0
+
+    def _open(self):
+        start = time.perf_counter()
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.settimeout(self.io_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        enable_keepalive(sock)
+        self.handshake_times.append(time.perf_counter() - start)
+        return sock
+
+    def _is_stale(self):
+        """True if the robot closed the connection (readable with EOF) while it was idle."""
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            return bool(readable) and self._sock.recv(1, socket.MSG_PEEK) == b""
+        except OSError:
+            return True
+
+    def connect(self):
+        """Returns the open socket, (re)connecting with backoff if needed."""
+        with self._lock:
+            if self._sock is not None and not self._is_stale():
+                return self._sock
+            self._drop()
+            reconnecting = self.connects > 0
+            start = time.perf_counter()
+            delay = self.backoff
+            for attempt in range(1, self.retries + 1):
+                try:
+                    self._sock = self._open()
+                    break
+                except OSError as e:
+                    print(f"[{self.name}] Connect attempt {attempt}/{self.retries} failed: {e}")
+                    if attempt == self.retries:
+                        raise ConnectionError(f"{self.name}: cannot connect to {self.host}:{self.port}") from e
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+            self._rbuf = b""
+            self.framed = False
+            self.binary = False
+            self.completion_events = False
+            if self.protocol in (PROTOCOL_FRAMED, PROTOCOL_BINARY):
+                self._negotiate()
+            self.connects += 1
+            if reconnecting:
+                self.reconnects += 1
+                self.reconnect_time += time.perf_counter() - start
+                print(f"[{self.name}] Reconnected to {self.host}:{self.port}")
+            return self._sock
+
+    def _hello(self, hello):
+        self._sock.sendall(hello.encode("utf-8") + b"\n")
+        reply = self._sock.recv(1024).decode("utf-8").strip()
+        accepted = reply.startswith(f"{hello} OK")
+        if accepted:
+            self.completion_events = "DONE" in reply.split()[3:]
+        return accepted, reply
+
+    def _negotiate(self):
+        try:
+            if self.protocol == PROTOCOL_BINARY:
+                self.binary, reply = self._hello(BINARY_HELLO)
+                if not self.binary:
+                    print(f"[{self.name}] Robot does not support binary commands ({reply!r}); trying framed text")
+            if self.binary:
+                self.framed = True
+            else:
+                self.framed, reply = self._hello(FRAMED_HELLO)
+        except OSError as e:
+            self._drop()
+            raise ConnectionError(f"{self.name}: protocol negotiation failed: {e}") from e
+        if not self.framed:
+            print(f"[{self.name}] Robot does not support framed commands ({reply!r}); using line protocol")
+
+    def _readline(self):
+        while b"\n" not in self._rbuf:
+            chunk = self._sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("connection closed by robot")
+            self._rbuf += chunk
+        line, self._rbuf = self._rbuf.split(b"\n", 1)
+        return line.decode("utf-8").strip()
+
+    def _send_frame(self, command):
+        seq = self._next_id
+        self._next_id += 1
+        if self.binary:
+            self._sock.sendall(self._encode(seq, command))
+        else:
+            self._sock.sendall(f"{seq} {command}\n".encode("utf-8"))
+        return seq
+
+    def _encode(self, seq, command):
+        """Binary frame for a Command or command string (vision commands are encoded by name)."""
+        if not isinstance(command, Command):
+            if "(" not in command:
+                return encode_frame(seq, command.strip(), float64=self.float64)
+            command = parse_command(command)
+        return encode_frame(seq, command.VERB, command.values(), float64=self.float64)
+
+    def _motion_timeout(self, command):
+        return motion_timeout(command, self.motion_timeouts)
+
+    def _read_reply(self, timeout=None):
+        """(status, seq, detail) of the next framed reply, e.g. ("ACK", 7, "")."""
+        self._sock.settimeout(timeout if timeout is not None else self.io_timeout)
+        try:
+            line = self._readline()
+        finally:
+            if self._sock is not None:
+                self._sock.settimeout(self.io_timeout)
+        parts = line.split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ConnectionError(f"malformed reply from robot: {line!r}")
+        return parts[0], int(parts[1]), parts[2] if len(parts) > 2 else ""
+
+    def _drop(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def exchange(self, line):
+        """
+        Sends one command and returns the robot's reply, stripped. In framed
+        mode the reply's status word is returned (e.g. "ACK" or "DONE") and an
+        ERR reply raises RobotCommandError; if the robot reports completion,
+        this waits for the command's DONE (up to its motion timeout).
+        """
+        with self._lock:
+            sock = self.connect()
+            # Set before sending, so a send that times out reaches the handlers below with no reply
+            reply = None
+            try:
+                if self.framed:
+                    seq = self._send_frame(line)
+                    sent_at = time.perf_counter()
+                    while reply != "DONE" and not (reply == "ACK" and not self.completion_events):
+                        status, reply_seq, detail = self._read_reply(
+                            self._motion_timeout(line) if reply == "ACK" else None)
+                        if reply_seq != seq:   # late reply to an earlier, abandoned command
+                            continue
+                        if status == "ERR":
+                            raise RobotCommandError(f"{self.name} rejected {line!r}: {detail}")
+                        reply = status
+                    if reply == "DONE":
+                        self.motion_times.append((command_verb(line), time.perf_counter() - sent_at))
+                else:
+                    sock.sendall(line.encode("utf-8") + b"\n")
+                    reply = sock.recv(1024)
+                    if not reply:
+                        raise ConnectionError("connection closed by robot")
+                    reply = reply.decode("utf-8").strip()
+            except socket.timeout as e:
+                self.errors += 1
+                if self.framed and reply == "ACK":
+                    raise MotionTimeoutError(
+                        f"{self.name}: no DONE for {line!r} within {self._motion_timeout(line):g} s") from e
+                self._drop()
+                raise ConnectionError(f"{self.name}: exchange of {line!r} timed out") from e
+            except OSError as e:
+                self.errors += 1
+                self._drop()
+                raise ConnectionError(f"{self.name}: exchange of {line!r} failed: {e}") from e
+            self.exchanges += 1
+            return reply
+
+    def send_plan(self, commands):
+        """
+        Sends a list of cleaned commands (or parsed Commands, which a binary
+        connection packs without re-parsing) and returns each command's ack
+        latency (seconds). In framed mode up to `window` commands are sent
+        ahead of their acks, so the controller can queue the next motions and
+        each command costs about one round trip; in line mode they are
+        exchanged one at a time. If the robot rejects a command,
+        RobotCommandError is raised and nothing after the window is sent.
+
+        If the robot reports completion, the window counts commands that are
+        not yet DONE, this returns when the last motion has finished, and a
+        motion that overruns its timeout (counted from the end of the previous
+        motion) raises MotionTimeoutError.
+        """
+        with self._lock:
+            self.connect()
+            if not self.framed:
+                latencies = []
+                for command in commands:
+                    start = time.perf_counter()
+                    self.exchange(command)
+                    latencies.append(time.perf_counter() - start)
+                return latencies
+
+            pending = deque(commands)
+            inflight = {}
+            latencies = [None] * len(pending)
+            last_done = None
+            command = None
+            try:
+                while pending or inflight:
+                    while pending and len(inflight) < self.window:
+                        index = len(commands) - len(pending)
+                        command = pending.popleft()
+                        inflight[self._send_frame(command)] = (index, command, time.perf_counter())
+                    timeout = None
+                    if self.completion_events:
+                        # The oldest unfinished command is the one moving now
+                        _, command, sent_at = inflight[min(inflight)]
+                        started = max(sent_at, last_done or sent_at)
+                        timeout = max(started + self._motion_timeout(command) - time.perf_counter(), 0.001)
+                    status, seq, detail = self._read_reply(timeout)
+                    if seq not in inflight:
+                        continue
+                    index, command, sent_at = inflight[seq]
+                    if status == "ERR":
+                        raise RobotCommandError(f"{self.name} rejected {command!r}: {detail}")
+                    now = time.perf_counter()
+                    if status == "ACK":
+                        latencies[index] = now - sent_at
+                        if self.completion_events:
+                            continue
+                    elif status == "DONE":
+                        if latencies[index] is None:
+                            latencies[index] = now - sent_at
+                        self.motion_times.append((command_verb(command), now - max(sent_at, last_done or sent_at)))
+                        last_done = now
+                    del inflight[seq]
+                    self.exchanges += 1
+            except socket.timeout as e:
+                self.errors += 1
+                if self.completion_events:
+                    raise MotionTimeoutError(
+                        f"{self.name}: no DONE for {command!r} within {self._motion_timeout(command):g} s") from e
+                self._drop()
+                raise ConnectionError(f"{self.name}: plan timed out") from e
+            except OSError as e:
+                self.errors += 1
+                self._drop()
+                raise ConnectionError(f"{self.name}: plan interrupted: {e}") from e
+            return latencies
+
+    def close(self):
+        with self._lock:
+            self._drop()
+
+    def metrics(self):
+        handshakes = self.handshake_times
+        return {
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "handshake_last": handshakes[-1] if handshakes else 0.0,
+            "handshake_mean": sum(handshakes) / len(handshakes) if handshakes else 0.0,
+            "reconnect_time": self.reconnect_time,
+            "exchanges": self.exchanges,
+            "errors": self.errors,
+            "protocol": PROTOCOL_BINARY if self.binary else PROTOCOL_FRAMED if self.framed else PROTOCOL_LINE,
+            "completion_events": self.completion_events,
+            "motion_time": sum(t for _, t in self.motion_times),
+            "motions": self.motion_stats(),
+        }
+
+    def motion_stats(self):
+        """Measured motion durations per command type: {verb: {count, mean, max}}."""
+        by_verb = {}
+        for verb, seconds in self.motion_times:
+            by_verb.setdefault(verb, []).append(seconds)
+        return {verb: {"count": len(times), "mean": sum(times) / len(times), "max": max(times)}
+                for verb, times in by_verb.items()}
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def get_robot_connection(host, port, name="Robot"):
+    """Returns the shared RobotConnection for host:port, creating it on first use."""
+    key = (host, int(port))
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            conn = _connections[key] = RobotConnection(host, port, name=name)
+        return conn
+
+
+def robot_connection_metrics():
+    """Metrics of every shared connection, keyed by connection name."""
+    with _connections_lock:
+        return {conn.name: conn.metrics() for conn in _connections.values()}
+
+
+def close_robot_connections():
+    with _connections_lock:
+        for conn in _connections.values():
+            conn.close()
 
 
 def clean_command(command):
@@ -21,14 +456,113 @@ def send_command_to_robot(client_socket, command):
     try:
         cleaned_command = clean_command(command)
         print(f"Sending cleaned command: {cleaned_command}")
-        # Send the command terminated by a newline
-        client_socket.sendall(cleaned_command.encode('utf-8') + b'\n')
-        # Wait for acknowledgement from the server
-        ack = client_socket.recv(1024).decode('utf-8').strip()
+        if isinstance(client_socket, RobotConnection):
+            ack = client_socket.exchange(cleaned_command)
+        else:
+            # Send the command terminated by a newline
+            client_socket.sendall(cleaned_command.encode('utf-8') + b'\n')
+            # Wait for acknowledgement from the server
+            ack = client_socket.recv(1024).decode('utf-8').strip()
         print(f"Received ack: {ack}")
     except Exception as e:
         print(f"Error sending command: {e}")
 
+def execute_command(connection, command, fallback_delay=1.0):
+    """
+    Sends one command over a RobotConnection and returns once the motion is
+    over: on the robot's DONE when it reports completion, otherwise after
+    `fallback_delay` seconds (the old fixed sleep). A line-protocol reply of
+    DONE (the vision robot's) also counts as completion.
+    """
+    start = time.perf_counter()
+    reply = connection.exchange(command)
+    if reply != "DONE" and not connection.completion_events:
+        time.sleep(fallback_delay)
+    elif not connection.framed:
+        connection.motion_times.append((command_verb(command), time.perf_counter() - start))
+    return reply
+
+
+def send_plan_to_robot(connection, commands, delay=1.0):
+    """
+    Parses and validates the whole plan (arity, ranges, pick after move)
+    before anything is sent, then sends the plan over a RobotConnection and returns once the robot
+    has finished it: pipelined when the robot speaks the framed protocol,
+    otherwise one command at a time. Completion is the robot's DONE for the
+    last motion when it reports one; otherwise `delay` seconds per command
+    are allowed, as before.
+
+    Raises CommandParseError (a ValueError) for an invalid command or plan
+    and nothing is sent, RobotCommandError if the robot
+    rejects one (MotionTimeoutError if a motion overruns), and
+    ConnectionError if the link fails.
+    """
+    plan = parse_plan(commands)
+    connection.connect()
+    # Binary frames are packed straight from the typed commands; text is serialized once
+    cleaned = plan if connection.binary else serialize_plan(plan)
+    if connection.framed:
+        start = time.perf_counter()
+        latencies = connection.send_plan(cleaned)
+        print(f"[{connection.name}] Sent {len(cleaned)} commands, mean ack {1000 * sum(latencies) / max(len(latencies), 1):.1f} ms")
+        if not connection.completion_events:
+            time.sleep(max(delay * len(cleaned) - (time.perf_counter() - start), 0))
+        return len(cleaned)
+    for cmd in cleaned:
+        print(f"Sending cleaned command: {cmd}")
+        print(f"Received ack: {execute_command(connection, cmd, delay)}")
+    return len(cleaned)
+
+class PlanStreamError(RuntimeError):
+    """Raised when a streamed plan fails or yields an invalid command part-way through."""
+
+
+def stream_commands_to_robot(connection, commands, delay=1.0):
+    """
+    Sends commands from an iterator (e.g. stream_instructions()) over a
+    RobotConnection while the iterator is still producing them. A background
+    thread pulls, parses and validates each line against the plan so far;
+    this thread sends them in order with execute_command().
+
+    If the stream raises or produces an invalid command, or the robot rejects
+    a command or the link fails, nothing after the last good command is sent
+    (a place never follows a failed pick_up) and PlanStreamError is raised.
+
+    Returns the number of commands sent.
+    """
+    pending = queue.Queue()
+    validator = PlanValidator()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for raw in commands:
+                if stopped.is_set():
+                    return
+                pending.put(validator.feed(parse_command(raw)).serialize())
+        except Exception as e:
+            pending.put(e)
+        else:
+            pending.put(None)
+
+    threading.Thread(target=produce, name="PlanStream", daemon=True).start()
+
+    sent = 0
+    try:
+        while True:
+            item = pending.get()
+            if item is None:
+                return sent
+            if isinstance(item, Exception):
+                raise PlanStreamError(f"Plan stream aborted after {sent} commands: {item}") from item
+            try:
+                execute_command(connection, item, delay)
+            except (RobotCommandError, ConnectionError) as e:
+                raise PlanStreamError(f"Plan stream aborted after {sent} commands: {e}") from e
+            sent += 1
+    finally:
+        stopped.set()
+
 def main():
 
     # A short script used for testing connections
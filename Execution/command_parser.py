@@ -0,0 +1,219 @@
+import re
+from operator import attrgetter
+
+# Typed robot commands and a single-pass parser/validator for planner output.
+# A line such as "2.  move( 81.3, -310.6, 100, 74.31, 0.13, -5.22 )" is matched once by a compiled
+# pattern, its arguments are converted and range-checked, and the result is a slotted Move/PickUp/Place.
+# str() of a command gives back the compact wire form the robot expects, so parse -> serialize -> parse
+# is lossless.
+
+# Workspace limits (robot units, mm and degrees). Anything outside is a planning error, not a pose.
+POSITION_LIMIT = 1000.0
+ANGLE_LIMIT = 180.0
+
+# Anything float() takes as a plain decimal: optional sign, "5", "5.", ".5", "5.25", optional exponent
+# ("1e-3"). No "nan"/"inf" - those are never coordinates.
+_NUM = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+
+
+def _args(count):
+    return r"\(\s*" + r"\s*,\s*".join([f"({_NUM})"] * count) + r"\s*\)"
+
+
+# One pass over a well-formed line: optional numbering, the verb and exactly the right number of
+# numeric arguments. Groups 1-6 are a move, 7-9 a pick_up, 10-12 a place.
+_FAST_RE = re.compile(
+    rf"^\s*(?:\d+[.)]\s*)?(?:move\s*{_args(6)}|pick_up\s*{_args(3)}|place\s*{_args(3)})\s*$"
+)
+# Only used once the fast pattern has failed, to say what is wrong with the line.
+_COMMAND_RE = re.compile(r"^\s*(?:\d+[.)]\s*)?([a-z_]+)\s*\(([^()]*)\)\s*$")
+_NUMBER_RE = re.compile(rf"^\s*({_NUM})\s*$")
+
+
+class CommandParseError(ValueError):
+    """Raised for a malformed command or an invalid plan. A ValueError, so existing handlers still apply."""
+
+
+def _fmt(value):
+    """Shortest text that parses back to the same value: 100.0 -> '100', -5.22 -> '-5.22'."""
+    return "{:.10g}".format(value)
+
+
+def _check(verb, names, values, limit):
+    for name, value in zip(names, values):
+        # Chained comparison is False for NaN as well as for out-of-range values
+        if not -limit <= value <= limit:
+            raise CommandParseError(f"{verb}: {name}={value} outside +/-{limit:g}")
+
+
+class Command:
+    """Base class for typed commands. Subclasses set VERB and FIELDS; values are stored as floats."""
+
+    __slots__ = ()
+    VERB = ""
+    FIELDS = ()
+
+    @property
+    def position(self):
+        return (self.x, self.y, self.z)
+
+    def values(self):
+        return self._VALUES(self)
+
+    def serialize(self):
+        return f"{self.VERB}({','.join(map(_fmt, self.values()))})"
+
+    __str__ = serialize
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(map(_fmt, self.values()))})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def __hash__(self):
+        return hash((self.VERB, self.values()))
+
+
+class Move(Command):
+    __slots__ = ("x", "y", "z", "roll", "pitch", "yaw")
+    VERB = "move"
+    FIELDS = __slots__
+    _VALUES = attrgetter(*FIELDS)
+
+    def __init__(self, x, y, z, roll, pitch, yaw):
+        position = self.x, self.y, self.z = float(x), float(y), float(z)
+        orientation = self.roll, self.pitch, self.yaw = float(roll), float(pitch), float(yaw)
+        _check(self.VERB, "xyz", position, POSITION_LIMIT)
+        _check(self.VERB, ("roll", "pitch", "yaw"), orientation, ANGLE_LIMIT)
+
+    @property
+    def orientation(self):
+        return (self.roll, self.pitch, self.yaw)
+
+
+class _GripperCommand(Command):
+    """Shared layout of pick_up and place: a gripper action at (x, y, z)."""
+
+    __slots__ = ("x", "y", "z")
+    FIELDS = __slots__
+    _VALUES = attrgetter(*FIELDS)
+
+    def __init__(self, x, y, z):
+        position = self.x, self.y, self.z = float(x), float(y), float(z)
+        _check(self.VERB, "xyz", position, POSITION_LIMIT)
+
+
+class PickUp(_GripperCommand):
+    __slots__ = ()
+    VERB = "pick_up"
+
+
+class Place(_GripperCommand):
+    __slots__ = ()
+    VERB = "place"
+
+
+COMMAND_TYPES = {cls.VERB: cls for cls in (Move, PickUp, Place)}
+
+
+def _diagnose(line):
+    """Error for a line the fast pattern rejected: unknown verb, wrong arity or a non-numeric argument."""
+    text = line.strip()
+    match = _COMMAND_RE.match(line)
+    if match is None:
+        return CommandParseError(f"Invalid command: {text}")
+    verb, args = match.groups()
+    cls = COMMAND_TYPES.get(verb)
+    if cls is None:
+        return CommandParseError(f"Unknown command '{verb}': {text}")
+    values = args.split(",") if args.strip() else []
+    if len(values) != len(cls.FIELDS):
+        return CommandParseError(f"{verb} takes {len(cls.FIELDS)} values, got {len(values)}: {text}")
+    for value in values:
+        if _NUMBER_RE.match(value) is None:
+            return CommandParseError(f"{verb}: '{value.strip()}' is not a number: {text}")
+    return CommandParseError(f"Invalid command: {text}")
+
+
+def parse_command(line):
+    """
+    Parses one planner line into a Move, PickUp or Place.
+
+    Args:
+        line: Command text, optionally numbered ("1. ", "1) ") and with arbitrary spacing.
+
+    Returns:
+        The typed command.
+
+    Raises:
+        CommandParseError: unknown verb, wrong number of arguments, a non-numeric argument,
+        or a value outside the workspace limits.
+    """
+    match = _FAST_RE.match(line)
+    if match is None:
+        raise _diagnose(line)
+    groups = match.groups()
+    if groups[0] is not None:
+        return Move(*groups[:6])
+    if groups[6] is not None:
+        return PickUp(*groups[6:9])
+    return Place(*groups[9:])
+
+
+class PlanValidator:
+    """
+    Plan-level checks, fed one command at a time so a streamed plan can be checked as it arrives:
+    every pick_up must come straight after a move (the approach to the object), and the gripper must
+    be empty to pick and holding something to place.
+    """
+
+    def __init__(self):
+        self.previous = None
+        self.holding = False
+        self.index = 0
+
+    def feed(self, command):
+        """Checks `command` against the plan so far and returns it. Raises CommandParseError if it breaks the plan."""
+        self.index += 1
+        if isinstance(command, PickUp):
+            if not isinstance(self.previous, Move):
+                raise CommandParseError(f"Command {self.index}: pick_up is not preceded by a move")
+            if self.holding:
+                raise CommandParseError(f"Command {self.index}: pick_up while already holding an object")
+            self.holding = True
+        elif isinstance(command, Place):
+            if not self.holding:
+                raise CommandParseError(f"Command {self.index}: place without a preceding pick_up")
+            self.holding = False
+        self.previous = command
+        return command
+
+
+def parse_plan(lines):
+    """
+    Parses and validates a whole plan before any of it is sent.
+
+    Args:
+        lines: Iterable of command strings (e.g. generate_instructions() output).
+
+    Returns:
+        List of typed commands.
+
+    Raises:
+        CommandParseError: the first bad command or plan-level violation, with its position.
+    """
+    validator = PlanValidator()
+    commands = []
+    for index, line in enumerate(lines, start=1):
+        try:
+            command = parse_command(line)
+        except CommandParseError as e:
+            raise CommandParseError(f"Command {index}: {e}") from None
+        commands.append(validator.feed(command))
+    return commands
+
+
+def serialize_plan(commands):
+    """Wire form of a list of typed commands."""
+    return [command.serialize() for command in commands]
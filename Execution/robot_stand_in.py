@@ -0,0 +1,210 @@
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+from Execution.wire_format import BINARY_HELLO, FrameDecoder, frame_to_text
+
+# Local TCP stand-in for the robot controllers, for testing the execution layer without hardware
+
+# Vision-robot commands; answered with DONE once the (simulated) move is over
+VISION_COMMANDS = ("home", "bins")
+
+# Must match Execution.client_script.FRAMED_HELLO
+FRAMED_HELLO = "HELLO SEQ1"
+
+
+class RobotStandIn:
+    """
+    Listens on localhost and speaks the robots' line protocol: every
+    newline-terminated command is recorded in `received`; motion commands are
+    acknowledged straight away (the real controller acks on receipt and then
+    moves), vision commands reply DONE after `motion_time` seconds.
+
+    With framed=True a client that sends "HELLO SEQ1" is switched to the
+    framed protocol: commands arrive as "<id> <command>" and are answered
+    "ACK <id>", "DONE <id>" or "ERR <id> <reason>". With framed=False the
+    stand-in behaves like a legacy controller that only knows line mode.
+    Commands containing any of the `reject` substrings are refused.
+
+    With binary=True as well, "HELLO BIN1" switches the client to binary
+    frames instead, decoded with the reference decoder in
+    Execution/wire_format.py; replies are the framed protocol's, and
+    `received` holds the decoded commands in text form.
+
+    With completion=True as well, the hello is answered "HELLO SEQ1 OK DONE":
+    every command is acked on receipt and queued, motions run one after
+    another, and each sends "DONE <id>" when it finishes. `motion_time` is
+    seconds per motion, or a {verb: seconds} dict.
+
+    kick() closes every open client connection, to exercise reconnects.
+    """
+
+    def __init__(self, port=0, motion_time=0.0, ack="OK", framed=True, reject=(), completion=False, binary=True):
+        self.motion_time = motion_time
+        self.ack = ack
+        self.framed = framed
+        self.binary = binary
+        self.reject = reject
+        self.completion = completion
+        self.received = []
+        self.connections = 0
+        self._clients = set()
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.motions = queue.Queue()
+                with stand_in._lock:
+                    stand_in.connections += 1
+                    stand_in._clients.add(self.request)
+
+            def handle(self):
+                framed = False
+                self.lock = threading.Lock()
+                for raw in self.rfile:
+                    line = raw.decode("utf-8").strip()
+                    if not line:
+                        continue
+                    if line == BINARY_HELLO and stand_in.framed and stand_in.binary:
+                        self.hello(BINARY_HELLO)
+                        self.handle_binary()
+                        return
+                    if line == FRAMED_HELLO and stand_in.framed:
+                        framed = True
+                        self.hello(FRAMED_HELLO)
+                        continue
+                    seq = None
+                    if framed:
+                        seq, _, line = line.partition(" ")
+                        if not seq.isdigit():
+                            self.reply("ERR 0 malformed frame")
+                            continue
+                    self.command(seq, line)
+
+            def handle_binary(self):
+                decoder = FrameDecoder()
+                while True:
+                    try:
+                        data = self.rfile.read1(4096)
+                    except OSError:
+                        return
+                    if not data:
+                        return
+                    frames, errors = decoder.feed(data)
+                    for error in errors:
+                        self.reply(f"ERR 0 {error}")
+                    for seq, verb, values, float64 in frames:
+                        self.command(str(seq), frame_to_text(verb, values, float64))
+
+            def hello(self, hello):
+                if stand_in.completion:
+                    threading.Thread(target=self.run_motions, daemon=True).start()
+                    self.reply(f"{hello} OK DONE")
+                else:
+                    self.reply(f"{hello} OK")
+
+            def command(self, seq, line):
+                """Records and answers one command; seq is None in line mode."""
+                with stand_in._lock:
+                    stand_in.received.append(line)
+                if seq is not None and stand_in.completion:
+                    if any(bad in line for bad in stand_in.reject):
+                        self.reply(f"ERR {seq} rejected")
+                    else:
+                        self.reply(f"ACK {seq}")
+                        self.motions.put((seq, line))
+                    return
+                status, detail = stand_in.handle_line(line)
+                if seq is None:
+                    self.reply(stand_in.ack if status == "ACK" else status)
+                else:
+                    self.reply(f"{status} {seq} {detail}".strip())
+
+            def reply(self, text):
+                with self.lock:
+                    self.wfile.write(text.encode("utf-8") + b"\n")
+
+            def run_motions(self):
+                while True:
+                    item = self.motions.get()
+                    if item is None:   # client gone
+                        return
+                    seq, line = item
+                    time.sleep(stand_in.duration(line))
+                    try:
+                        self.reply(f"DONE {seq}")
+                    except OSError:
+                        return
+
+            def finish(self):
+                self.motions.put(None)
+                with stand_in._lock:
+                    stand_in._clients.discard(self.request)
+                try:
+                    super().finish()
+                except OSError:
+                    pass
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server(("127.0.0.1", port), Handler)
+        self.host, self.port = self.server.server_address
+        self._thread = None
+
+    def duration(self, line):
+        """Simulated motion time for one command."""
+        if isinstance(self.motion_time, dict):
+            return self.motion_time.get(line.split("(", 1)[0], 0.0)
+        return self.motion_time
+
+    def handle_line(self, line):
+        """Returns (status, detail) for one command: ACK, DONE or ERR."""
+        if any(bad in line for bad in self.reject):
+            return "ERR", "rejected"
+        if line in VISION_COMMANDS:
+            time.sleep(self.duration(line))
+            return "DONE", ""
+        return "ACK", ""
+
+    def kick(self):
+        """Drops every client connection, as a robot reboot or network blip would."""
+        with self._lock:
+            clients = list(self._clients)
+        for sock in clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.kick()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with RobotStandIn(port=5000, motion_time=1.0) as robot:
+        print(f"Robot stand-in listening on {robot.host}:{robot.port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
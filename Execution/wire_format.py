@@ -0,0 +1,144 @@
+import struct
+
+# Binary encoding of robot commands ("BIN1"), negotiated with "HELLO BIN1" in place of the text frames.
+# Only needs the standard library's struct, so this file doubles as the reference decoder for the
+# robot controller: copy it across and feed the socket's bytes to FrameDecoder.
+#
+# Frame layout (network byte order):
+#
+#   offset  size  field
+#   0       2     length of everything after this field (uint16)
+#   2       1     version (WIRE_VERSION)
+#   3       1     opcode (OPCODES)
+#   4       1     flags (FLAG_FLOAT64: fields are float64, otherwise float32)
+#   5       4     sequence id (uint32), echoed in the robot's "ACK <id>" / "DONE <id>" / "ERR <id>" replies
+#   9       n*4   fields (n*8 with FLAG_FLOAT64); n is fixed by the opcode
+#
+# Replies stay text lines, as in the framed protocol.
+
+WIRE_VERSION = 1
+BINARY_HELLO = "HELLO BIN1"
+
+FLAG_FLOAT64 = 0x01
+
+# opcode: (verb, number of fields)
+OPCODES = {
+    0x01: ("move", 6),      # x, y, z, roll, pitch, yaw
+    0x02: ("pick_up", 3),   # x, y, z
+    0x03: ("place", 3),     # x, y, z
+    0x10: ("home", 0),      # vision robot poses
+    0x11: ("bins", 0),
+}
+VERB_OPCODES = {verb: (opcode, count) for opcode, (verb, count) in OPCODES.items()}
+
+_LENGTH = struct.Struct("!H")
+_HEADER = struct.Struct("!BBBI")   # version, opcode, flags, sequence id
+_FIELDS = {
+    (float64, count): struct.Struct(f"!{count}{'d' if float64 else 'f'}")
+    for float64 in (False, True) for count in {n for _, n in OPCODES.values()}
+}
+
+
+class WireFormatError(ValueError):
+    """Raised for a frame that cannot be encoded or decoded."""
+
+
+def encode_frame(seq, verb, values=(), float64=False):
+    """
+    Encodes one command as a length-prefixed binary frame.
+
+    Args:
+        seq: Sequence id (0 - 2**32-1).
+        verb: Command verb, a key of VERB_OPCODES.
+        values: The command's numeric fields, in order.
+        float64: Pack fields as float64 instead of float32.
+
+    Returns:
+        The frame as bytes.
+    """
+    try:
+        opcode, count = VERB_OPCODES[verb]
+    except KeyError:
+        raise WireFormatError(f"no opcode for '{verb}'") from None
+    if len(values) != count:
+        raise WireFormatError(f"{verb} takes {count} values, got {len(values)}")
+    body = (_HEADER.pack(WIRE_VERSION, opcode, FLAG_FLOAT64 if float64 else 0, seq)
+            + _FIELDS[float64, count].pack(*values))
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_frame(body):
+    """
+    Decodes one frame body (the bytes after the length prefix).
+
+    Returns:
+        (seq, verb, values, float64).
+
+    Raises:
+        WireFormatError: unknown version or opcode, or a body of the wrong size.
+    """
+    if len(body) < _HEADER.size:
+        raise WireFormatError(f"frame of {len(body)} bytes is shorter than the header")
+    version, opcode, flags, seq = _HEADER.unpack_from(body)
+    if version != WIRE_VERSION:
+        raise WireFormatError(f"unsupported wire version {version}")
+    if opcode not in OPCODES:
+        raise WireFormatError(f"unknown opcode 0x{opcode:02x}")
+    verb, count = OPCODES[opcode]
+    float64 = bool(flags & FLAG_FLOAT64)
+    fields = _FIELDS[float64, count]
+    if len(body) != _HEADER.size + fields.size:
+        raise WireFormatError(f"{verb} frame is {len(body)} bytes, expected {_HEADER.size + fields.size}")
+    return seq, verb, fields.unpack_from(body, _HEADER.size), float64
+
+
+def frame_to_text(verb, values, float64=False):
+    """
+    Text form of a decoded command, for controller code that still takes strings:
+    ("move", (81.3000030517578, ...)) -> "move(81.3,...)". float32 fields are printed to the
+    7 significant digits they carry.
+    """
+    if not values:
+        return verb
+    spec = "{:.15g}" if float64 else "{:.7g}"
+    return f"{verb}({','.join(spec.format(v) for v in values)})"
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for the robot side: feed() it whatever recv() returned and it returns
+    every complete frame in the data so far, keeping any partial frame for the next call.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        Buffers `data` and decodes every complete frame in the buffer.
+
+        Returns:
+            (frames, errors): frames as (seq, verb, values, float64), and a WireFormatError for
+            each corrupt frame. A corrupt frame is skipped (its length prefix is still valid), so
+            the frames after it in the same chunk are decoded too.
+        """
+        buffer = self._buffer
+        buffer += data
+        frames, errors = [], []
+        offset = 0
+        while len(buffer) - offset >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(buffer, offset)
+            start = offset + _LENGTH.size
+            if len(buffer) < start + length:
+                break
+            offset = start + length
+            try:
+                frames.append(decode_frame(bytes(buffer[start:offset])))
+            except WireFormatError as e:
+                errors.append(e)
+        del buffer[:offset]
+        return frames, errors
+
+    def pending(self):
+        """Bytes of an incomplete frame still waiting for the rest of its data."""
+        return len(self._buffer)
@@ -6,18 +6,17 @@ import json
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
+from Perception.camera_service import get_camera_service
+from Mapping.calibration_store import update_calibration_bundle, CALIBRATION_BUNDLE
 
 def capture_raw_frame(camera_index=1):
     """
     Capture a single RGB frame from the specified camera index.
     Returns a NumPy array of shape (H, W, 3), in RGB order.
     """
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open camera index {camera_index}")
-    ret, frame_bgr = cap.read()
-    cap.release()
-    if not ret:
+    try:
+        _, frame_bgr = get_camera_service(camera_index).wait_for_fresh()
+    except TimeoutError:
         raise RuntimeError("Failed to capture image from camera.")
     # Convert BGR → RGB
     frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
@@ -95,7 +94,16 @@ def main():
     with open(out_path, "w") as f:
         json.dump(mapping, f, indent=2)
 
-    print(f"\nWrote simple bin calibration to '{out_path}'.\n"
+    # 4) Store the bins in the binary calibration bundle
+    names = list(mapping.keys())
+    update_calibration_bundle(
+        CALIBRATION_BUNDLE,
+        bin_names=np.asarray(names, dtype="U32"),
+        bin_pixels=np.asarray([mapping[n]["pixel"] for n in names], dtype=np.float64),
+        bin_poses=np.asarray([mapping[n]["pose6d"] for n in names], dtype=np.float64),
+    )
+
+    print(f"\nWrote simple bin calibration to '{out_path}' and '{CALIBRATION_BUNDLE}'.\n"
           "You can now use this JSON in verify_bin_scene(...) to decide nearest bin.")
 
 if __name__ == "__main__":
@@ -1,35 +1,32 @@
 import cv2
 import json
 import numpy as np
+from Perception.camera_service import get_camera_service
+from Mapping.calibration_store import update_calibration_bundle, CALIBRATION_BUNDLE
 
 # Define checkerboard size (internal corners)
 CHECKERBOARD_SIZE = (4, 3)  
 
 def capture_checkerboard():
     """Captures an image and detects the checkerboard corners."""
-    cap = cv2.VideoCapture(1)  # Change to 1 if using an external camera
-    
-    if not cap.isOpened():
+    try:
+        camera = get_camera_service(1)  # Change to 0 if using the built-in camera
+    except RuntimeError:
         print("Error: Could not open camera.")
         return None
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to grab frame.")
-            continue
-
-        cv2.imshow("Camera Feed", frame)
+        _, frame = camera.latest()
+        if frame is not None:
+            cv2.imshow("Camera Feed", frame)
         key = cv2.waitKey(1) & 0xFF
 
-        if key == ord('c'):  # Press 'c' to capture
-            cap.release()
+        if key == ord('c') and frame is not None:  # Press 'c' to capture
             cv2.destroyAllWindows()
-            return frame
+            return frame.copy()
         elif key == ord('q'):
             break
 
-    cap.release()
     cv2.destroyAllWindows()
     return None
 
@@ -78,6 +75,16 @@ def create_mapping(image_points, gripper_positions):
     
     return mapping
 
+def save_corners_to_bundle(image_points, gripper_positions, image_size):
+    """Writes the corner pixels, their 6D poses and the (width, height) of the image into the calibration bundle."""
+    update_calibration_bundle(
+        CALIBRATION_BUNDLE,
+        corner_pixels=np.asarray(image_points, dtype=np.float64).reshape(-1, 2),
+        corner_poses=np.asarray(gripper_positions, dtype=np.float64).reshape(-1, 6),
+        image_size=image_size,
+    )
+    print(f"Calibration bundle updated: {CALIBRATION_BUNDLE}")
+
 def update_point_mapping():
     """
     Captures a new checkerboard image, detects its corners,
@@ -106,6 +113,9 @@ def update_point_mapping():
     # Step 5: Save the updated mapping to point_mapping.json.
     with open("point_mapping.json", "w") as file:
         json.dump(point_mapping, file, indent=4)
+
+    # Step 6: Store the same corners in the binary calibration bundle.
+    save_corners_to_bundle(image_points, gripper_positions, (image.shape[1], image.shape[0]))
     
     print("\n✅ 2D Image -> 6D Gripper mapping updated successfully!")
     return True
@@ -132,3 +142,4 @@ if __name__ == "__main__":
         # Save the mapping for future use
         with open("point_mapping.json", "w") as file:
             json.dump(point_mapping, file, indent=4)
+        save_corners_to_bundle(image_points, gripper_positions, (image.shape[1], image.shape[0]))
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+# Versioned binary calibration bundle (.npz) replacing the separate JSON files
+
+CALIBRATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Calibration")
+CALIBRATION_BUNDLE = os.path.join(CALIBRATION_DIR, "calibration.npz")
+JSON_DIR = os.path.join(CALIBRATION_DIR, "Json")
+
+# Legacy bin file, read from the working directory when the bundle has no bins
+LEGACY_BIN_JSON = "bin_calibration_simple.json"
+
+BUNDLE_MAGIC = "FYPCAL"
+BUNDLE_VERSION = 2
+
+# Data arrays in checksum order. Version 2 added the camera image size the corners were detected in;
+# version 1 bundles still load, with an empty image_size.
+_FIELDS_V1 = ("corner_pixels", "corner_poses", "bin_names", "bin_pixels", "bin_poses")
+_FIELDS = _FIELDS_V1 + ("image_size",)
+
+
+def _checksum(arrays, version=BUNDLE_VERSION):
+    h = hashlib.sha256()
+    h.update(f"{BUNDLE_MAGIC}:{version}".encode())
+    for name in (_FIELDS if version >= 2 else _FIELDS_V1):
+        arr = np.ascontiguousarray(arrays[name])
+        h.update(name.encode())
+        h.update(str(arr.dtype).encode())
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def _typed(corner_pixels, corner_poses, bin_names, bin_pixels, bin_poses, image_size=()):
+    return {
+        "corner_pixels": np.asarray(corner_pixels, dtype=np.float64).reshape(-1, 2),
+        "corner_poses": np.asarray(corner_poses, dtype=np.float64).reshape(-1, 6),
+        "bin_names": np.asarray(list(bin_names), dtype="U32"),
+        "bin_pixels": np.asarray(bin_pixels, dtype=np.float64).reshape(-1, 2),
+        "bin_poses": np.asarray(bin_poses, dtype=np.float64).reshape(-1, 6),
+        "image_size": np.asarray(image_size, dtype=np.int64).reshape(-1),
+    }
+
+
+def save_calibration_bundle(path=CALIBRATION_BUNDLE, corner_pixels=(), corner_poses=(),
+                            bin_names=(), bin_pixels=(), bin_poses=(), image_size=()):
+    """
+    Writes all calibration data to one .npz with a magic string, a format
+    version and a SHA-256 checksum over the typed arrays.
+
+    Args:
+      corner_pixels: (K, 2) checkerboard corner pixels.
+      corner_poses:  (K, 6) gripper poses at those corners.
+      bin_names:     B bin names (e.g. "Green Bin").
+      bin_pixels:    (B, 2) reference pixel for each bin (bin view).
+      bin_poses:     (B, 6) gripper pose for each bin.
+      image_size:    (width, height) of the camera frame the corners were detected in.
+    """
+    arrays = _typed(corner_pixels, corner_poses, bin_names, bin_pixels, bin_poses, image_size)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, magic=np.array(BUNDLE_MAGIC), version=np.array(BUNDLE_VERSION),
+             checksum=np.array(_checksum(arrays)), **arrays)
+    os.replace(tmp_path, path)
+    return arrays
+
+
+def load_calibration_bundle(path=CALIBRATION_BUNDLE):
+    """
+    Loads and validates a bundle written by save_calibration_bundle().
+
+    Returns a dict of the typed arrays (see save_calibration_bundle); raises
+    ValueError on a wrong magic, an unsupported version or a bad checksum.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if str(data["magic"]) != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not a calibration bundle")
+        version = int(data["version"])
+        if version not in (1, BUNDLE_VERSION):
+            raise ValueError(f"{path}: unsupported bundle version {version}")
+        arrays = {name: data[name] for name in (_FIELDS if version >= 2 else _FIELDS_V1)}
+        if str(data["checksum"]) != _checksum(arrays, version):
+            raise ValueError(f"{path}: checksum mismatch, bundle is corrupt")
+    arrays.setdefault("image_size", np.zeros(0, dtype=np.int64))
+    return arrays
+
+
+def update_calibration_bundle(path=CALIBRATION_BUNDLE, **fields):
+    """
+    Replaces some fields of the bundle (e.g. only the bins) and keeps the
+    rest. Creates the bundle if it does not exist yet, in which case the
+    fields not given are stored empty; consumers check has_corners() /
+    has_bins() and fall back to the legacy JSON for an empty field.
+    """
+    current = load_calibration_bundle(path) if os.path.isfile(path) else _typed((), (), (), (), ())
+    current.update(fields)
+    return save_calibration_bundle(path, **current)
+
+
+def has_corners(arrays):
+    return len(arrays["corner_pixels"]) > 0 and len(arrays["corner_pixels"]) == len(arrays["corner_poses"])
+
+
+def calibration_image_size(arrays):
+    """(width, height) recorded with the corners, or None for bundles that predate it."""
+    size = arrays["image_size"]
+    return (int(size[0]), int(size[1])) if len(size) == 2 else None
+
+
+def has_bins(arrays):
+    return len(arrays["bin_names"]) > 0 and len(arrays["bin_names"]) == len(arrays["bin_poses"]) == len(arrays["bin_pixels"])
+
+
+def load_bin_calibration(path=CALIBRATION_BUNDLE, legacy_json=LEGACY_BIN_JSON):
+    """
+    Returns {bin_name: {"pixel": (u, v), "pose6d": (6 floats)}} from the
+    bundle, or from the legacy bin JSON when there is no bundle or it has no
+    bins yet (e.g. only the corners have been calibrated).
+    """
+    if os.path.isfile(path):
+        arrays = load_calibration_bundle(path)
+        if has_bins(arrays):
+            return bin_calibration(arrays)
+        print(f"[Calibration] '{path}' has no bin calibration; using '{legacy_json}'")
+    with open(legacy_json, "r") as f:
+        return json.load(f)
+
+
+def bin_calibration(arrays):
+    """Returns {bin_name: {"pixel": (u, v), "pose6d": (6 floats)}} from a loaded bundle."""
+    return {
+        str(name): {"pixel": tuple(map(float, pixel)), "pose6d": tuple(map(float, pose))}
+        for name, pixel, pose in zip(arrays["bin_names"], arrays["bin_pixels"], arrays["bin_poses"])
+    }
+
+
+def convert_json_to_bundle(point_mapping_json=os.path.join(JSON_DIR, "point_mapping.json"),
+                           bin_json=os.path.join(JSON_DIR, "bin_calibration_simple.json"),
+                           out_path=CALIBRATION_BUNDLE, image_size=()):
+    """
+    Builds a bundle from the legacy point_mapping.json and bin_calibration_simple.json.
+    The JSON files do not record the camera image size; pass it as (width, height) so
+    the pose LUT can be compiled from the bundle.
+    """
+    with open(point_mapping_json, "r") as f:
+        point_mapping = json.load(f)
+    corner_pixels = [tuple(map(float, k.split(','))) for k in point_mapping.keys()]
+    corner_poses = list(point_mapping.values())
+
+    bin_names, bin_pixels, bin_poses = [], [], []
+    if bin_json and os.path.isfile(bin_json):
+        with open(bin_json, "r") as f:
+            bins = json.load(f)
+        for name, data in bins.items():
+            bin_names.append(name)
+            bin_pixels.append(data["pixel"])
+            bin_poses.append(data["pose6d"])
+
+    arrays = save_calibration_bundle(out_path, corner_pixels, corner_poses,
+                                     bin_names, bin_pixels, bin_poses, image_size)
+    print(f"[Calibration] Wrote {len(corner_pixels)} corners and {len(bin_names)} bins to '{out_path}'")
+    return arrays
+
+
+def benchmark_load(point_mapping_json=os.path.join(JSON_DIR, "point_mapping.json"),
+                   bin_json=os.path.join(JSON_DIR, "bin_calibration_simple.json"),
+                   bundle_path=CALIBRATION_BUNDLE, repeats=200):
+    """Times loading the legacy JSON files (with key parsing) against the bundle."""
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        with open(point_mapping_json, "r") as f:
+            data = json.load(f)
+        {tuple(map(float, k.split(','))): v for k, v in data.items()}
+        with open(bin_json, "r") as f:
+            json.load(f)
+    json_ms = (time.perf_counter() - t0) / repeats * 1000
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        load_calibration_bundle(bundle_path)
+    bundle_ms = (time.perf_counter() - t0) / repeats * 1000
+
+    print(f"[Calibration] JSON load:   {json_ms:.3f} ms")
+    print(f"[Calibration] Bundle load: {bundle_ms:.3f} ms (checksum verified)")
+    return json_ms, bundle_ms
+
+
+if __name__ == "__main__":
+    convert_json_to_bundle()
+    benchmark_load()
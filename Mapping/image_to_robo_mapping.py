@@ -1,12 +1,148 @@
+import os
 import json
 import numpy as np
 import scipy.spatial
+from Mapping.pose_lut import PoseLUT, POSE_LUT_PATH, compile_pose_lut, source_checksum
+from Mapping.calibration_store import load_calibration_bundle, has_corners, calibration_image_size, CALIBRATION_BUNDLE
 
 # This script is responsible for the 2d image to 6d robot coord mapping
 
+POINT_MAPPING_JSON = "point_mapping.json"
+
+
+class GripperMapping:
+    """
+    Image-pixel to 6D gripper-pose lookup built once at load time.
+
+    The calibration points are held as a (K, 2) pixel array and a (K, 6)
+    pose array with a KDTree over the pixels, so each lookup is a tree
+    query rather than a rebuild.
+    """
+
+    def __init__(self, image_points, gripper_points):
+        self.image_points = np.asarray(image_points, dtype=np.float32).reshape(-1, 2)
+        self.gripper_points = np.asarray(gripper_points, dtype=np.float32).reshape(-1, 6)
+        self.tree = scipy.spatial.KDTree(self.image_points) if len(self.image_points) else None
+
+    @classmethod
+    def from_dict(cls, point_mapping):
+        """Builds the index from a {(x_img, y_img): [6D pose]} dict."""
+        return cls(list(point_mapping.keys()), list(point_mapping.values()))
+
+    @classmethod
+    def load(cls, path=POINT_MAPPING_JSON):
+        """Loads point_mapping.json ("x,y" string keys) and builds the index."""
+        with open(path, "r") as file:
+            data = json.load(file)
+        image_points = [tuple(map(float, k.split(','))) for k in data.keys()]
+        return cls(image_points, list(data.values()))
+
+    @classmethod
+    def from_bundle(cls, path=CALIBRATION_BUNDLE):
+        """Builds the index from the corner arrays of a binary calibration bundle."""
+        arrays = load_calibration_bundle(path)
+        if not has_corners(arrays):
+            raise ValueError(f"{path} has no corner calibration")
+        return cls(arrays["corner_pixels"], arrays["corner_poses"])
+
+    def query(self, points):
+        """
+        Maps image points to the 6D pose of their nearest calibration point.
+
+        Args:
+          points: (N, 2) array-like of (x, y) pixel coordinates.
+
+        Returns:
+          (N, 6) float32 array of gripper poses.
+
+        Raises:
+          ValueError: the mapping has no calibration points.
+        """
+        if self.tree is None:
+            raise ValueError("GripperMapping has no calibration points to query")
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        _, idx = self.tree.query(points)
+        return self.gripper_points[idx]
+
+    def query_one(self, point):
+        """Maps a single (x, y) pixel to its 6D pose."""
+        return self.query([point])[0]
+
+    def to_dict(self):
+        """Returns the {(x_img, y_img): [6D pose]} dict form."""
+        return {tuple(map(float, p)): list(map(float, g))
+                for p, g in zip(self.image_points, self.gripper_points)}
+
+    def __len__(self):
+        return len(self.image_points)
+
+
+# Index built for each legacy dict passed to find_closest_gripper_point(), keyed by a
+# checksum of the dict's contents so an edited or new dict with the same id() is never
+# served a stale index. Only the most recent few are kept.
+_DICT_INDEX_SIZE = 4
+_dict_index = {}
+
+def load_calibration_mapping():
+    """
+    Returns (GripperMapping, image_size) for the current calibration: the
+    bundle's corners, or point_mapping.json if there is no bundle or it has
+    no corners yet. image_size is (width, height), or None if the source
+    does not record it.
+    """
+    if os.path.isfile(CALIBRATION_BUNDLE):
+        arrays = load_calibration_bundle(CALIBRATION_BUNDLE)
+        if has_corners(arrays):
+            return GripperMapping(arrays["corner_pixels"], arrays["corner_poses"]), calibration_image_size(arrays)
+        print(f"[Mapping] '{CALIBRATION_BUNDLE}' has no corner calibration; using '{POINT_MAPPING_JSON}'")
+    return GripperMapping.load(), None
+
+def load_pose_mapping(prefer_lut=True):
+    """
+    Returns the compiled PoseLUT if one has been built (see Mapping/pose_lut.py)
+    from the current calibration, otherwise the GripperMapping from
+    load_calibration_mapping(). Both offer query(points).
+
+    A LUT compiled from an older calibration is rebuilt when the calibration
+    records the image size, and ignored (with a warning) when it does not.
+    """
+    mapping, image_size = load_calibration_mapping()
+    if not prefer_lut or not os.path.isfile(POSE_LUT_PATH):
+        return mapping
+    try:
+        lut = PoseLUT.load(POSE_LUT_PATH)
+        if lut.is_current(mapping.image_points, mapping.gripper_points):
+            return lut
+        reason = "was compiled from a different calibration"
+    except (OSError, ValueError, KeyError) as e:
+        reason = f"cannot be used ({e})"
+    if image_size is None:
+        print(f"[Mapping] Pose LUT '{POSE_LUT_PATH}' {reason}; using nearest-corner mapping")
+        return mapping
+    print(f"[Mapping] Pose LUT '{POSE_LUT_PATH}' {reason}; rebuilding it")
+    compile_pose_lut(mapping.image_points, mapping.gripper_points, image_size, out_path=POSE_LUT_PATH)
+    return PoseLUT.load(POSE_LUT_PATH)
+
+def as_gripper_mapping(mapping):
+    """
+    Accepts a GripperMapping, a PoseLUT or a legacy point-mapping dict and
+    returns an object with query(points).
+    """
+    if isinstance(mapping, (GripperMapping, PoseLUT)):
+        return mapping
+    key = source_checksum(list(mapping.keys()), list(mapping.values()))
+    index = _dict_index.pop(key, None)
+    if index is None:
+        index = GripperMapping.from_dict(mapping)
+        if len(_dict_index) >= _DICT_INDEX_SIZE:
+            del _dict_index[next(iter(_dict_index))]
+    _dict_index[key] = index
+    return index
+
+
 def load_robot_coord_mapping():
     """Loads the 6D image-to-gripper mapping from JSON and converts keys back to tuples."""
-    with open("point_mapping.json", "r") as file:
+    with open(POINT_MAPPING_JSON, "r") as file:
         data = json.load(file)
     
     # Convert string keys back to tuples for lookup
@@ -15,14 +151,7 @@ def load_robot_coord_mapping():
 
 def find_closest_gripper_point(image_point, point_mapping):
     """Finds the closest mapped gripper coordinate for a new image point."""
-    image_points = np.array(list(point_mapping.keys()), dtype=np.float32)  # 2D image points
-    gripper_points = np.array(list(point_mapping.values()), dtype=np.float32)  # 6D gripper positions
-
-    # Find the closest mapped image point using KDTree
-    tree = scipy.spatial.KDTree(image_points)
-    _, idx = tree.query(image_point)  # Get nearest neighbor
-
-    return gripper_points[idx]  # Return corresponding 6D gripper coordinate
+    return as_gripper_mapping(point_mapping).query_one(image_point)
 
 
 
@@ -0,0 +1,164 @@
+import json
+import os
+import hashlib
+import numpy as np
+from scipy.interpolate import griddata
+
+# Dense pixel -> 6D pose lookup table compiled from the checkerboard calibration
+
+POSE_LUT_PATH = "pose_lut.npy"
+
+# Table layout: x, y, z, then the sine and cosine of roll, pitch and yaw. Angles are
+# interpolated through their sin/cos so poses either side of +/-180 degrees blend correctly.
+LUT_LAYOUT = "xyz+sincos"
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def source_checksum(image_points, gripper_points):
+    """SHA-256 of the calibration points a table was compiled from (as float32, the mapping's dtype)."""
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(image_points, dtype=np.float32).reshape(-1, 2).tobytes())
+    h.update(np.ascontiguousarray(gripper_points, dtype=np.float32).reshape(-1, 6).tobytes())
+    return h.hexdigest()
+
+
+def _encode_angles(poses):
+    """(..., 6) poses in degrees -> (..., 9) xyz, sin(rpy), cos(rpy)."""
+    angles = np.radians(poses[..., 3:6])
+    return np.concatenate([poses[..., :3], np.sin(angles), np.cos(angles)], axis=-1)
+
+
+def _decode_angles(table):
+    """(..., 9) xyz, sin(rpy), cos(rpy) -> (..., 6) poses with angles in (-180, 180]."""
+    angles = np.degrees(np.arctan2(table[..., 3:6], table[..., 6:9]))
+    return np.concatenate([table[..., :3], angles], axis=-1).astype(np.float32)
+
+
+def compile_pose_lut(image_points, gripper_points, image_size, step=4, out_path=POSE_LUT_PATH):
+    """
+    Interpolates the calibration points onto a regular pixel grid and saves
+    it as a (rows, cols, 9) float32 .npy (see LUT_LAYOUT), plus a small .json
+    sidecar with the grid step, image size and a checksum of the calibration
+    points it was built from.
+
+    Poses inside the convex hull of the calibration corners are linearly
+    interpolated (Delaunay triangulation); outside it the nearest corner's
+    pose is used, matching the old nearest-neighbour behaviour.
+
+    Args:
+      image_points:   (K, 2) pixel coordinates of the calibration corners.
+      gripper_points: (K, 6) gripper poses at those corners.
+      image_size:     (width, height) of the camera frame the corners were detected in.
+      step:           grid spacing in pixels (1 = one entry per pixel).
+      out_path:       where to write the .npy table.
+
+    Returns:
+      The compiled table as an in-memory array.
+    """
+    checksum = source_checksum(image_points, gripper_points)
+    image_points = np.asarray(image_points, dtype=np.float64).reshape(-1, 2)
+    gripper_points = _encode_angles(np.asarray(gripper_points, dtype=np.float64).reshape(-1, 6))
+    width, height = image_size
+
+    xs = np.arange(0, width, step, dtype=np.float64)
+    ys = np.arange(0, height, step, dtype=np.float64)
+    gx, gy = np.meshgrid(xs, ys)
+
+    table = griddata(image_points, gripper_points, (gx, gy), method="linear")
+    outside = np.isnan(table[..., 0])
+    if outside.any():
+        table[outside] = griddata(image_points, gripper_points,
+                                  (gx[outside], gy[outside]), method="nearest")
+    table = table.astype(np.float32)
+
+    np.save(out_path, table)
+    with open(_meta_path(out_path), "w") as f:
+        json.dump({"step": step, "width": int(width), "height": int(height),
+                   "layout": LUT_LAYOUT, "source_checksum": checksum}, f, indent=2)
+    print(f"[PoseLUT] Wrote {table.shape} table to '{out_path}'")
+    return table
+
+
+class PoseLUT:
+    """
+    Constant-time pixel -> 6D pose lookup over a compiled table.
+
+    The table is opened with np.load(mmap_mode='r'), so it is paged in on
+    demand and several worker processes share one copy through the OS page
+    cache. query() has the same signature as GripperMapping.query().
+    """
+
+    def __init__(self, table, step, source_checksum=None):
+        self.table = table
+        self.step = step
+        self.source_checksum = source_checksum
+        self.rows, self.cols = table.shape[:2]
+
+    @classmethod
+    def load(cls, path=POSE_LUT_PATH):
+        """
+        Opens a compiled table. Raises ValueError for a table in an older
+        layout (compiled before angles were stored as sin/cos).
+        """
+        with open(_meta_path(path), "r") as f:
+            meta = json.load(f)
+        if meta.get("layout") != LUT_LAYOUT:
+            raise ValueError(f"{path} has an outdated layout; recompile it")
+        return cls(np.load(path, mmap_mode="r"), meta["step"], meta.get("source_checksum"))
+
+    def is_current(self, image_points, gripper_points):
+        """True if the table was compiled from exactly these calibration points."""
+        return self.source_checksum == source_checksum(image_points, gripper_points)
+
+    def query(self, points, interpolate=True):
+        """
+        Args:
+          points:      (N, 2) array-like of (x, y) pixel coordinates.
+          interpolate: bilinear interpolation between grid cells if True,
+                       otherwise the nearest grid cell.
+
+        Returns:
+          (N, 6) float32 array of gripper poses.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        u = np.clip(points[:, 0] / self.step, 0, self.cols - 1)
+        v = np.clip(points[:, 1] / self.step, 0, self.rows - 1)
+
+        if not interpolate:
+            return _decode_angles(np.asarray(self.table[np.rint(v).astype(int), np.rint(u).astype(int)]))
+
+        u0 = np.floor(u).astype(int)
+        v0 = np.floor(v).astype(int)
+        u1 = np.minimum(u0 + 1, self.cols - 1)
+        v1 = np.minimum(v0 + 1, self.rows - 1)
+        fu = (u - u0)[:, None]
+        fv = (v - v0)[:, None]
+
+        top = self.table[v0, u0] * (1 - fu) + self.table[v0, u1] * fu
+        bottom = self.table[v1, u0] * (1 - fu) + self.table[v1, u1] * fu
+        return _decode_angles(top * (1 - fv) + bottom * fv)
+
+    def query_one(self, point, interpolate=True):
+        return self.query([point], interpolate)[0]
+
+    def __len__(self):
+        return self.rows * self.cols
+
+
+if __name__ == "__main__":
+    # Compile the table from the current calibration (bundle, or point_mapping.json)
+    from Mapping.image_to_robo_mapping import load_calibration_mapping
+
+    mapping, image_size = load_calibration_mapping()
+    if image_size is None:
+        raise SystemExit("The calibration does not record the camera image size; "
+                         "re-run Mapping/Calibration/image_to_gripper_callibration.py first.")
+    compile_pose_lut(mapping.image_points, mapping.gripper_points, image_size)
+
+    lut = PoseLUT.load()
+    test_points = np.array([[16, 240], [300, 200], [470.6, 373.4]])
+    print(f"Nearest-corner: {mapping.query(test_points)}")
+    print(f"Pose LUT:       {lut.query(test_points)}")
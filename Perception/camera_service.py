@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Background frame grabber: keeps the camera open and always holds the latest frames
+
+CAMERA_INDEX = 1
+
+
+class ImageFileSource:
+    """
+    Frame source backed by still images on disk. Implements the same
+    read()/release()/isOpened() interface as cv2.VideoCapture, so it can be
+    handed to CameraService in place of a real camera. The images are
+    replayed in order and looped; `fps` throttles the replay rate.
+    """
+
+    def __init__(self, paths, fps=30.0, loop=True):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.frames = []
+        for path in paths:
+            frame = cv2.imread(path)
+            if frame is None:
+                raise RuntimeError(f"Could not read image {path}")
+            self.frames.append(frame)
+        self.period = 1.0 / fps if fps else 0.0
+        self.loop = loop
+        self._index = 0
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def read(self):
+        if not self._open or (self._index >= len(self.frames) and not self.loop):
+            return False, None
+        if self.period:
+            time.sleep(self.period)
+        frame = self.frames[self._index % len(self.frames)]
+        self._index += 1
+        return True, frame.copy()
+
+    def release(self):
+        self._open = False
+
+
+def open_source(source=CAMERA_INDEX):
+    """
+    Opens a frame source. An int is treated as a camera index, a path to a
+    video file opens the video with OpenCV and a path to an image (or a list
+    of image paths) uses ImageFileSource.
+    """
+    if isinstance(source, int):
+        return cv2.VideoCapture(source)
+    if isinstance(source, (list, tuple)):
+        return ImageFileSource(source)
+    ext = os.path.splitext(source)[1].lower()
+    if ext in (".png", ".jpg", ".jpeg", ".bmp"):
+        return ImageFileSource(source)
+    return cv2.VideoCapture(source)
+
+
+class CameraService:
+    """
+    Keeps a frame source open and grabs frames continuously in a background
+    thread into a small ring buffer of (timestamp, BGR frame) pairs.
+
+    - latest() returns the newest frame without touching the device.
+    - wait_for_fresh(after=t) blocks until a frame captured after time t
+      arrives, e.g. once the camera robot has finished moving.
+
+    The first `warmup_frames` frames after opening are discarded because
+    they are often under-exposed.
+    """
+
+    def __init__(self, source=CAMERA_INDEX, buffer_size=4, warmup_frames=5):
+        self.source = source
+        self.buffer_size = buffer_size
+        self.warmup_frames = warmup_frames
+        self.frames_grabbed = 0
+        self.read_failures = 0
+        self._cap = None
+        self._buffer = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Opens the source and starts the grabber thread (no-op if running)."""
+        if self._running:
+            return self
+        if isinstance(self.source, (int, str, list, tuple)):
+            self._cap = open_source(self.source)
+        else:
+            self._cap = self.source  # an already-opened source object
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Could not open camera source {self.source}")
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name="CameraService", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the grabber thread and releases the device."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        with self._cond:
+            self._cond.notify_all()
+
+    def _grab_loop(self):
+        skipped = 0
+        while self._running:
+            ret, frame = self._cap.read()
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+            if skipped < self.warmup_frames:
+                skipped += 1
+                continue
+            with self._cond:
+                self._buffer.append((time.time(), frame))
+                self.frames_grabbed += 1
+                self._cond.notify_all()
+
+    def latest(self):
+        """Returns (timestamp, frame) of the newest frame, or (None, None) if none yet."""
+        with self._cond:
+            if not self._buffer:
+                return None, None
+            return self._buffer[-1]
+
+    def wait_for_fresh(self, after=None, timeout=5.0):
+        """
+        Blocks until a frame newer than `after` (a time.time() timestamp,
+        default: now) is available and returns (timestamp, frame).
+        Raises TimeoutError if none arrives within `timeout` seconds.
+        """
+        if after is None:
+            after = time.time()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not (self._buffer and self._buffer[-1][0] > after):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    raise TimeoutError(f"No fresh frame after {after:.3f} within {timeout}s")
+                self._cond.wait(remaining)
+            return self._buffer[-1]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+_services = {}
+
+def get_camera_service(source=CAMERA_INDEX):
+    """
+    Returns the running CameraService for `source` (camera index, file
+    path or list of image paths), starting it on first use. All callers
+    share the same device.
+    """
+    key = tuple(source) if isinstance(source, list) else source
+    service = _services.get(key)
+    if service is None:
+        service = _services[key] = CameraService(source)
+    return service.start()
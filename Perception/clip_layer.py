@@ -2,10 +2,151 @@ import torch
 import clip
 import numpy as np
 from PIL import Image
-from scipy.optimize import linear_sum_assignment
+from Perception.text_embedding_cache import TextEmbeddingCache, DEFAULT_CACHE_PATH
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
 
 # The script is responsible for the clip model and matching functions
 
+CLIP_MODEL_NAME = "ViT-B/32"
+
+# Shared across engines and persisted between runs; set path=None to keep it in memory
+text_cache = TextEmbeddingCache(path=DEFAULT_CACHE_PATH)
+
+
+class ClipEngine:
+    """
+    Holds one loaded CLIP model and encodes text and image batches with it.
+
+    The model is loaded once per (model name, device). All crops are
+    preprocessed into a single [M, 3, H, W] tensor and encoded in one
+    forward pass; all prompts are tokenized and encoded in one pass.
+    """
+
+    def __init__(self, device, model_name=CLIP_MODEL_NAME, cache=None):
+        self.device = device
+        self.model_name = model_name
+        self.cache = cache if cache is not None else text_cache
+        self.model, self.preprocess = clip.load(model_name, device=device)
+        self.model.eval()
+
+    def encode_texts(self, prompts):
+        """
+        Returns an [N, D] tensor of L2-normalised text embeddings. Prompts
+        already in the text cache are not re-encoded; the rest are encoded
+        together in one batch and added to the cache.
+        """
+        prompts = list(prompts)
+        embeddings = [self.cache.get(self.model_name, p) for p in prompts]
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+
+        if missing:
+            tokens = clip.tokenize([prompts[i] for i in missing]).to(self.device)
+            with torch.no_grad():
+                feats = self.model.encode_text(tokens).float()
+            feats = (feats / feats.norm(dim=-1, keepdim=True)).cpu().numpy()
+            for i, emb in zip(missing, feats):
+                embeddings[i] = emb
+                self.cache.put(self.model_name, prompts[i], emb)
+            self.cache.save()
+
+        return torch.from_numpy(np.stack(embeddings)).to(self.device)
+
+    def encode_images(self, cropped_images):
+        """Returns an [M, D] tensor of L2-normalised image embeddings."""
+        batch = torch.stack(
+            [self.preprocess(Image.fromarray(img)) for img in cropped_images]
+        ).to(self.device)
+        with torch.no_grad():
+            feats = self.model.encode_image(batch).float()
+        return feats / feats.norm(dim=-1, keepdim=True)
+
+    def similarity(self, cropped_images, task_objects):
+        """
+        Builds the N×M cosine similarity matrix (objects × crops) with a
+        single matmul and one transfer back to the host.
+        """
+        N = len(task_objects)
+        M = len(cropped_images)
+        if N == 0 or M == 0:
+            return np.zeros((N, M), dtype=np.float32)
+
+        prompts = [f"Pick up the {obj.strip()}" for obj in task_objects]
+        text_feats = self.encode_texts(prompts)        # [N, D]
+        image_feats = self.encode_images(cropped_images)  # [M, D]
+
+        S = (text_feats @ image_feats.T).cpu().numpy().astype(np.float32)
+        # clamp -inf/NaN to 0.0
+        S[~np.isfinite(S)] = 0.0
+        return S
+
+
+_engines = {}
+
+def get_clip_engine(device, model_name=CLIP_MODEL_NAME):
+    """Returns the cached ClipEngine for (model_name, device), loading it on first use."""
+    key = (model_name, str(device))
+    if key not in _engines:
+        _engines[key] = ClipEngine(device, model_name)
+    return _engines[key]
+
+
+def match_similarity(S):
+    """
+    One-to-one matching of objects (rows) to crops (columns) that maximises
+    total similarity. Uses the Hungarian algorithm when SciPy is available,
+    otherwise a global greedy assignment.
+
+    Returns (best_match_indices, confidences), one entry per row.
+    """
+    N, M = S.shape
+    best_match_indices = [None] * N
+    confidences = [0.0] * N
+
+    if M == 0:
+        # No masks: leave all matches as None and confidences as 0.0
+        return best_match_indices, confidences
+
+    # a) If Hungarian is available, run it to maximize total similarity
+    if linear_sum_assignment is not None:
+        cost = -S.copy()
+        row_ind, col_ind = linear_sum_assignment(cost)
+        for i, j in zip(row_ind, col_ind):
+            sim = S[i, j]
+            if sim > 0.0:
+                best_match_indices[i] = int(j)
+                confidences[i] = float(sim)
+            else:
+                best_match_indices[i] = None
+                confidences[i] = 0.0
+    else:
+        # b) Fallback: global greedy sort of all (i, j, S[i,j])
+        triples = []
+        for i in range(N):
+            for j in range(M):
+                triples.append((i, j, S[i, j]))
+        triples.sort(key=lambda x: x[2], reverse=True)  # sort by sim desc
+
+        used_obj = set()
+        used_mask = set()
+        for i, j, sim in triples:
+            if i in used_obj or j in used_mask:
+                continue
+            if sim <= 0.0:
+                break
+            best_match_indices[i] = j
+            confidences[i] = float(sim)
+            used_obj.add(i)
+            used_mask.add(j)
+            if len(used_obj) == N:
+                break
+
+    return best_match_indices, confidences
+
+
 def encode_and_match(cropped_images, task_objects, device, return_scores=False):
     """
     For each object in task_objects, compute cosine similarity against each cropped image,
@@ -23,90 +164,13 @@ def encode_and_match(cropped_images, task_objects, device, return_scores=False):
       - If return_scores=True: (best_indices, confidences), where confidences are
         the maximum cosine similarities in [0, 1].
     """
-    clip_model, preprocess = clip.load("ViT-B/32", device=device)
+    engine = get_clip_engine(device)
 
-    N = len(task_objects)
-    M = len(cropped_images)
+    # 1) Build similarity matrix S (N x M) in one batched pass
+    S = engine.similarity(cropped_images, task_objects)
 
-    # 1) Encode and normalize all text features
-    text_feats = []
-    for obj in task_objects:
-        prompt = f"Pick up the {obj.strip()}"
-        text_tokens = clip.tokenize([prompt]).to(device)
-        with torch.no_grad():
-            txt_emb = clip_model.encode_text(text_tokens)  # [1, D]
-        txt_emb = txt_emb / txt_emb.norm(dim=-1, keepdim=True)
-        text_feats.append(txt_emb)
-
-    # 2) Encode and normalize all image features
-    image_feats = []
-    for img in cropped_images:
-        pil_image = Image.fromarray(img)
-        inp = preprocess(pil_image).unsqueeze(0).to(device)  # [1, 3, H, W]
-        with torch.no_grad():
-            img_emb = clip_model.encode_image(inp)  # [1, D]
-        img_emb = img_emb / img_emb.norm(dim=-1, keepdim=True)
-        image_feats.append(img_emb)
-
-    # 3) Build similarity matrix S (N x M)
-    S = np.zeros((N, M), dtype=np.float32)
-    for i, txt_emb in enumerate(text_feats):
-        if M == 0:
-            S[i, :] = 0.0
-            continue
-
-        sims = []
-        for img_emb in image_feats:
-            sim = (txt_emb @ img_emb.T).detach().squeeze().cpu().item()
-            sims.append(sim)
-        sims = np.array(sims, dtype=np.float32)
-
-        # clamp -inf/NaN to 0.0
-        sims[np.isneginf(sims)] = 0.0
-        sims[np.isnan(sims)] = 0.0
-
-        S[i, :] = sims
-
-    best_match_indices = [None] * N
-    confidences = [0.0] * N
-
-    if M == 0:
-        # No masks: leave all matches as None and confidences as 0.0
-        pass
-    else:
-        # 4a) If Hungarian is available, run it to maximize total similarity
-        if linear_sum_assignment is not None:
-            cost = -S.copy()
-            row_ind, col_ind = linear_sum_assignment(cost)
-            for i, j in zip(row_ind, col_ind):
-                sim = S[i, j]
-                if sim > 0.0:
-                    best_match_indices[i] = int(j)
-                    confidences[i] = float(sim)
-                else:
-                    best_match_indices[i] = None
-                    confidences[i] = 0.0
-        else:
-            # 4b) Fallback: global greedy sort of all (i, j, S[i,j])
-            triples = []
-            for i in range(N):
-                for j in range(M):
-                    triples.append((i, j, S[i, j]))
-            triples.sort(key=lambda x: x[2], reverse=True)  # sort by sim desc
-
-            used_obj = set()
-            used_mask = set()
-            for i, j, sim in triples:
-                if i in used_obj or j in used_mask:
-                    continue
-                if sim <= 0.0:
-                    break
-                best_match_indices[i] = j
-                confidences[i] = float(sim)
-                used_obj.add(i)
-                used_mask.add(j)
-                if len(used_obj) == N:
-                    break
+    # 2) One-to-one assignment
+    best_match_indices, confidences = match_similarity(S)
 
     if return_scores:
         return best_match_indices, confidences
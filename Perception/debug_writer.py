@@ -0,0 +1,151 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Headless mode and background writer for perception debug images
+
+# Set FYP_HEADLESS=1 to never open a window; debug images are written to disk instead
+HEADLESS = os.environ.get("FYP_HEADLESS", "0") == "1"
+DEBUG_DIR = os.environ.get("FYP_DEBUG_DIR", "debug_artifacts")
+
+
+def set_headless(enabled=True):
+    global HEADLESS
+    HEADLESS = enabled
+
+
+def render_anns(image_np, anns, borders=True, alpha=0.5):
+    """
+    Returns image_np (RGB uint8) with the SAM2 masks blended on top, largest
+    first, in random colours. Same output as show_anns() but rendered with
+    NumPy/OpenCV so it can run on the writer thread instead of Matplotlib.
+    """
+    out = image_np.astype(np.float32)
+    for ann in sorted(anns, key=lambda x: x['area'], reverse=True):
+        m = ann['segmentation']
+        color = np.random.random(3) * 255
+        out[m] = (1 - alpha) * out[m] + alpha * color
+        if borders:
+            contours, _ = cv2.findContours(m.astype(np.uint8),
+                                           cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+            contours = [cv2.approxPolyDP(contour, epsilon=0.01, closed=True)
+                        for contour in contours]
+            cv2.drawContours(out, contours, -1, (0, 0, 255), thickness=1)
+    return out.clip(0, 255).astype(np.uint8)
+
+
+def render_centers(image_np, centers):
+    """Returns a copy of image_np with a yellow dot at each (cx, cy) centre."""
+    out = image_np.copy()
+    for cx, cy in centers:
+        cv2.circle(out, (int(cx), int(cy)), 6, (255, 255, 0), -1)
+    return out
+
+
+class DebugArtifactWriter:
+    """
+    Writes debug images on a background thread so the pipeline never waits
+    on disk I/O or rendering.
+
+    Artifacts go into a bounded queue. When the queue is full the new
+    artifact is dropped (and counted) rather than blocking the caller.
+    Each task gets its own directory under `out_dir`; with archive=True the
+    images of a task are stored together in one compressed .npz instead of
+    individual PNGs.
+    """
+
+    def __init__(self, out_dir=DEBUG_DIR, max_queue=16, archive=False):
+        self.out_dir = out_dir
+        self.archive = archive
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._task_dir = None
+        self._seq = 0
+        self._pending = {}
+        self._thread = threading.Thread(target=self._run, name="DebugArtifactWriter", daemon=True)
+        self._thread.start()
+        self.start_task()
+
+    def start_task(self, name="task"):
+        """Starts a new artifact directory (and archive) for the next task."""
+        task_dir = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d_%H%M%S')}_{name}")
+        self._put(("task", task_dir, None, ()), block=True)
+        self._seq = 0
+
+    def submit(self, name, image):
+        """Queues an RGB image for writing. Returns False if it was dropped."""
+        return self.submit_render(name, None, image)
+
+    def submit_render(self, name, render, *args):
+        """
+        Queues render(*args) to be run on the writer thread and its RGB
+        result written as `name`. With render=None, args[0] is the image.
+        Returns False if the queue was full and the artifact was dropped.
+        """
+        self._seq += 1
+        return self._put(("image", f"{self._seq:03d}_{name}", render, args))
+
+    def _put(self, item, block=False):
+        try:
+            self._queue.put(item, block=block)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            kind, name, render, args = self._queue.get()
+            try:
+                if kind == "task":
+                    self._flush_archive()
+                    self._task_dir = name
+                elif kind == "image":
+                    image = render(*args) if render is not None else args[0]
+                    self._write(name, image)
+                elif kind == "flush":
+                    self._flush_archive()
+            except Exception as e:
+                print(f"[DebugWriter] Failed to write {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name, image):
+        if self.archive:
+            self._pending[name] = image
+            return
+        os.makedirs(self._task_dir, exist_ok=True)
+        cv2.imwrite(os.path.join(self._task_dir, f"{name}.png"),
+                    cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        self.written += 1
+
+    def _flush_archive(self):
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self._task_dir) or ".", exist_ok=True)
+        np.savez_compressed(f"{self._task_dir}.npz", **self._pending)
+        self.written += len(self._pending)
+        self._pending = {}
+
+    def flush(self):
+        """Blocks until everything queued so far has been written."""
+        self._queue.put(("flush", None, None, ()))
+        self._queue.join()
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+
+_writer = None
+
+def get_debug_writer():
+    """Returns the process-wide DebugArtifactWriter, starting it on first use."""
+    global _writer
+    if _writer is None:
+        _writer = DebugArtifactWriter()
+    return _writer
@@ -0,0 +1,92 @@
+import cv2
+import numpy as np
+
+# Frame fingerprinting so an unchanged scene is not segmented twice
+
+
+def dhash(gray, hash_size=8):
+    """64-bit difference hash of a grayscale image (as a Python int)."""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class SceneCache:
+    """
+    Remembers the segmentation results of the last few scenes seen from each
+    camera view (e.g. "table" and "bins") and hands them back when a new
+    frame from that view shows the same scene. Each view keeps its own
+    `capacity` entries, so alternating between views never evicts the other
+    view's scenes.
+
+    Two frames count as the same scene when their perceptual hashes differ
+    by at most `max_hamming` bits AND at most `max_changed_frac` of the cells
+    of a downsampled grayscale thumbnail changed by more than `pixel_thresh`
+    grey levels. The second test catches small objects being added or
+    removed, which barely move a global hash.
+    """
+
+    def __init__(self, capacity=4, max_hamming=6, pixel_thresh=25,
+                 max_changed_frac=0.001, thumb_size=(64, 48)):
+        self.capacity = capacity
+        self.max_hamming = max_hamming
+        self.pixel_thresh = pixel_thresh
+        self.max_changed_frac = max_changed_frac
+        self.thumb_size = thumb_size
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+        self._entries = {}  # view -> [(hash, thumbnail, result, cost_seconds)], most recent first
+        self._last_fp = {}  # view -> fingerprint computed by the last lookup()
+
+    def fingerprint(self, frame):
+        """Returns (dhash, thumbnail) for an RGB or BGR frame."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+        return dhash(gray), thumb
+
+    def _same_scene(self, fp_a, fp_b):
+        hash_a, thumb_a = fp_a
+        hash_b, thumb_b = fp_b
+        if bin(hash_a ^ hash_b).count("1") > self.max_hamming:
+            return False
+        changed = np.count_nonzero(np.abs(thumb_a - thumb_b) > self.pixel_thresh)
+        return changed <= self.max_changed_frac * thumb_a.size
+
+    def lookup(self, frame, view="table"):
+        """
+        Returns the cached result for a scene from `view` matching `frame`, or
+        None. The fingerprint is kept so store() for the same view does not
+        recompute it.
+        """
+        self._last_fp[view] = fp = self.fingerprint(frame)
+        entries = self._entries.setdefault(view, [])
+        for i, (h, thumb, result, cost) in enumerate(entries):
+            if self._same_scene(fp, (h, thumb)):
+                self.hits += 1
+                self.time_saved += cost
+                # Most recently used scene goes to the front
+                entries.insert(0, entries.pop(i))
+                return result
+        self.misses += 1
+        return None
+
+    def store(self, frame, result, cost_seconds, view="table"):
+        """Caches `result` for the scene in `frame` seen from `view`; cost is the time a hit saves."""
+        fp = self._last_fp.pop(view, None) or self.fingerprint(frame)
+        entries = self._entries.setdefault(view, [])
+        entries.insert(0, (fp[0], fp[1], result, cost_seconds))
+        del entries[self.capacity:]
+
+    def clear(self):
+        self._entries = {}
+        self._last_fp = {}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "time_saved": self.time_saved,
+        }
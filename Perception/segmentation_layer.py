@@ -1,4 +1,5 @@
 import os
+import time
 import numpy as np
 import torch
 import matplotlib.pyplot as plt
@@ -6,7 +7,11 @@ from PIL import Image
 from sam2.build_sam import build_sam2
 from sam2.automatic_mask_generator import SAM2AutomaticMaskGenerator
 import cv2
-from clip_layer import encode_and_match
+from Perception.clip_layer import encode_and_match
+from Perception.camera_service import get_camera_service
+from Perception import debug_writer
+from Perception.debug_writer import get_debug_writer
+from Perception.scene_cache import SceneCache
 from Mapping.image_to_robo_mapping import load_robot_coord_mapping, find_closest_gripper_point  # Import functions
 
 # The file is uses the SAM2 model to segment images.
@@ -43,64 +48,200 @@ def show_anns(anns, borders=True):
             cv2.drawContours(img, contours, -1, (0, 0, 1, 0.4), thickness=1) 
     ax.imshow(img)
 
-def perform_segmentation():
+# SAM2 model files (relative to the project root, where SAM2 is cloned)
+SAM2_CHECKPOINT = "checkpoints/sam2.1_hiera_large.pt"
+SAM2_MODEL_CFG = "configs/sam2.1/sam2.1_hiera_l.yaml"
+
+
+class SegmentationSession:
+    """
+    Long-lived SAM2 session. The model and mask generator are built once
+    (on the first call to load() or segment()) and kept warm in memory, so
+    repeated segmentations only pay for inference.
+
+    Latency is recorded per call: the first segment() after loading is the
+    "cold" call, every later one is "warm".
+    """
+
+    def __init__(self, model_cfg=SAM2_MODEL_CFG, checkpoint=SAM2_CHECKPOINT, device=device):
+        self.model_cfg = model_cfg
+        self.checkpoint = checkpoint
+        self.device = device
+        self.mask_generator = None
+        self.load_time = None
+        self.cold_latency = None
+        self.warm_latencies = []
+
+    def load(self):
+        """Builds SAM2 and the mask generator if they are not loaded yet."""
+        if self.mask_generator is not None:
+            return self.mask_generator
+
+        print("Building SAM model...")
+        t0 = time.perf_counter()
+        sam2 = build_sam2(self.model_cfg, self.checkpoint, device=self.device, apply_postprocessing=False)
+
+        print("Initializing mask generator...")
+        self.mask_generator = SAM2AutomaticMaskGenerator(sam2)
+        self.load_time = time.perf_counter() - t0
+        print(f"SAM model loaded in {self.load_time:.2f} s")
+        return self.mask_generator
+
+    def segment(self, frame):
+        """
+        Runs SAM2 on an RGB frame and returns the raw list of mask dicts.
+
+        Args:
+          frame: H×W×3 uint8 NumPy array in RGB order.
+
+        Returns:
+          List of SAM2 annotation dicts ('segmentation', 'bbox', 'area', ...).
+        """
+        mask_generator = self.load()
+
+        t0 = time.perf_counter()
+        masks = mask_generator.generate(frame)
+        elapsed = time.perf_counter() - t0
+
+        if self.cold_latency is None:
+            self.cold_latency = elapsed
+            print(f"Segmentation (cold): {elapsed:.3f} s")
+        else:
+            self.warm_latencies.append(elapsed)
+            print(f"Segmentation (warm): {elapsed:.3f} s")
+        return masks
+
+    def stats(self):
+        """Returns load time, cold latency and warm latency summary in seconds."""
+        warm = self.warm_latencies
+        return {
+            "load_time": self.load_time,
+            "cold_latency": self.cold_latency,
+            "warm_calls": len(warm),
+            "warm_mean": sum(warm) / len(warm) if warm else None,
+            "warm_min": min(warm) if warm else None,
+        }
+
+
+_session = None
+
+def get_segmentation_session():
+    """Returns the process-wide SegmentationSession, creating it on first use."""
+    global _session
+    if _session is None:
+        _session = SegmentationSession()
+    return _session
+
+# Reuses masks and crops when the camera sees an unchanged scene
+scene_cache = SceneCache()
+
+def extract_crops(image_np, masks, max_area_frac=0.8):
+    """
+    Turns SAM2 annotations into background-whitened crops and their centres.
+
+    Uses the 'bbox' (XYWH, inclusive max corner) and 'area' that SAM2 already
+    returns, so empty and oversize masks are rejected before any pixels are
+    touched and each kept mask is only read inside its bounding box.
+
+    Returns:
+      - cropped_images_with_centers: list of (crop, (cx, cy)), crops are
+        H×W×3 uint8 RGB arrays ready for ClipEngine.encode_images().
+      - stats: dict with mask counts and the extraction time in seconds.
+    """
+    t0 = time.perf_counter()
+    H, W = image_np.shape[:2]
+    max_box = max_area_frac * H * W
+
+    cropped_images_with_centers = []
+    filtered = 0
+    for mask in masks:
+        if mask['area'] == 0:
+            filtered += 1
+            continue
+        bx, by, bw, bh = mask['bbox']
+        x0, y0 = int(bx), int(by)
+        w, h = int(round(bw)) + 1, int(round(bh)) + 1
+        # skip overly large masks
+        if w * h > max_box:
+            filtered += 1
+            continue
+        # crop and zero out background within the box only
+        seg = mask['segmentation'][y0:y0+h, x0:x0+w].astype(bool, copy=False)
+        crop = np.where(seg[..., None], image_np[y0:y0+h, x0:x0+w], np.uint8(255))
+        cx, cy = x0 + w // 2, y0 + h // 2
+        cropped_images_with_centers.append((crop, (cx, cy)))
+
+    stats = {
+        "masks": len(masks),
+        "kept": len(cropped_images_with_centers),
+        "filtered": filtered,
+        "seconds": time.perf_counter() - t0,
+    }
+    return cropped_images_with_centers, stats
+
+def capture_frame():
+    """
+    Returns the first BGR frame captured after this call, so it reflects the
+    current robot pose, or None if the camera fails.
+    """
     print("Capturing image from camera...")
-    cap = cv2.VideoCapture(1)
-    ret, frame = cap.read()
-    cap.release()
+    try:
+        # The camera stays open in the background
+        _, frame = get_camera_service().wait_for_fresh()
+    except (RuntimeError, TimeoutError) as e:
+        print(f"Failed to capture image: {e}")
+        return None
+    return frame
+
 
-    if not ret:
-        print("Failed to capture image")
-        return None, []
+def perform_segmentation(use_cache=True, frame=None, view="table"):
+    # A frame captured earlier (e.g. before the camera robot moved on) can be passed in;
+    # `view` ("table" or "bins") keeps each camera view's cached scenes apart
+    if frame is None:
+        frame = capture_frame()
+        if frame is None:
+            return None, []
 
     # convert to RGB
     image_np = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     image = Image.fromarray(image_np)
-    H, W = image_np.shape[:2]
-
-    plt.figure(figsize=(20, 20))
-    plt.imshow(image)
-    plt.axis('off')
-    plt.show()
 
-    print("Building SAM model...")
-    sam2_checkpoint = "checkpoints/sam2.1_hiera_large.pt"
-    model_cfg = "configs/sam2.1/sam2.1_hiera_l.yaml"
-    sam2 = build_sam2(model_cfg, sam2_checkpoint, device=device, apply_postprocessing=False)
+    if use_cache:
+        cached = scene_cache.lookup(image_np, view)
+        if cached is not None:
+            print(f"Scene unchanged, reusing cached segmentation ({scene_cache.stats()})")
+            return image, cached
 
-    print("Initializing mask generator...")
-    mask_generator = SAM2AutomaticMaskGenerator(sam2)
+    if debug_writer.HEADLESS:
+        get_debug_writer().submit("frame", image_np)
+    else:
+        plt.figure(figsize=(20, 20))
+        plt.imshow(image)
+        plt.axis('off')
+        plt.show()
 
+    t_start = time.perf_counter()
     print("Generating masks...")
-    masks = mask_generator.generate(image_np)
+    masks = get_segmentation_session().segment(image_np)
     print(f"Number of masks generated: {len(masks)}")
     if masks:
         print(f"Keys in first mask: {masks[0].keys()}")
 
-    plt.figure(figsize=(20, 20))
-    plt.imshow(image)
-    show_anns(masks)
-    plt.axis('off')
-    plt.show()
+    if debug_writer.HEADLESS:
+        # Mask overlay is rendered on the writer thread, off the hot path
+        get_debug_writer().submit_render("masks", debug_writer.render_anns, image_np, masks)
+    else:
+        plt.figure(figsize=(20, 20))
+        plt.imshow(image)
+        show_anns(masks)
+        plt.axis('off')
+        plt.show()
 
     # --- Filter, crop and zero-background ---
-    cropped_images_with_centers = []
-    for mask in masks:
-        seg = mask['segmentation'].astype(bool)
-        ys, xs = np.where(seg)
-        if len(xs) == 0:
-            continue
-        x0, x1 = xs.min(), xs.max()
-        y0, y1 = ys.min(), ys.max()
-        w, h = x1 - x0 + 1, y1 - y0 + 1
-        # skip overly large masks
-        if w * h > 0.8 * H * W:
-            continue
-        # crop and zero out background
-        crop = image_np[y0:y0+h, x0:x0+w].copy()
-        crop[~seg[y0:y0+h, x0:x0+w]] = 255
-        cx, cy = x0 + w // 2, y0 + h // 2
-        cropped_images_with_centers.append((crop, (cx, cy)))
+    cropped_images_with_centers, crop_stats = extract_crops(image_np, masks)
+    print(f"Crop extraction: {crop_stats}")
+    if use_cache:
+        scene_cache.store(image_np, cropped_images_with_centers, time.perf_counter() - t_start, view)
 
     # If no valid masks after filtering, return empty list instead of raising
     if not cropped_images_with_centers:
@@ -108,14 +249,18 @@ def perform_segmentation():
         return image, []
 
     # optional: show bounding boxes on original
-    plt.figure(figsize=(20, 20))
-    plt.imshow(image)
-    ax = plt.gca()
-    for crop, (cx, cy) in cropped_images_with_centers:
-        # draw small circle at center
-        ax.plot(cx, cy, 'yo', markersize=10)
-    plt.axis('off')
-    plt.show()
+    if debug_writer.HEADLESS:
+        centers = [center for _, center in cropped_images_with_centers]
+        get_debug_writer().submit_render("centers", debug_writer.render_centers, image_np, centers)
+    else:
+        plt.figure(figsize=(20, 20))
+        plt.imshow(image)
+        ax = plt.gca()
+        for crop, (cx, cy) in cropped_images_with_centers:
+            # draw small circle at center
+            ax.plot(cx, cy, 'yo', markersize=10)
+        plt.axis('off')
+        plt.show()
 
     return image, cropped_images_with_centers
 
@@ -0,0 +1,94 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# LRU cache for CLIP text embeddings, keyed by (model name, prompt string)
+
+DEFAULT_CACHE_PATH = "text_embedding_cache.pkl"
+
+
+class TextEmbeddingCache:
+    """
+    Least-recently-used cache of text embeddings.
+
+    Entries are stored as float32 NumPy vectors on the host so they can be
+    pickled and reused on any device. If `path` is given, the cache is
+    loaded from it on construction and written back by save(), so it
+    survives restarts.
+    """
+
+    def __init__(self, max_entries=1024, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path and os.path.isfile(path):
+            self.load(path)
+
+    def get(self, model_name, prompt):
+        """Returns the cached embedding or None, updating hit/miss counters."""
+        key = (model_name, prompt)
+        with self._lock:
+            emb = self._entries.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return emb
+
+    def put(self, model_name, prompt, embedding):
+        """Stores one embedding, evicting the least recently used entry if full."""
+        key = (model_name, prompt)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def load(self, path):
+        """Loads entries from a pickle written by save(). Bad files are ignored."""
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"[TextCache] Could not load {path}: {e}")
+            return
+        with self._lock:
+            for key, emb in data.items():
+                self._entries[key] = emb
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self, path=None):
+        """Writes the cache to disk atomically (temp file + rename)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            data = dict(self._entries)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
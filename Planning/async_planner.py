@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+
+from Planning import gpt_functions
+from Planning.gpt_functions import (
+    task_features_messages,
+    task_objects_messages,
+    instructions_messages,
+    plan_lines,
+)
+from Planning.llm_cache import request_key
+
+# Asynchronous GPT client: concurrent fan-out, in-flight deduplication and per-call timeouts
+
+DEFAULT_TIMEOUT = 30.0
+
+
+class AsyncPlanningClient:
+    """
+    Sends chat completions through the active gpt_functions backend.
+
+    Identical requests (same model, messages and parameters) that are in
+    flight at the same time share one network call. Every call has its own
+    timeout; a caller timing out does not cancel the shared request for the
+    other callers. Replies go through the same disk cache as gpt_functions
+    unless use_cache=False; as in chat_completion(), a reply the `parse`
+    callable rejects is not cached.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, use_cache=True):
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self.requests_sent = 0
+        self.requests_deduplicated = 0
+        self._inflight = {}
+
+    async def _create(self, key, model, messages, params, parse):
+        # The SQLite cache blocks, so its calls run in a worker thread rather than on the event loop
+        cache = gpt_functions.llm_cache if self.use_cache else None
+        if cache is not None:
+            content = await asyncio.to_thread(cache.get, key)
+            if content is not None:
+                return parse(content) if parse is not None else content
+        self.requests_sent += 1
+        content = await gpt_functions.get_backend().acomplete(model, messages, **params)
+        result = parse(content) if parse is not None else content
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, model, content)
+        return result
+
+    async def chat(self, model, messages, timeout=None, parse=None, **params):
+        """
+        Returns the assistant's reply text, or parse(text) if a parser is
+        given; raises asyncio.TimeoutError on timeout. Callers deduplicated
+        onto one request share its parsed result.
+        """
+        key = request_key(model, messages, params)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create(key, model, messages, params, parse))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.requests_deduplicated += 1
+        return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+
+    async def extract_task_features(self, task_description, timeout=None):
+        try:
+            return await self.chat("gpt-3.5-turbo", task_features_messages(task_description), timeout)
+        except Exception as e:
+            print(f"An error occurred: {e!r}")
+            return None
+
+    async def extract_task_objects(self, task_description, timeout=None):
+        try:
+            return await self.chat("gpt-3.5-turbo", task_objects_messages(task_description), timeout,
+                                   parse=json.loads)
+        except Exception as e:
+            print(f"An error occurred in extract_task_objects: {e!r}")
+            return []
+
+    async def generate_instructions(self, task_details, model="gpt-4", timeout=None):
+        return await self.chat(model, instructions_messages(task_details), timeout,
+                               parse=plan_lines, max_tokens=800)
+
+    async def plan_task_entry(self, task_description, timeout=None):
+        """Fetches task features and task objects concurrently: one round trip instead of two."""
+        return await asyncio.gather(
+            self.extract_task_features(task_description, timeout),
+            self.extract_task_objects(task_description, timeout),
+        )
+
+
+def extract_task_features_and_objects(task_description, timeout=DEFAULT_TIMEOUT, use_cache=True):
+    """
+    Synchronous wrapper around AsyncPlanningClient.plan_task_entry().
+    Returns (features, objects) with the same values and error handling as
+    extract_task_features() and extract_task_objects().
+    """
+    start = time.perf_counter()
+    client = AsyncPlanningClient(timeout=timeout, use_cache=use_cache)
+    features, objects = asyncio.run(client.plan_task_entry(task_description))
+    print(f"[Planner] Task entry took {time.perf_counter() - start:.2f} s "
+          f"({client.requests_sent} requests)")
+    return features, objects
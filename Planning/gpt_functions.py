@@ -1,30 +1,68 @@
-import openai
 import json
+import re
+from Planning.llm_cache import LLMResponseCache, request_key
+from Planning.llm_backends import backend_from_env
+from Execution.command_parser import parse_plan
 
 
 # All ai agents and related functions are located in this file
 
 # Initialize your OpenAI API key here
-openai.api_key = ''
+OPENAI_API_KEY = ''
 
-def extract_task_features(task_description):
+# Backend all calls below go through (OpenAI, OpenAI-compatible HTTP, or mock); see set_backend()
+_backend = None
+
+def set_backend(backend):
+    """Routes every GPT call through the given LLMBackend (e.g. MockBackend for offline runs)."""
+    global _backend
+    _backend = backend
+
+def get_backend():
+    """Returns the active backend, building it from FYP_LLM_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        _backend = backend_from_env(OPENAI_API_KEY)
+    return _backend
+
+# Disk-backed reply cache shared by all calls below (the file is created on first use); set to None to disable caching
+llm_cache = LLMResponseCache()
+
+def chat_completion(model, messages, use_cache=True, parse=None, **params):
+    """
+    Sends one chat completion and returns the reply text, or parse(text)
+    if a parser is given. Replies are looked up in and stored to llm_cache
+    unless use_cache=False; a reply the parser rejects is not cached.
+    """
+    cache = llm_cache if use_cache else None
+    key = request_key(model, messages, params) if cache is not None else None
+
+    content = cache.get(key) if cache is not None else None
+    cached = content is not None
+    if not cached:
+        content = get_backend().complete(model, messages, **params)
+
+    result = parse(content) if parse is not None else content
+    if cache is not None and not cached:
+        cache.put(key, model, content)
+    return result
+
+def task_features_messages(task_description):
+    return [
+        {"role": "user", "content": f"Extract the key features from this task description: {task_description}"}
+    ]
+
+def extract_task_features(task_description, use_cache=True):
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "user", "content": f"Extract the key features from this task description: {task_description}"}
-            ]
+        task_features = chat_completion(
+            "gpt-3.5-turbo", task_features_messages(task_description), use_cache
         )
-        task_features = response.choices[0].message['content']
         return task_features
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
     
-# Function to generate robot instructions from GPT
-def generate_instructions(task_details, model = "gpt-4"):
-    openai.api_key = ''  # Add your OpenAI API key
-
+def instructions_messages(task_details):
     prompt = f"""
     Given the following task, generate a list of robot commands according to the formats below. Each command must strictly follow the given format without any extra numbering, punctuation, or commentary. Also remember that to pick something up you must move to it first.
 
@@ -43,20 +81,73 @@ Requirements:
 Return only the commands, one per line, with no extra text or numbering. Ensure that every move command has all six coordinates and that no command is truncated.
 
     """
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
 
-    response = openai.ChatCompletion.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=800
-    )
+def plan_lines(content):
+    """Splits a plan reply into command lines; raises CommandParseError if parse_plan() rejects them."""
+    lines = content.strip().split('\n')
+    parse_plan(lines)
+    return lines
 
-    # Split the response into individual commands
-    return response['choices'][0]['message']['content'].strip().split('\n')
+# Function to generate robot instructions from GPT
+def generate_instructions(task_details, model = "gpt-4", use_cache=True):
+    """
+    Returns GPT's plan as a list of command lines. Raises CommandParseError
+    if the plan does not parse and validate; such a plan is not cached, so
+    asking again reaches the model.
+    """
+    return chat_completion(
+        model, instructions_messages(task_details), use_cache, parse=plan_lines, max_tokens=800
+    )
     
 
+def stream_instructions(task_details, model="gpt-4", use_cache=True):
+    """
+    Streaming variant of generate_instructions(): yields each command line
+    as soon as its newline arrives, while GPT is still generating the rest.
+
+    Only complete lines are yielded. The trailing line without a newline is
+    yielded only if the completion finished normally; if the reply was cut
+    off (finish_reason "length") or the stream fails mid-way, an exception
+    is raised instead, so a truncated command never reaches the robot. The
+    reply is cached only if every line parses and the plan validates.
+    """
+    messages = instructions_messages(task_details)
+    key = request_key(model, messages, {"max_tokens": 800})
+
+    cached = llm_cache.get(key) if use_cache and llm_cache is not None else None
+    if cached is not None:
+        for line in cached.strip().split('\n'):
+            if line.strip():
+                yield line
+        return
+
+    content = ""
+    buffer = ""
+    finish_reason = None
+    for delta, reason in get_backend().stream(model, messages, max_tokens=800):
+        finish_reason = reason or finish_reason
+        content += delta
+        buffer += delta
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            if line.strip():
+                yield line
+
+    if finish_reason == "length":
+        raise RuntimeError(f"Instruction stream truncated; dropped partial line: {buffer!r}")
+    if buffer.strip():
+        yield buffer
+    if use_cache and llm_cache is not None:
+        try:
+            plan_lines(content)
+        except ValueError:
+            return
+        llm_cache.put(key, model, content)
+
 def generate_task_details(task, objects):
     """
     Generates a formatted task details string.
@@ -99,45 +190,132 @@ def generate_task_details(task, objects):
         details += f"Orientation: {orient[0]}  {orient[1]}  {orient[2]}  # Roll, Pitch, Yaw\n\n"
     return details
 
-def extract_task_objects(task_description):
+def task_objects_messages(task_description):
+    return [
+        {"role": "user", "content": (
+            f"Extract the list of objects mentioned in the following task description. "
+            "Return a JSON array of strings with each object name, and do not include any numbering or extra text.\n\n"
+            f"Task Description: {task_description}"
+        )}
+    ]
+
+def extract_task_objects(task_description, use_cache=True):
     """
     Uses GPT to extract a list of task objects from the task description.
     Returns a JSON array of strings.
     """
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "user", "content": (
-                    f"Extract the list of objects mentioned in the following task description. "
-                    "Return a JSON array of strings with each object name, and do not include any numbering or extra text.\n\n"
-                    f"Task Description: {task_description}"
-                )}
-            ]
+        # Parse the JSON response into a list (unparseable replies are not cached)
+        objects = chat_completion(
+            "gpt-3.5-turbo", task_objects_messages(task_description), use_cache, parse=json.loads
         )
-        content = response.choices[0].message['content']
-        # Parse the JSON response into a list
-        objects = json.loads(content)
         return objects
     except Exception as e:
         print(f"An error occurred in extract_task_objects: {e}")
         return []
 
+BIN_NAMES = ("Green Bin", "Blue Bin")
+COMMAND_TEMPLATE_RE = re.compile(r"^(move|pick_up|place)\(<([^<>]+)>\)$")
+
+def structured_plan_messages(task_description):
+    prompt = f"""
+Plan the following robot task. Object positions are not known yet; refer to each object by name inside angle brackets and the positions are filled in later.
+
+Task Description: {task_description}
+
+Return a single JSON object and nothing else, with exactly these keys:
+  "objects":    JSON array of the names of the objects to be moved (never a bin).
+  "target_bin": one of {json.dumps(list(BIN_NAMES))} if the task places objects in a bin, otherwise null.
+  "commands":   JSON array of command templates, in execution order, each one of:
+                  "move(<name>)"     - move to the object's or bin's full 6D pose
+                  "pick_up(<name>)"  - pick up the object at its position
+                  "place(<name>)"    - place at that object's or bin's position
+                where <name> is an entry of "objects" or a bin name. Always move to an object before picking it up
+                and move to the destination before placing.
+"""
+    return [
+        {"role": "system", "content": "You are a robot task planner that only outputs JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+def validate_structured_plan(plan):
+    """
+    Checks a structured plan against the schema described in
+    structured_plan_messages(). "target_bin" must agree with the commands:
+    every place(<bin>) goes to that bin, and a plan with no target bin places
+    nothing in a bin. Returns the plan; raises ValueError if invalid.
+    """
+    if not isinstance(plan, dict) or set(plan) != {"objects", "target_bin", "commands"}:
+        raise ValueError("plan must be an object with keys objects, target_bin, commands")
+    objects = plan["objects"]
+    if not isinstance(objects, list) or not all(isinstance(o, str) and o.strip() for o in objects):
+        raise ValueError("objects must be a list of non-empty strings")
+    if plan["target_bin"] is not None and plan["target_bin"] not in BIN_NAMES:
+        raise ValueError(f"target_bin must be one of {BIN_NAMES} or null")
+    commands = plan["commands"]
+    if not isinstance(commands, list) or not commands:
+        raise ValueError("commands must be a non-empty list")
+    names = set(objects) | set(BIN_NAMES)
+    placed_in = set()
+    for cmd in commands:
+        match = COMMAND_TEMPLATE_RE.match(cmd) if isinstance(cmd, str) else None
+        if match is None:
+            raise ValueError(f"invalid command template: {cmd!r}")
+        op, name = match.groups()
+        if name not in names:
+            raise ValueError(f"command refers to unknown object: {cmd!r}")
+        if op == "place" and name in BIN_NAMES:
+            placed_in.add(name)
+    expected = set() if plan["target_bin"] is None else {plan["target_bin"]}
+    if placed_in != expected:
+        raise ValueError(f"target_bin {plan['target_bin']!r} does not match the bins placed into: {sorted(placed_in)}")
+    return plan
+
+def plan_task_structured(task_description, model="gpt-4", use_cache=True):
+    """
+    One GPT round trip that replaces extract_task_features, extract_task_objects
+    and generate_instructions: returns the validated plan dict
+    {"objects", "target_bin", "commands"} with command templates that
+    fill_command_template() completes after perception, or None on failure.
+    """
+    try:
+        return chat_completion(
+            model, structured_plan_messages(task_description), use_cache,
+            parse=lambda content: validate_structured_plan(json.loads(content)),
+            temperature=0,
+        )
+    except Exception as e:
+        print(f"An error occurred in plan_task_structured: {e}")
+        return None
+
 def main():
     task_description = input("Please enter your task description: ")
     features = extract_task_features(task_description)
     print(f"Extracted features: {features}")
 
+VERIFICATION_JSON_INSTRUCTION = f"""Decide for each object whether it has been placed according to the original task.
+Respond with only a JSON object, no other text:
+{{"complete": true or false,
+ "objects": {{"<object name>": {{"status": "placed" or "misplaced", "target_bin": one of {json.dumps(list(BIN_NAMES))}}}}}}}
+List every object from the observations exactly once, using its name as given. "target_bin" is the bin the task
+asks for. "complete" is true only if every object is "placed"."""
+
 def generate_open_verification_prompt(
     task_description: str,
     table_confidences: dict,
     table_poses: dict,
     bin_confidences: dict,
     bin_poses: dict,
-    bin_fixed_poses: dict
+    bin_fixed_poses: dict,
+    compact: bool = False,
+    structured: bool = False
 ) -> str:
     """
-    Build an open‐ended verification prompt. We show:
+    Build an open‐ended verification prompt. With compact=True the same
+    observations are sent as a terse table instead (see
+    compact_verification_prompt). With structured=True GPT is asked for the
+    strict JSON verdict read by parse_verification_response() instead of a
+    Yes/No sentence. Otherwise we show:
       • Original task.
       • Table‐view confidence & pose for each object.
       • Bin‐view confidence & pose for each object.
@@ -146,6 +324,9 @@ def generate_open_verification_prompt(
       • A rule to map any reported bin‐view pose (within ±0.2) to its bin.
       • Finally, ask GPT to decide success/failure and provide retry instructions if needed.
     """
+    if compact:
+        return compact_verification_prompt(task_description, table_confidences, table_poses,
+                                           bin_confidences, bin_poses, bin_fixed_poses, structured)
 
     lines = []
 
@@ -214,7 +395,10 @@ def generate_open_verification_prompt(
     )
     lines.append("")
 
-    # 7) Open‐ended instructions to GPT
+    # 7) Open‐ended instructions to GPT (or the JSON verdict format)
+    if structured:
+        lines.append(VERIFICATION_JSON_INSTRUCTION)
+        return "\n".join(lines)
     lines.append(
         "Using the information, the explicit comparisons, and the rules above, please determine "
         "whether each object has been placed correctly according to the original task. If all objects "
@@ -229,64 +413,173 @@ def generate_open_verification_prompt(
     return "\n".join(lines)
 
 
+def _num(v):
+    """Shortest form of v at 2 decimal places (100.0 -> "100", -0.834 -> "-0.83")."""
+    return f"{round(v, 2):g}"
 
-def chat_with_gpt(prompt: str, model: str = "gpt-4") -> str:
+
+def compact_verification_prompt(
+    task_description: str,
+    table_confidences: dict,
+    table_poses: dict,
+    bin_confidences: dict,
+    bin_poses: dict,
+    bin_fixed_poses: dict,
+    structured: bool = False
+) -> str:
+    """
+    Compact form of the verification prompt: one row per object and per bin,
+    positions only (orientation does not affect the verdict), numbers without
+    trailing zeros, and the decision rule stated once instead of spelled out
+    per object. Asks for the same reply format as the prose prompt, or the
+    JSON verdict if structured=True.
+    """
+    lines = [
+        f'Task: "{task_description}"',
+        "Bins (x,y,z):",
+    ]
+    for bin_name, data in bin_fixed_poses.items():
+        lines.append(f"{bin_name}|{','.join(_num(v) for v in data['position'])}")
+
+    lines.append("object|t|b|table x,y,z|bin x,y,z")
+    for obj, t_conf in table_confidences.items():
+        t_pose = table_poses.get(obj)
+        b_pose = bin_poses.get(obj)
+        lines.append("|".join([
+            obj,
+            _num(t_conf),
+            _num(bin_confidences.get(obj, 0.0)),
+            ",".join(_num(v) for v in t_pose[:3]) if t_pose else "-",
+            ",".join(_num(v) for v in b_pose[:3]) if b_pose else "-",
+        ]))
+
+    rule = ("t/b = table/bin-view confidence. An object is in a bin if b > t and its bin position "
+            "is within 0.2 of that bin, else on the table. ")
+    if structured:
+        lines.append(rule)
+        lines.append(VERIFICATION_JSON_INSTRUCTION)
+    else:
+        lines.append(
+            rule +
+            'Reply "Yes, the task is complete." if every object is in the bin the task asks for; '
+            'otherwise "No," then name each misplaced object with a retry instruction '
+            '(e.g. "Place the lemon into the Green Bin."). No numbers.'
+        )
+    return "\n".join(lines)
+
+
+def chat_with_gpt(prompt: str, model: str = "gpt-4", use_cache: bool = True) -> str:
     """
     Sends 'prompt' to GPT and returns the assistant’s text response.
 
     Parameters:
       - prompt (str): The full text prompt to send.
       - model  (str): The OpenAI model name to use (default: "gpt-3.5-turbo").
+      - use_cache (bool): Reuse a cached reply for an identical prompt.
 
     Returns:
       - The assistant’s reply as a string.
     """
     try:
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message["content"].strip()
+        content = chat_completion(model, [{"role": "user", "content": prompt}], use_cache)
+        return content.strip()
     except Exception as e:
         print(f"An error occurred in chat_with_gpt: {e}")
         return ""
 
 
-def parse_verification_response(response_text: str) -> dict:
+def validate_verification(verdict, task_objects=None):
+    """
+    Checks a verification verdict against VERIFICATION_JSON_INSTRUCTION.
+    Object names are matched to task_objects case-insensitively and
+    rewritten to the task's spelling; every task object must be present.
+    Returns the verdict; raises ValueError if invalid.
+    """
+    if not isinstance(verdict, dict) or set(verdict) != {"complete", "objects"}:
+        raise ValueError("verdict must be an object with keys complete, objects")
+    if not isinstance(verdict["complete"], bool):
+        raise ValueError("complete must be true or false")
+    objects = verdict["objects"]
+    if not isinstance(objects, dict):
+        raise ValueError("objects must be an object keyed by object name")
+
+    names = {o.strip().lower(): o for o in task_objects} if task_objects is not None else None
+    checked = {}
+    for name, entry in objects.items():
+        if names is not None:
+            if name.strip().lower() not in names:
+                raise ValueError(f"unknown object in verdict: {name!r}")
+            name = names[name.strip().lower()]
+        if not isinstance(entry, dict) or entry.get("status") not in ("placed", "misplaced"):
+            raise ValueError(f"status of {name!r} must be placed or misplaced")
+        if entry.get("target_bin") not in BIN_NAMES:
+            raise ValueError(f"target_bin of {name!r} must be one of {BIN_NAMES}")
+        checked[name] = {"status": entry["status"], "target_bin": entry["target_bin"]}
+    if names is not None and len(checked) != len(names):
+        missing = set(names.values()) - set(checked)
+        raise ValueError(f"verdict is missing objects: {sorted(missing)}")
+
+    if verdict["complete"] != all(e["status"] == "placed" for e in checked.values()):
+        raise ValueError("complete disagrees with the per-object statuses")
+    return {"complete": verdict["complete"], "objects": checked}
+
+
+def parse_verification_response(response_text: str, task_objects=None) -> dict:
     """
-    (Optional helper) Attempt to extract from GPT’s verification response:
-      - A list of misplaced objects (if any).
-      - For each, the 6D pick and 6D place pose recommended.
+    Parses and validates GPT's JSON verification verdict (see
+    VERIFICATION_JSON_INSTRUCTION; a surrounding ```json fence is tolerated).
 
-    This function returns a dict of the form:
+    Returns a dict of the form:
       {
-        "misplaced_objects": {
-          "object_name": {
-            "pick_pose": (x, y, z, roll, pitch, yaw),
-            "place_pose": (x, y, z, roll, pitch, yaw)
-          },
-          ...
-        }
+        "complete": bool,
+        "objects": {"object_name": {"status": "placed" | "misplaced", "target_bin": "Green Bin"}, ...},
+        "misplaced_objects": {"object_name": {"target_bin": "Green Bin"}, ...}
       }
 
-    If parsing fails or GPT did not recommend any retries, returns an empty dict.
-
-    Note: GPT can return free‐form text. To reliably parse out exact 6D numbers, in practice
-    you would prompt GPT to respond in strict JSON. For now, this is a placeholder that simply
-    returns the raw text under “raw_response” so you can manually inspect or apply a custom parser.
+    If the reply is not valid JSON or does not match the schema, returns an
+    empty dict so the caller can fall back to the confidence comparison.
 
     Example usage:
-      result = parse_verification_response(gpt_reply)
-      if "misplaced_objects" in result:
-          for obj, poses in result["misplaced_objects"].items():
-              pick = poses["pick_pose"]
-              place = poses["place_pose"]
-              # … use pick/place in your retry …
+      result = parse_verification_response(gpt_reply, task_objs)
+      for obj, entry in result.get("misplaced_objects", {}).items():
+          bin_data = BIN_FIXED_POSES[entry["target_bin"]]
+          commands = pick_and_place_commands(table_poses[obj], (*bin_data["position"], *bin_data["orientation"]))
+    """
+    try:
+        return _parse_verdict(response_text, task_objects)
+    except ValueError as e:
+        print(f"Could not parse verification response: {e}")
+        return {}
+
+
+def _parse_verdict(response_text, task_objects):
+    text = response_text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[len("json"):] if text.lower().startswith("json") else text
+    verdict = validate_verification(json.loads(text), task_objects)
+    verdict["misplaced_objects"] = {
+        name: {"target_bin": entry["target_bin"]}
+        for name, entry in verdict["objects"].items() if entry["status"] == "misplaced"
+    }
+    return verdict
+
+
+def verify_with_gpt(prompt: str, task_objects, model: str = "gpt-4", use_cache: bool = True) -> dict:
+    """
+    Sends a structured verification prompt and returns the parsed verdict
+    (see parse_verification_response), or an empty dict on failure. Replies
+    that fail validation are not cached.
     """
-    # Placeholder: do not attempt actual numeric parsing here.
-    return {"raw_response": response_text}
+    try:
+        return chat_completion(
+            model, [{"role": "user", "content": prompt}], use_cache,
+            parse=lambda content: _parse_verdict(content, task_objects),
+            temperature=0,
+        )
+    except Exception as e:
+        print(f"An error occurred in verify_with_gpt: {e}")
+        return {}
 
 
 # … rest of your existing file …
@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import urllib.request
+
+from Planning.canned_replies import canned_reply
+from Planning.token_counter import count_tokens, count_message_tokens
+
+# Pluggable chat-completion backends: OpenAI API, any OpenAI-compatible HTTP endpoint, or an in-process mock
+
+# USD per 1K (prompt, completion) tokens, for cost estimates in stats()
+TOKEN_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5-turbo": (0.0015, 0.002),
+}
+
+
+class LLMBackendError(RuntimeError):
+    """Raised by a backend when a request fails (including injected mock failures)."""
+
+
+class LLMBackend:
+    """
+    Interface used by gpt_functions and the async planner.
+
+    Subclasses implement _complete() and _stream(); the public methods add
+    wait-time and token accounting so a run can report how much of its cycle
+    time was spent waiting on the LLM, and what each prompt cost. Every call
+    is appended to `call_log` as a dict with model, prompt_tokens,
+    completion_tokens, latency and failed.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.wait_time = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.call_log = []
+        self._lock = threading.Lock()
+
+    def _record(self, start, model, messages, content="", failed=False):
+        latency = time.perf_counter() - start
+        prompt_tokens = count_message_tokens(messages, model)
+        completion_tokens = count_tokens(content, model)
+        prompt_price, completion_price = TOKEN_PRICES.get(model, (0.0, 0.0))
+        with self._lock:
+            self.calls += 1
+            self.failures += int(failed)
+            self.wait_time += latency
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+            self.call_log.append({"model": model, "prompt_tokens": prompt_tokens,
+                                  "completion_tokens": completion_tokens,
+                                  "latency": latency, "failed": failed})
+
+    def complete(self, model, messages, **params):
+        """Returns the reply text for one chat completion."""
+        start = time.perf_counter()
+        try:
+            content = self._complete(model, messages, **params)
+        except Exception:
+            self._record(start, model, messages, failed=True)
+            raise
+        self._record(start, model, messages, content)
+        return content
+
+    def stream(self, model, messages, **params):
+        """
+        Yields (text_delta, finish_reason) pairs as the reply is generated.
+        The call is recorded however the stream ends, including when the
+        caller closes it early (with the text received so far).
+        """
+        start = time.perf_counter()
+        content = ""
+        failed = False
+        try:
+            for delta, finish_reason in self._stream(model, messages, **params):
+                content += delta
+                yield delta, finish_reason
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(start, model, messages, content, failed=failed)
+
+    async def acomplete(self, model, messages, **params):
+        """Async completion; by default runs complete() in a worker thread."""
+        return await asyncio.to_thread(self.complete, model, messages, **params)
+
+    def _complete(self, model, messages, **params):
+        raise NotImplementedError
+
+    def _stream(self, model, messages, **params):
+        # Backends without native streaming return the whole reply as one chunk
+        yield self._complete(model, messages, **params), "stop"
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "wait_time": self.wait_time,
+            "mean_wait": self.wait_time / self.calls if self.calls else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 4),
+        }
+
+
+class OpenAIBackend(LLMBackend):
+    """The hosted OpenAI API through the openai 0.28 module."""
+
+    name = "openai"
+
+    def __init__(self, api_key=None, api_base=None):
+        super().__init__()
+        import openai
+        self.openai = openai
+        if api_key:
+            openai.api_key = api_key
+        self.api_base = api_base
+
+    def _kwargs(self, params):
+        if self.api_base:
+            params = dict(params, api_base=self.api_base)
+        return params
+
+    def _complete(self, model, messages, **params):
+        response = self.openai.ChatCompletion.create(model=model, messages=messages, **self._kwargs(params))
+        return response.choices[0].message["content"]
+
+    def _stream(self, model, messages, **params):
+        response = self.openai.ChatCompletion.create(
+            model=model, messages=messages, stream=True, **self._kwargs(params))
+        for chunk in response:
+            choice = chunk.choices[0]
+            yield choice.delta.get("content", "") or "", choice.get("finish_reason")
+
+    async def acomplete(self, model, messages, **params):
+        start = time.perf_counter()
+        try:
+            response = await self.openai.ChatCompletion.acreate(
+                model=model, messages=messages, **self._kwargs(params))
+        except Exception:
+            self._record(start, model, messages, failed=True)
+            raise
+        content = response.choices[0].message["content"]
+        self._record(start, model, messages, content)
+        return content
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Any OpenAI-compatible /chat/completions endpoint (a local model server,
+    a proxy, or MockLLMServer), using only the standard library.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url, api_key="", timeout=60.0):
+        super().__init__()
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _post(self, payload):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except OSError as e:
+            raise LLMBackendError(f"{self.url}: {e}") from e
+
+    def _complete(self, model, messages, **params):
+        with self._post(dict(params, model=model, messages=messages)) as response:
+            body = json.load(response)
+        return body["choices"][0]["message"]["content"]
+
+    def _stream(self, model, messages, **params):
+        with self._post(dict(params, model=model, messages=messages, stream=True)) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choice = json.loads(data)["choices"][0]
+                yield choice.get("delta", {}).get("content") or "", choice.get("finish_reason")
+
+
+class MockBackend(LLMBackend):
+    """
+    In-process scripted backend for offline runs and benchmarks.
+
+    Args:
+      replies:      callable(messages) -> str, a {substring: reply} dict matched
+                    against the last message, or a single string. Defaults to
+                    canned_reply(), which answers every prompt in gpt_functions.
+      latency:      seconds per call: a number, or a distribution tuple
+                    ("uniform", low, high), ("normal", mean, sd) or
+                    ("lognormal", mu, sigma).
+      failure_rate: probability in [0, 1] that a call raises LLMBackendError.
+      line_delay:   delay between lines when streaming.
+      seed:         seed for reproducible latency and failure sequences.
+    """
+
+    name = "mock"
+
+    def __init__(self, replies=canned_reply, latency=0.0, failure_rate=0.0, line_delay=0.0, seed=None):
+        super().__init__()
+        self.replies = replies
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.line_delay = line_delay
+        self.rng = random.Random(seed)
+
+    def sample_latency(self):
+        if isinstance(self.latency, (int, float)):
+            return float(self.latency)
+        kind, a, b = self.latency
+        if kind == "uniform":
+            return self.rng.uniform(a, b)
+        if kind == "normal":
+            return max(0.0, self.rng.gauss(a, b))
+        if kind == "lognormal":
+            return self.rng.lognormvariate(a, b)
+        raise ValueError(f"Unknown latency distribution: {kind}")
+
+    def reply_for(self, messages):
+        if callable(self.replies):
+            return self.replies(messages)
+        if isinstance(self.replies, dict):
+            prompt = messages[-1]["content"]
+            for pattern, reply in self.replies.items():
+                if pattern in prompt:
+                    return reply
+            raise LLMBackendError("No canned reply matches the prompt")
+        return self.replies
+
+    def _begin(self):
+        time.sleep(self.sample_latency())
+        if self.rng.random() < self.failure_rate:
+            raise LLMBackendError("Injected mock failure")
+
+    def _complete(self, model, messages, **params):
+        self._begin()
+        return self.reply_for(messages)
+
+    def _stream(self, model, messages, **params):
+        self._begin()
+        lines = self.reply_for(messages).split("\n")
+        for i, line in enumerate(lines):
+            if i:
+                time.sleep(self.line_delay)
+            yield line + ("\n" if i < len(lines) - 1 else ""), None
+        yield "", "stop"
+
+
+def backend_from_env(api_key=None):
+    """
+    Builds the backend selected by FYP_LLM_BACKEND:
+      openai (default) - hosted API, using api_key
+      http             - FYP_LLM_BASE_URL (default http://127.0.0.1:8000/v1)
+      mock             - MockBackend with FYP_MOCK_LATENCY seconds per call
+    """
+    kind = os.environ.get("FYP_LLM_BACKEND", "openai").lower()
+    if kind == "mock":
+        return MockBackend(latency=float(os.environ.get("FYP_MOCK_LATENCY", "0")))
+    if kind == "http":
+        return HTTPBackend(os.environ.get("FYP_LLM_BASE_URL", "http://127.0.0.1:8000/v1"),
+                           api_key=api_key or "")
+    return OpenAIBackend(api_key=api_key)
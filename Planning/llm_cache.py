@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import closing
+
+# Content-addressed, disk-backed cache of LLM replies
+
+LLM_CACHE_PATH = os.environ.get("FYP_LLM_CACHE", "llm_cache.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600   # seconds
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def request_key(model, messages, params):
+    """SHA-256 of the canonical JSON of (model, messages, parameters)."""
+    canonical = json.dumps({"model": model, "messages": messages, "params": params},
+                           sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed reply cache keyed by request_key().
+
+    The database runs in WAL mode and every operation opens its own short
+    connection, closed when the operation ends, so several processes and
+    threads (e.g. the planner and the prompt evaluator) can share one file.
+    Entries older than `ttl` seconds are treated as misses and removed; when
+    the cache grows past `max_entries` the least recently used entries are
+    evicted.
+
+    The database file is only created on first use, so constructing a cache
+    (e.g. at import time) touches nothing on disk.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._ready = False
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            with db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+                    " created REAL, accessed REAL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._ready = True
+        return db
+
+    def get(self, key):
+        """Returns the cached reply text or None."""
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, model, response):
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+            count = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                    (count - self.max_entries,))
+
+    def clear(self):
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM responses")
+
+    def stats(self):
+        total = self.hits + self.misses
+        entries = 0
+        if self._ready or os.path.isfile(self.path):
+            with closing(self._connect()) as db, db:
+                entries = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,111 @@
+import os
+import json
+from collections import Counter
+
+# Rule-based verification: decides clear-cut scenes locally and escalates ambiguous ones to GPT
+
+VERIFIER_STATS_PATH = os.environ.get("FYP_VERIFIER_STATS", "verifier_stats.json")
+
+# Decisions returned by LocalVerifier.decide()
+COMPLETE = "complete"
+RETRY = "retry"
+ESCALATE = "escalate"
+
+
+class LocalVerifier:
+    """
+    Decides the end-of-task verification from the table-view and bin-view
+    CLIP confidences when the outcome is obvious.
+
+    An object is clearly placed when its bin confidence is at least
+    bin_thresh + margin, its table confidence is at most table_max, and the
+    bin confidence beats the table confidence by at least margin (and, if a
+    bin-view pose is known, it lies within pose_tol of the target bin). It is
+    clearly on the table when the table confidence is at least
+    table_thresh + margin and beats the bin confidence by at least margin.
+    If every object is clearly placed the task is complete; if every object
+    is clear and some are on the table those are retried; anything else is
+    escalated to the LLM.
+
+    Counts of each decision are kept in `counts`. If `path` is given, the
+    counts saved there by earlier runs are loaded on start and save() writes
+    the running totals back.
+    """
+
+    def __init__(self, bin_thresh=0.1, table_thresh=0.1, margin=0.15, table_max=0.1,
+                 pose_tol=0.2, path=VERIFIER_STATS_PATH):
+        self.bin_thresh = bin_thresh
+        self.table_thresh = table_thresh
+        self.margin = margin
+        self.table_max = table_max
+        self.pose_tol = pose_tol
+        self.path = path
+        self.counts = Counter()
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    self.counts.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"[Verifier] Could not load {path}: {e}")
+
+    def classify(self, t_conf, b_conf, bin_pose=None, target_position=None):
+        """Returns "placed", "on_table" or None (ambiguous) for one object."""
+        if (b_conf >= self.bin_thresh + self.margin and t_conf <= self.table_max
+                and b_conf - t_conf >= self.margin):
+            if bin_pose is not None and target_position is not None:
+                if any(abs(p - q) > self.pose_tol for p, q in zip(bin_pose[:3], target_position)):
+                    return None
+            return "placed"
+        if t_conf >= self.table_thresh + self.margin and t_conf - b_conf >= self.margin:
+            return "on_table"
+        return None
+
+    def decide(self, task_objects, table_confidences, bin_confidences, bin_poses=None,
+               target_position=None):
+        """
+        Args:
+          task_objects:      object names from the task
+          table_confidences: {object: table-view confidence}
+          bin_confidences:   {object: bin-view confidence}
+          bin_poses:         optional {object: 6D bin-view pose or None}
+          target_position:   (x, y, z) of the bin the task asks for
+
+        Returns:
+          (decision, misplaced) where decision is COMPLETE, RETRY or ESCALATE
+          and misplaced lists the objects clearly left on the table.
+        """
+        bin_poses = bin_poses or {}
+        labels = {
+            obj: self.classify(table_confidences.get(obj, 0.0), bin_confidences.get(obj, 0.0),
+                               bin_poses.get(obj), target_position)
+            for obj in task_objects
+        }
+        misplaced = [obj for obj, label in labels.items() if label == "on_table"]
+        if any(label is None for label in labels.values()):
+            decision = ESCALATE
+        elif misplaced:
+            decision = RETRY
+        else:
+            decision = COMPLETE
+        self.counts[decision] += 1
+        return decision, misplaced
+
+    def save(self, path=None):
+        """Writes the decision counts to disk atomically (temp file + rename)."""
+        path = path or self.path
+        if not path:
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(self.counts), f)
+        os.replace(tmp, path)
+
+    def stats(self):
+        total = sum(self.counts.values())
+        local = self.counts[COMPLETE] + self.counts[RETRY]
+        return {
+            COMPLETE: self.counts[COMPLETE],
+            RETRY: self.counts[RETRY],
+            ESCALATE: self.counts[ESCALATE],
+            "local_rate": local / total if total else 0.0,
+        }
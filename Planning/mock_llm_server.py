@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Planning.canned_replies import canned_reply
+from Planning.llm_backends import LLMBackendError, MockBackend
+
+# Local OpenAI-compatible stand-in for testing the planning layer without the real API
+
+class MockLLMServer:
+    """
+    Serves POST /v1/chat/completions on localhost, answering through a
+    MockBackend with canned replies after `latency` (seconds, or a latency
+    distribution tuple) and failing a `failure_rate` fraction of requests with
+    HTTP 500. Point an HTTPBackend at server.url. Requests with "stream": true
+    get the reply as server-sent events, one line every `line_delay` seconds.
+    """
+
+    def __init__(self, port=0, latency=0.5, reply=canned_reply, line_delay=0.3, failure_rate=0.0, seed=None):
+        self.backend = MockBackend(replies=reply, latency=latency, failure_rate=failure_rate, seed=seed)
+        self.line_delay = line_delay
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+                try:
+                    content = server.backend.complete(body.get("model", "mock"), body.get("messages", []))
+                except LLMBackendError as e:
+                    payload = json.dumps({"error": {"message": str(e), "type": "server_error"}}).encode()
+                    self.send_response(500)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                if body.get("stream"):
+                    self._stream(body, content)
+                    return
+                payload = json.dumps({
+                    "id": f"mock-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                lines = content.split("\n")
+                for i, line in enumerate(lines):
+                    text = line + ("\n" if i < len(lines) - 1 else "")
+                    self._event({"delta": {"content": text}, "finish_reason": None}, body)
+                    time.sleep(server.line_delay)
+                self._event({"delta": {}, "finish_reason": "stop"}, body)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def _event(self, choice, body):
+                chunk = {"id": f"mock-{server.requests}", "object": "chat.completion.chunk",
+                         "created": int(time.time()), "model": body.get("model", "mock"),
+                         "choices": [dict(index=0, **choice)]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with MockLLMServer(port=8000) as server:
+        print(f"Mock LLM server listening on {server.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,134 @@
+import re
+from Planning.gpt_functions import COMMAND_TEMPLATE_RE
+
+# Local planner for plain "pick up X (and Y) and place in the bin" tasks; everything else goes to GPT
+
+# Courtesy words allowed around the instruction ("Please ...", "Can you ..., please?", "... for me")
+_PREFIX = r"(?:(?:please|(?:can|could|would|will)\s+you(?:\s+please)?)\s+)?"
+_SUFFIX = r"(?:\s*,?\s*please|\s+for\s+me)?"
+# "from its spot" adds nothing to a move into the bin
+_ORIGIN = r"(?:\s+from\s+(?:its|their)\s+(?:spots?|places?))?"
+
+def _fmt(value):
+    """Compact number formatting: 100.0 -> '100', 81.30000305 (float32) -> '81.3'."""
+    return "{:.10g}".format(round(float(value), 3))
+
+
+def pick_and_place_commands(pick_pose, place_pose):
+    """
+    Returns the four commands that move one object into a bin:
+    move to it, pick it up, move to the bin, place.
+
+    Args:
+      pick_pose, place_pose: (x, y, z, roll, pitch, yaw) tuples.
+    """
+    px, py, pz, pr, pp, pyaw = map(_fmt, pick_pose)
+    bx, by, bz, br, bp, byaw = map(_fmt, place_pose)
+    return [
+        f"move({px},{py},{pz},{pr},{pp},{pyaw})",
+        f"pick_up({px},{py},{pz})",
+        f"move({bx},{by},{bz},{br},{bp},{byaw})",
+        f"place({bx},{by},{bz})",
+    ]
+
+
+def _alternation(names):
+    """Regex alternation of names, longest first so "red block" wins over "block"."""
+    return "|".join(re.escape(name.lower()) for name in sorted(names, key=len, reverse=True))
+
+
+def plan_pick_and_place(task, objects):
+    """
+    Plans tasks of the form "pick up X (and Y) and place them in the <bin>"
+    without calling GPT.
+
+    The whole task must be one of
+      "move/put/place X (, Y and Z) in/into/inside/to the <bin>"
+      "pick up X (, Y and Z) and move/put/place it/them in/into/inside/to the <bin>"
+    optionally wrapped in "please" / "can you ..." / "... for me". The objects
+    moved are the ones named in that clause; any other wording ("but leave
+    the apple", "then ...", "hand me ...") means the task is not handled here.
+
+    Args:
+      task:    the task description.
+      objects: the same dict passed to generate_task_details(), object name ->
+               {"position": (x, y, z), "orientation": (roll, pitch, yaw)};
+               keys containing "bin" are destinations, every other key is an
+               object the task moves.
+
+    Returns:
+      The command list (move, pick_up, move, place per object, in the order
+      the objects are named), or None if the task does not have this shape
+      and should be planned by GPT - including when an object is not named
+      in the clause (e.g. a CLIP label that differs from the user's wording),
+      since a plan without it would be partial.
+    """
+    text = re.sub(r"\s+", " ", task.lower().replace("’", "'")).strip().rstrip(".!?").strip()
+
+    bins = {name: data for name, data in objects.items() if "bin" in name.lower()}
+    items = {name: data for name, data in objects.items() if "bin" not in name.lower()}
+    if not bins or not items:
+        return None
+
+    names = _alternation(items)
+    obj = rf"(?:(?:the|that)\s+)?(?:{names})"
+    objs = rf"(?P<objs>{obj}(?:(?:\s*,\s*(?:and\s+)?|\s+and\s+){obj})*)"
+    dest = rf"(?:in|into|inside|to|over\s+to)\s+(?:the\s+)?(?P<bin>{_alternation(list(bins) + ['bin'])})"
+    clauses = (
+        rf"(?:move|put|place)\s+{objs}{_ORIGIN}\s+{dest}",
+        rf"pick\s+up\s+{objs}{_ORIGIN}\s+and\s+(?:move|put|place)\s+(?:it|them|(?:them\s+)?both)\s+{dest}",
+    )
+    match = None
+    for clause in clauses:
+        match = re.fullmatch(_PREFIX + clause + _SUFFIX, text)
+        if match:
+            break
+    if not match:
+        return None
+
+    # Exactly one destination: the bin named, or the only bin for a plain "bin"
+    by_name = {name.lower(): name for name in objects}
+    if match.group("bin") != "bin" or "bin" in by_name:
+        target = by_name[match.group("bin")]
+    elif len(bins) == 1:
+        target = next(iter(bins))
+    else:
+        return None
+
+    named = [by_name[name] for name in re.findall(names, match.group("objs"))]
+    if len(named) != len(set(named)) or set(named) != set(items):
+        return None
+
+    place_pose = tuple(bins[target]["position"]) + tuple(bins[target]["orientation"])
+    commands = []
+    for name in named:
+        pick_pose = tuple(items[name]["position"]) + tuple(items[name]["orientation"])
+        commands += pick_and_place_commands(pick_pose, place_pose)
+    return commands
+
+
+def fill_command_template(templates, objects):
+    """
+    Replaces the placeholders of a structured plan ("move(<red block>)") with
+    the poses found by perception.
+
+    Args:
+      templates: list of "move(<name>)", "pick_up(<name>)" or "place(<name>)".
+      objects:   object name -> {"position": ..., "orientation": ...}; names
+                 are matched case-insensitively.
+
+    Returns:
+      The concrete command strings. Raises KeyError if a name has no pose.
+    """
+    by_name = {name.lower(): data for name, data in objects.items()}
+    commands = []
+    for template in templates:
+        op, name = COMMAND_TEMPLATE_RE.match(template).groups()
+        data = by_name[name.lower()]
+        x, y, z = map(_fmt, data["position"])
+        if op == "move":
+            r, p, yaw = map(_fmt, data["orientation"])
+            commands.append(f"move({x},{y},{z},{r},{p},{yaw})")
+        else:
+            commands.append(f"{op}({x},{y},{z})")
+    return commands
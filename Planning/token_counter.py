@@ -0,0 +1,49 @@
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Local token counting for prompt-size and cost accounting (no API call needed)
+
+# Approximates BPE tokenisation when tiktoken is not installed: words, numbers split into
+# short digit runs, and each punctuation mark counted separately
+_APPROX_TOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+# Per-message framing overhead of the chat format (role markers and separators)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_encodings = {}
+
+
+def _encoding(model):
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("cl100k_base")
+    return _encodings[model]
+
+
+def count_tokens(text, model="gpt-4"):
+    """
+    Returns the number of tokens in `text` for `model`. Exact when tiktoken
+    is installed, otherwise a regex approximation that is usually within
+    about 10% for English prompts with numbers.
+    """
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text))
+    return len(_APPROX_TOKEN_RE.findall(text))
+
+
+def count_message_tokens(messages, model="gpt-4"):
+    """Prompt tokens for a list of chat messages, including the chat-format overhead."""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE
+        total += sum(count_tokens(value, model) for value in message.values())
+    return total
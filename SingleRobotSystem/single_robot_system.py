@@ -6,15 +6,25 @@ import torch
 import matplotlib.pyplot as plt
 
 
-from Planning.gpt_functions import extract_task_features, extract_task_objects, generate_task_details
-from Perception.segmentation_layer import perform_segmentation, encode_and_match
-from Execution.client_script import generate_instructions, send_command_to_robot
-from Mapping.image_to_robo_mapping import load_robot_coord_mapping, find_closest_gripper_point
+from Planning.gpt_functions import generate_task_details, plan_task_structured, stream_instructions, get_backend
+from Planning.async_planner import extract_task_features_and_objects
+from Planning.template_planner import plan_pick_and_place, fill_command_template
+from Perception.segmentation_layer import perform_segmentation, encode_and_match, get_segmentation_session, scene_cache
+from Execution.client_script import generate_instructions, stream_commands_to_robot, PlanStreamError, get_robot_connection, robot_connection_metrics, send_plan_to_robot, RobotCommandError
+from Mapping.image_to_robo_mapping import load_pose_mapping, as_gripper_mapping
+from Perception import debug_writer
+from Perception.debug_writer import get_debug_writer
 
 # --- Configuration ---
 PRIMARY_IP   = 'XXXX'
 PRIMARY_PORT = 'XXXX'
 
+# One structured GPT call (objects + command template) instead of separate extraction and generation calls
+STRUCTURED_PLANNING = os.environ.get("FYP_STRUCTURED_PLANNING", "0") == "1"
+
+# Send each GPT-planned command as soon as its line has been generated, instead of after the whole reply
+STREAM_PLANNING = os.environ.get("FYP_STREAM_PLANNING", "0") == "1"
+
 # --- Helpers ---
 def get_device():
     if torch.cuda.is_available():
@@ -24,38 +34,49 @@ def get_device():
     else:
         return torch.device("cpu")
 
-def plan_and_execute(task_description: str, task_objects: list, mapping: dict) -> bool:
+def plan_commands(task_description: str, task_objects: list, mapping, stream: bool = False,
+                  command_template: list = None):
     """
-    Segment the scene, match task_objects, generate instructions via GPT,
-    and send them to the primary robot. Returns True on success.
+    Segment the scene, match task_objects and plan the primary robot's
+    commands: from command_template (plan_task_structured()) if given, else
+    locally for plain pick-and-place tasks, else via GPT.
+
+    Returns the command list, or None on failure. With stream=True and a
+    GPT plan, returns the stream_instructions() generator instead so the
+    caller can send each line as soon as it is generated.
     """
     print("\n[Primary] Capturing scene and segmenting…")
     original, cropped = perform_segmentation()
     if not cropped:
         print("[Primary] No objects segmented.")
-        return False
+        return None
 
     cropped_images, centers = zip(*cropped)
     device = get_device()
     best_idxs = encode_and_match(cropped_images, task_objects, device)
-    if not best_idxs or len(best_idxs) != len(task_objects):
+    if not best_idxs or len(best_idxs) != len(task_objects) or None in best_idxs:
         print("[Primary] CLIP matching failed.")
-        return False
+        return None
+
+    # Map all matched centres to 6D poses in one batched lookup
+    poses = as_gripper_mapping(mapping).query([centers[idx] for idx in best_idxs])
 
     objects_dict = {}
-    for obj, idx in zip(task_objects, best_idxs):
+    for obj, idx, gripper in zip(task_objects, best_idxs, poses):
         img_center = centers[idx]
-        gripper = find_closest_gripper_point(img_center, mapping)
         objects_dict[obj] = {
             "position": tuple(gripper[:3]),
             "orientation": tuple(gripper[3:6])
         }
         # visualize for verification
-        plt.figure(figsize=(4, 4))
-        plt.imshow(cropped_images[idx])
-        plt.title(f"{obj} @ {img_center}")
-        plt.axis("off")
-        plt.show()
+        if debug_writer.HEADLESS:
+            get_debug_writer().submit(f"match_{obj.replace(' ', '_')}", cropped_images[idx])
+        else:
+            plt.figure(figsize=(4, 4))
+            plt.imshow(cropped_images[idx])
+            plt.title(f"{obj} @ {img_center}")
+            plt.axis("off")
+            plt.show()
 
     # add bin (fixed location for placing objects)
     objects_dict["Green Bin"] = {
@@ -70,15 +91,59 @@ def plan_and_execute(task_description: str, task_objects: list, mapping: dict) -
     # build task details and generate instructions
     details = generate_task_details(task_description, objects_dict)
     print("\n[Primary] Task details:\n", details)
-    instrs = generate_instructions(details)
+
+    # Plain pick-and-place tasks are planned locally; anything else goes to GPT
+    if command_template:
+        try:
+            instrs = fill_command_template(command_template, objects_dict)
+        except KeyError as e:
+            print(f"[Primary] Command template refers to an undetected object: {e}")
+            return None
+        print("[Primary] Filled structured command template.")
+    elif (instrs := plan_pick_and_place(task_description, objects_dict)) is not None:
+        print("[Primary] Planned locally from template.")
+    elif stream:
+        return stream_instructions(details)
+    else:
+        try:
+            instrs = generate_instructions(details)
+        except ValueError as e:
+            print(f"[Primary] GPT plan rejected: {e}")
+            return None
+    return instrs
+
+def plan_and_execute(task_description: str, task_objects: list, mapping, stream: bool = False,
+                     command_template: list = None) -> bool:
+    """
+    Segment the scene, match task_objects, generate instructions via GPT,
+    and send them to the primary robot. Returns True on success.
+
+    With stream=True each command is sent as soon as GPT has finished
+    generating its line, instead of after the whole completion. A
+    command_template from plan_task_structured() is filled with the
+    detected poses instead of asking GPT again.
+    """
+    instrs = plan_commands(task_description, task_objects, mapping, stream, command_template)
+    if instrs is None:
+        return False
+    if not isinstance(instrs, list):
+        print("\n[Primary] Streaming commands…")
+        sock = get_robot_connection(PRIMARY_IP, PRIMARY_PORT, "Primary")
+        try:
+            sent = stream_commands_to_robot(sock, instrs)
+        except PlanStreamError as e:
+            print(f"[Primary] {e}")
+            return False
+        print(f"[Primary] Sent {sent} streamed commands.")
+        return True
     print(f"\n[Primary] Sending {len(instrs)} commands…")
 
-    # send to primary robot
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.connect((PRIMARY_IP, PRIMARY_PORT))
-        for cmd in instrs:
-            send_command_to_robot(sock, cmd)
-            time.sleep(1)
+    # send to primary robot over its shared connection (pipelined if it speaks the framed protocol)
+    try:
+        send_plan_to_robot(get_robot_connection(PRIMARY_IP, PRIMARY_PORT, "Primary"), instrs)
+    except (ValueError, RobotCommandError, ConnectionError) as e:
+        print(f"[Primary] Plan not completed: {e}")
+        return False
 
     return True
 
@@ -92,19 +157,29 @@ def test_1_robot():
     #     return False
 
     # Load the gripper-coordinate mapping only once
-    mapping = load_robot_coord_mapping()
+    mapping = load_pose_mapping()
     if not mapping:
         print("Failed to load robot coord mapping. Exiting.")
         return False
 
+    # Load SAM2 once up front; every perform_segmentation() call reuses it
+    get_segmentation_session().load()
+
     # 1) Task description, features, objects
     task_desc = input("Enter your task description: ")
-    features = extract_task_features(task_desc)
-    print("Extracted features:", features)
+    command_template = None
+    if STRUCTURED_PLANNING:
+        plan = plan_task_structured(task_desc)
+        if plan is None:
+            print("Structured planning failed. Exiting.")
+            return False
+        print("Structured plan:", plan)
+        task_objs, command_template = plan["objects"], plan["commands"]
+    else:
+        # Features and objects are fetched concurrently in one round trip
+        features, task_objs = extract_task_features_and_objects(task_desc)
+        print("Extracted features:", features)
 
-    task_objs = extract_task_objects(task_desc)
-    # Remove any mention of 'bin' from the object list
-    task_objs = extract_task_objects(task_desc)
     # Remove any object whose name contains 'bin' (e.g. "Green Bin", "Blue Bin")
     task_objs = [o for o in task_objs if "bin" not in o.strip().lower()]
 
@@ -112,14 +187,31 @@ def test_1_robot():
         print("No objects to handle. Exiting.")
         return False
 
+    if debug_writer.HEADLESS:
+        get_debug_writer().start_task("single_robot")
+
     # 2) Single execution (no verification loop), passing preloaded mapping
-    success = plan_and_execute(task_desc, task_objs, mapping)
+    success = plan_and_execute(task_desc, task_objs, mapping, stream=STREAM_PLANNING,
+                               command_template=command_template)
     if success:
         print("\n Task executed successfully!")
     else:
         print("\n Task execution failed.")
 
+    print(f"[Primary] Segmentation latency: {get_segmentation_session().stats()}")
+    print(f"[Primary] Scene cache: {scene_cache.stats()}")
+    print(f"[Primary] Robot connections: {robot_connection_metrics()}")
+    if debug_writer.HEADLESS:
+        get_debug_writer().flush()
+        print(f"[Primary] Debug artifacts: {get_debug_writer().stats()}")
     return success
 
 if __name__ == "__main__":
+    start = time.perf_counter()
     test_1_robot()
+    elapsed = time.perf_counter() - start
+    llm = get_backend().stats()
+    print(f"[Primary] Cycle time: {elapsed:.2f} s, LLM wait: {llm['wait_time']:.2f} s "
+          f"({100 * llm['wait_time'] / elapsed:.0f}%) over {llm['calls']} {llm['backend']} calls")
+    print(f"[Primary] LLM tokens: {llm['prompt_tokens']} prompt + {llm['completion_tokens']} completion "
+          f"(~${llm['cost_usd']:.4f})")
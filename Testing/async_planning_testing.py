@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import time
+import asyncio
+
+from Planning.gpt_functions import extract_task_features, extract_task_objects
+from Planning.async_planner import extract_task_features_and_objects, AsyncPlanningClient
+from Planning.gpt_functions import set_backend
+from Planning.llm_backends import HTTPBackend
+from Planning.mock_llm_server import MockLLMServer
+
+LATENCY = 1.0   # seconds per simulated GPT round trip (the reply cache is bypassed so every call is a real one)
+TASK    = "Pick up the red block and the apple and place them in the Green Bin."
+
+def main():
+    with MockLLMServer(latency=LATENCY) as server:
+        set_backend(HTTPBackend(server.url))
+
+        # 1) Old task entry: features, then objects twice, one after another
+        t0 = time.perf_counter()
+        features = extract_task_features(TASK, use_cache=False)
+        objects = extract_task_objects(TASK, use_cache=False)
+        objects = extract_task_objects(TASK, use_cache=False)
+        sequential = time.perf_counter() - t0
+        print(f"Sequential: {sequential:.2f} s ({server.requests} requests) -> {objects}")
+
+        # 2) Concurrent task entry
+        server.requests = 0
+        t0 = time.perf_counter()
+        features, objects = extract_task_features_and_objects(TASK, use_cache=False)
+        concurrent = time.perf_counter() - t0
+        print(f"Concurrent: {concurrent:.2f} s ({server.requests} requests) -> {objects}")
+
+        print(f"Speed-up: {sequential / concurrent:.1f}x (one round trip = {LATENCY:.1f} s)")
+
+        # 3) In-flight dedup: identical prompts sent at the same time share one backend call
+        server.requests = 0
+        client = AsyncPlanningClient(use_cache=False)
+
+        async def same_prompt_five_times():
+            return await asyncio.gather(*(client.extract_task_objects(TASK) for _ in range(5)))
+
+        replies = asyncio.run(same_prompt_five_times())
+        ok = server.requests == 1 and client.requests_sent == 1 and all(r == replies[0] for r in replies)
+        print(f"Dedup: 5 identical concurrent prompts -> {server.requests} backend call(s), "
+              f"{client.requests_deduplicated} deduplicated: {'PASS' if ok else 'FAIL'}")
+
+if __name__ == "__main__":
+    main()
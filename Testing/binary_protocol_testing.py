@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import math
+import time
+
+from Execution.client_script import (RobotConnection, send_plan_to_robot, PROTOCOL_FRAMED, PROTOCOL_BINARY)
+from Execution.command_parser import parse_command
+from Execution.robot_stand_in import RobotStandIn
+from Execution.wire_format import FrameDecoder, encode_frame
+
+PLAN = ["move(81.3,-310.6,100,74.31,0.13,-5.22)", "pick_up(81.3,-310.6,100)",
+        "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)"]
+
+# A dense waypoint sequence: a 2000-point arc over the table, as a trajectory streamer would send it
+WAYPOINTS = [
+    f"move({150 * math.cos(t / 400):.3f},{-250 + 60 * math.sin(t / 400):.3f},{100 + t / 100:.3f},90,0,{t % 90:.2f})"
+    for t in range(2000)
+]
+REPEATS = 20
+
+
+def connect(robot, protocol, **kwargs):
+    conn = RobotConnection(robot.host, robot.port, name=protocol, protocol=protocol, **kwargs)
+    conn.connect()
+    return conn
+
+
+def text_frames(commands):
+    return [f"{seq} {cmd}\n".encode("utf-8") for seq, cmd in enumerate(commands, start=1)]
+
+
+def binary_frames(commands, float64=False):
+    frames = []
+    for seq, cmd in enumerate(commands, start=1):
+        parsed = parse_command(cmd)
+        frames.append(encode_frame(seq, parsed.VERB, parsed.values(), float64))
+    return frames
+
+
+def main():
+    # 1) Negotiation and round trip: the robot decodes exactly the plan that was sent
+    for float64 in (False, True):
+        with RobotStandIn(completion=True) as robot:
+            conn = connect(robot, PROTOCOL_BINARY, float64=float64)
+            send_plan_to_robot(conn, PLAN + ["move(0.125,-1,2,3,4,5)"])
+            ok = conn.binary and robot.received == PLAN + ["move(0.125,-1,2,3,4,5)"]
+            print(f"1) Binary ({'float64' if float64 else 'float32'}) round trip: {'PASS' if ok else 'FAIL'}")
+            conn.close()
+
+    # 2) Fallback: a framed-only robot gets framed text, a legacy robot the line protocol
+    with RobotStandIn(binary=False) as framed_only, RobotStandIn(framed=False) as legacy:
+        a, b = connect(framed_only, PROTOCOL_BINARY), connect(legacy, PROTOCOL_BINARY)
+        ok = (a.metrics()["protocol"], b.metrics()["protocol"]) == ("framed", "line")
+        print(f"2) Fallback to framed text / line: {'PASS' if ok else 'FAIL'}")
+        a.close()
+        b.close()
+
+    # 3) A corrupt frame is refused by the reference decoder without losing the stream: a good
+    #    frame in the same segment is still answered straight away
+    with RobotStandIn() as robot:
+        conn = connect(robot, PROTOCOL_BINARY)
+        bad = bytearray(encode_frame(1000, "home"))
+        bad[2] = 9   # version byte
+        conn._sock.sendall(bytes(bad) + encode_frame(1001, "bins"))
+        conn._sock.settimeout(2.0)
+        replies = [conn._readline(), conn._readline()]
+        conn._sock.settimeout(conn.io_timeout)
+        ok = replies[0].startswith("ERR 0") and replies[1] == "DONE 1001" and robot.received == ["bins"]
+        print(f"3) Corrupt frame then good frame in one segment: {replies}: {'PASS' if ok else 'FAIL'}; "
+              f"next command: {conn.exchange('home')}")
+        conn.close()
+
+    # 4) Dense waypoints: bytes on the wire and robot-side decode cost
+    text = text_frames(WAYPOINTS)
+    packed32 = binary_frames(WAYPOINTS)
+    packed64 = binary_frames(WAYPOINTS, float64=True)
+    for name, frames in (("text", text), ("binary float32", packed32), ("binary float64", packed64)):
+        print(f"4) {name:15s} {sum(map(len, frames)) / len(frames):5.1f} bytes/command")
+
+    stream = b"".join(text)
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        for line in stream.split(b"\n")[:-1]:
+            parse_command(line.decode("utf-8").partition(" ")[2])
+    text_us = (time.perf_counter() - t0) / (REPEATS * len(WAYPOINTS)) * 1e6
+    stream = b"".join(packed32)
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        decoder = FrameDecoder()
+        for i in range(0, len(stream), 4096):   # arrives in recv()-sized chunks
+            decoder.feed(stream[i:i + 4096])
+    binary_us = (time.perf_counter() - t0) / (REPEATS * len(WAYPOINTS)) * 1e6
+    print(f"4) Robot-side decode: text parse {text_us:.2f} us/command, binary {binary_us:.2f} us/command "
+          f"({text_us / binary_us:.1f}x)")
+
+    # 5) Dense waypoints end to end through the stand-in, framed text vs binary
+    for protocol in (PROTOCOL_FRAMED, PROTOCOL_BINARY):
+        with RobotStandIn() as robot:
+            conn = connect(robot, protocol, window=32)
+            t0 = time.perf_counter()
+            send_plan_to_robot(conn, WAYPOINTS, delay=0)
+            elapsed = time.perf_counter() - t0
+            ok = len(robot.received) == len(WAYPOINTS)
+            print(f"5) {conn.metrics()['protocol']:7s} {len(WAYPOINTS)} waypoints in {elapsed:.2f} s "
+                  f"({1e6 * elapsed / len(WAYPOINTS):.0f} us/waypoint), all received: {'PASS' if ok else 'FAIL'}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from Perception.camera_service import CameraService, ImageFileSource, get_camera_service, open_source
+
+# CameraService without a camera: frames come from still images on disk through ImageFileSource,
+# as when replaying a recorded scene. Checks warm-up skipping, latest(), wait_for_fresh() and a
+# non-looping source running dry.
+
+FPS = 100.0
+WARMUP = 3
+
+
+def write_frames(directory, count=3):
+    """Writes `count` small images, each filled with its own index, and returns their paths."""
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"frame_{i}.png")
+        cv2.imwrite(path, np.full((48, 64, 3), i * 40, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_frames(directory)
+
+        # 1) open_source() picks ImageFileSource for an image path or a list of them
+        for source in (paths[0], paths):
+            cap = open_source(source)
+            print(f"1) open_source({type(source).__name__}) -> {type(cap).__name__}, {len(cap.frames)} frame(s)")
+            assert isinstance(cap, ImageFileSource) and cap.isOpened()
+            cap.release()
+
+        # 2) Looping source: warm-up frames are dropped, then frames keep arriving
+        source = ImageFileSource(paths, fps=FPS)
+        with CameraService(source, warmup_frames=WARMUP) as camera:
+            t_start = time.time()
+            stamp, frame = camera.wait_for_fresh(after=t_start, timeout=2.0)
+            # Frames replay in order, so the first one kept is the one after the warm-up
+            assert frame.shape == (48, 64, 3) and frame[0, 0, 0] == (WARMUP % len(paths)) * 40
+            stamp2, _ = camera.wait_for_fresh(after=stamp, timeout=2.0)
+            assert stamp2 > stamp
+            print(f"2) first frame after warm-up has value {frame[0, 0, 0]}, "
+                  f"{camera.frames_grabbed} frames grabbed, {camera.read_failures} read failures")
+        assert not source.isOpened()
+
+        # 3) Non-looping source: once the images run out reads fail and wait_for_fresh() times out
+        source = ImageFileSource(paths, fps=FPS, loop=False)
+        camera = CameraService(source, warmup_frames=0).start()
+        try:
+            stamp, _ = camera.wait_for_fresh(after=0, timeout=2.0)
+            time.sleep(5 / FPS)
+            camera.wait_for_fresh(after=time.time(), timeout=0.2)
+            print("3) FAIL: a fresh frame arrived after the source ran out")
+        except TimeoutError:
+            print(f"3) PASS: {camera.frames_grabbed} frames then read failures ({camera.read_failures}), "
+                  f"latest() still returns the last frame: {camera.latest()[0] is not None}")
+        finally:
+            camera.stop()
+
+        # 4) get_camera_service() takes a list of image paths and shares one service per list
+        camera = get_camera_service(paths)
+        try:
+            shared = get_camera_service(list(paths)) is camera
+            camera.wait_for_fresh(timeout=2.0)
+            print(f"4) {'PASS' if shared else 'FAIL'}: list source started once and shared")
+        finally:
+            camera.stop()
+
+
+if __name__ == "__main__":
+    main()
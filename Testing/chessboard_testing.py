@@ -9,11 +9,11 @@ from scipy.spatial import KDTree
 
 # ─── Imports ───────────────────────────────────────────────────────────────────
 from Mapping.image_to_robo_mapping import load_robot_coord_mapping
-from Execution.client_script import send_command_to_robot
+from Execution.client_script import RobotConnection, PROTOCOL_FRAMED, execute_command
 
 HOST         = "XXXX"   # <— replace with your Robot 1’s IP
 PORT         = "XXXX"             # <— replace with the correct TCP port
-DELAY        = 10              # seconds between commands (increase if too fast)
+DELAY        = 10              # fallback wait per command if the robot does not report DONE
 
 def main():
     # 1) Load the 12‐point image→6D mapping dictionary
@@ -32,7 +32,8 @@ def main():
 
     # 2) Open a TCP connection to Robot 1
     try:
-        sock = socket.create_connection((HOST, PORT), timeout=5)
+        sock = RobotConnection(HOST, PORT, name="Robot 1", connect_timeout=5, protocol=PROTOCOL_FRAMED)
+        sock.connect()
     except Exception as e:
         print(f"Error: Could not connect to {HOST}:{PORT} → {e}")
         return
@@ -51,14 +52,13 @@ def main():
 
         print(f"[{idx}/12] Image‐pixel = ({x_img:.1f}, {y_img:.1f}) → 6D = {gripper_pose}")
         print(f"        Sending command: {cmd}")
+        # Returns when the robot reports the motion DONE (or after DELAY if it cannot)
         try:
-            send_command_to_robot(sock, cmd)
+            execute_command(sock, cmd, fallback_delay=DELAY)
         except Exception as e:
             print(f"        Error sending command: {e}")
 
-        # Wait a bit so you can physically observe each motion
-        time.sleep(DELAY)
-
+    print(f"Measured motion times: {sock.motion_stats()}")
     sock.close()
     print("All 12 commands sent. Done.")
 
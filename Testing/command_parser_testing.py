@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import time
+
+from Execution.client_script import clean_command, send_plan_to_robot, RobotConnection, PROTOCOL_FRAMED
+from Execution.command_parser import parse_command, parse_plan, serialize_plan, CommandParseError
+from Execution.robot_stand_in import RobotStandIn
+from Testing.prompt_testing import tight_prompt_list, free_prompt_list
+
+# Typed parser vs the regex clean_command() path on the prompt_testing corpus:
+# agreement on good plans, which bad plans each one lets through, and time per line.
+
+REPEATS = 2000
+
+# Plans the regex path accepts but that must never reach the robot
+BAD_PLANS = {
+    "move with five values":   ["move(1,2,3,4,5)", "pick_up(1,2,3)"],
+    "pick_up without a move":  ["pick_up(1,2,3)", "move(7,8,9,10,11,12)", "place(7,8,9)"],
+    "place without a pick_up": ["move(7,8,9,10,11,12)", "place(7,8,9)"],
+    "non-numeric argument":    ["move(1,2,3,4,5,six)", "pick_up(1,2,3)"],
+    "out of range":            ["move(1,2,3000,4,5,6)", "pick_up(1,2,3000)"],
+    "truncated stream line":   ["move(7,8"],
+}
+
+# Number spellings a model may print, and the values they must parse to
+NUMBER_SPELLINGS = {"5": 5.0, "+5": 5.0, "5.": 5.0, ".5": 0.5, "-.5": -0.5, "1e-3": 0.001, "2.5E+2": 250.0}
+
+
+def numbered(plan):
+    """The corpus as a chatty model would print it: numbered lines with loose spacing."""
+    return [f"{i}.  {cmd.replace(',', ', ').replace('(', '( ')}" for i, cmd in enumerate(plan, start=1)]
+
+
+def regex_path(plan):
+    return [clean_command(cmd) for cmd in plan]
+
+
+def parser_path(plan):
+    return serialize_plan(parse_plan(plan))
+
+
+def time_per_line(path, plans):
+    lines = sum(len(plan) for plan in plans)
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        for plan in plans:
+            try:
+                path(plan)
+            except ValueError:
+                pass
+    return (time.perf_counter() - t0) / (REPEATS * lines) * 1e6
+
+
+def main():
+    corpus = [expected for _, _, expected in tight_prompt_list + free_prompt_list]
+    corpus += [numbered(plan) for plan in corpus]
+
+    # 1) Agreement and round trip on the corpus
+    agree = rejected = 0
+    for plan in corpus:
+        try:
+            parsed = parser_path(plan)
+        except CommandParseError as e:
+            rejected += 1
+            print(f"  rejected: {e}")
+            continue
+        agree += parsed == regex_path(plan)
+        assert all(parse_command(str(parse_command(cmd))) == parse_command(cmd) for cmd in plan)
+    print(f"1) {agree}/{len(corpus)} plans identical to clean_command(), {rejected} rejected by the plan check")
+
+    # 2) Bad plans: the regex path lets them through, the parser stops them
+    for name, plan in BAD_PLANS.items():
+        try:
+            regex_path(plan)
+            regex = "accepted"
+        except ValueError:
+            regex = "rejected"
+        try:
+            parser_path(plan)
+            parser = "accepted"
+        except CommandParseError as e:
+            parser = f"rejected ({e})"
+        print(f"2) {name:24s} regex {regex}, parser {parser}")
+
+    # 3) Speed
+    regex_us = time_per_line(regex_path, corpus)
+    parse_us = time_per_line(parse_plan, corpus)
+    parser_us = time_per_line(parser_path, corpus)
+    print(f"3) regex {regex_us:.2f} us/line, typed parse + plan check {parse_us:.2f} us/line "
+          f"({regex_us / parse_us:.1f}x), + serialize {parser_us:.2f} us/line ({regex_us / parser_us:.1f}x)")
+
+    # 4) Number spellings: parsed to the same value as float(), not rejected
+    for text, value in NUMBER_SPELLINGS.items():
+        command = parse_command(f"pick_up({text}, 0, 0)")
+        assert command.x == value, (text, command)
+    print(f"4) {len(NUMBER_SPELLINGS)} number spellings parsed: {', '.join(NUMBER_SPELLINGS)}")
+
+    # 5) A bad plan never reaches the socket
+    with RobotStandIn(completion=True) as robot:
+        conn = RobotConnection(robot.host, robot.port, name="Parser", protocol=PROTOCOL_FRAMED)
+        try:
+            send_plan_to_robot(conn, BAD_PLANS["pick_up without a move"])
+        except ValueError as e:
+            print(f"5) send_plan_to_robot refused: {e}")
+        conn.close()
+        print(f"5) Commands received by the robot: {len(robot.received)}, connections: {robot.connections}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+import time
+
+from Execution.client_script import (RobotConnection, RobotCommandError, send_plan_to_robot,
+                                     PROTOCOL_LINE, PROTOCOL_FRAMED)
+from Execution.robot_stand_in import RobotStandIn
+
+DELAY = 1.0   # fixed pause between commands in line mode, as in plan_and_execute
+PLAN  = ["move(81.3,-310.6,100,74.31,0.13,-5.22)", "pick_up(81.3,-310.6,100)",
+         "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)",
+         "move(40.8,-298.7,99.5,89.14,0.21,1.49)", "pick_up(40.8,-298.7,99.5)",
+         "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)"]
+
+def timed_plan(robot, protocol, delay=DELAY):
+    conn = RobotConnection(robot.host, robot.port, name=protocol, protocol=protocol)
+    t0 = time.perf_counter()
+    send_plan_to_robot(conn, PLAN, delay=delay)
+    elapsed = time.perf_counter() - t0
+    framed = conn.framed
+    conn.close()
+    return elapsed, framed
+
+def main():
+    with RobotStandIn(completion=True) as robot:
+        # 1) Line protocol (ack + fixed delay) vs framed protocol (windowed acks, DONE per motion)
+        line, _ = timed_plan(robot, PROTOCOL_LINE)
+        framed, used_framed = timed_plan(robot, PROTOCOL_FRAMED)
+        print(f"1) Line: {line:.2f} s, framed: {framed:.3f} s for {len(PLAN)} commands "
+              f"({1000 * framed / len(PLAN):.2f} ms/command, framed = {used_framed})")
+        ok = robot.received[-len(PLAN):] == PLAN
+        print(f"   Robot received the plan in order: {'PASS' if ok else 'FAIL'}")
+
+    # 2) A legacy controller that only speaks line mode: negotiation falls back
+    with RobotStandIn(framed=False) as legacy:
+        _, used_framed = timed_plan(legacy, PROTOCOL_FRAMED, delay=0)
+        print(f"2) Legacy robot fallback to line protocol: {'PASS' if not used_framed else 'FAIL'}")
+
+    # 3) The robot rejects a command: the plan stops with RobotCommandError
+    with RobotStandIn(reject=("pick_up(40.8",)) as strict:
+        conn = RobotConnection(strict.host, strict.port, name="Strict", protocol=PROTOCOL_FRAMED, window=2)
+        try:
+            send_plan_to_robot(conn, PLAN)
+            print("3) FAIL: rejected command not reported")
+        except RobotCommandError as e:
+            print(f"3) {e}; robot saw {len(strict.received)} of {len(PLAN)} commands")
+        conn.close()
+
+    # 4) An invalid command is caught before anything is sent
+    with RobotStandIn() as robot:
+        conn = RobotConnection(robot.host, robot.port, name="Check", protocol=PROTOCOL_FRAMED)
+        try:
+            send_plan_to_robot(conn, PLAN[:2] + ["wave()"])
+            print("4) FAIL: invalid command sent")
+        except ValueError as e:
+            print(f"4) {e}; robot saw {len(robot.received)} commands")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 import sys
 import os
-import socket
 import cv2
 import numpy as np
 from scipy.spatial import KDTree
 
 
 from Mapping.image_to_robo_mapping import load_robot_coord_mapping, find_closest_gripper_point
-from Execution.client_script import send_command_to_robot
+from Execution.client_script import RobotConnection, execute_command
 
 CAMERA_INDEX = "XXXX"                    # OpenCV camera index (e.g., 0 or 1)
 HOST         = "XXXX"      # Robot 1 IP address (example)
@@ -62,10 +61,11 @@ def main():
     img_pts = np.array(list(point_mapping.keys()), dtype=np.float32)
     kd_tree = KDTree(img_pts)
 
-    # 3) Open TCP connection to Robot 1
+    # 3) Open the connection to Robot 1
+    conn = RobotConnection(HOST, PORT, name="Robot 1")
     try:
-        sock = socket.create_connection((HOST, PORT), timeout=5)
-    except Exception as e:
+        conn.connect()
+    except ConnectionError as e:
         print(f"Error: Could not connect to {HOST}:{PORT} -> {e}")
         return
 
@@ -84,9 +84,10 @@ def main():
         cmd = f"move({x:.2f},{y:.2f},{z:.2f},{pitch:.2f},{roll:.2f},{yaw:.2f})"
         print(f"\n[{idx}/{len(clicked_points)}] Sending command: {cmd}")
 
-        # Send the command
+        # Send the command and wait until the arm has finished moving
         try:
-            send_command_to_robot(sock, cmd)
+            reply = execute_command(conn, cmd)
+            print(f"  Received: {reply}")
         except Exception as e:
             print(f"  ERROR: Failed to send '{cmd}': {e}")
 
@@ -102,7 +103,7 @@ def main():
         measured_errors.append(error_val)
         print(f"Recorded error for pose {idx}: {error_val}\n")
 
-    sock.close()
+    conn.close()
     print("All commands sent and measurements recorded. Computing RMSE...")
 
     # 5) Compute RMSE
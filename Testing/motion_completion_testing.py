@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import time
+
+from Execution import client_script
+from Execution.client_script import (RobotConnection, MotionTimeoutError, send_plan_to_robot, execute_command,
+                                     PROTOCOL_LINE, PROTOCOL_FRAMED)
+from Execution.robot_stand_in import RobotStandIn
+
+DELAY   = 1.0   # the old fixed sleep per command
+MOTIONS = {"move": 0.4, "pick_up": 0.15, "place": 0.15, "home": 0.5, "bins": 0.5}   # simulated seconds
+PLAN    = ["move(81.3,-310.6,100,74.31,0.13,-5.22)", "pick_up(81.3,-310.6,100)",
+           "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)"]
+
+def main():
+    expected = sum(MOTIONS[client_script.command_verb(c)] for c in PLAN)
+
+    # 1) Fixed sleeps (line protocol) vs waiting on DONE <id>
+    with RobotStandIn(motion_time=MOTIONS, completion=True) as robot:
+        line = RobotConnection(robot.host, robot.port, name="Line", protocol=PROTOCOL_LINE)
+        t0 = time.perf_counter()
+        send_plan_to_robot(line, PLAN, delay=DELAY)
+        fixed = time.perf_counter() - t0
+        line.close()
+
+        conn = RobotConnection(robot.host, robot.port, name="Done", protocol=PROTOCOL_FRAMED)
+        t0 = time.perf_counter()
+        send_plan_to_robot(conn, PLAN, delay=DELAY)
+        driven = time.perf_counter() - t0
+        print(f"1) Fixed sleeps: {fixed:.2f} s, completion-driven: {driven:.2f} s "
+              f"(robot motions take {expected:.2f} s)")
+
+        # 2) Vision-style command waits for its own DONE
+        t0 = time.perf_counter()
+        reply = execute_command(conn, "home")
+        print(f"2) home -> {reply} after {time.perf_counter() - t0:.2f} s")
+        print(f"   Measured motions: {conn.motion_stats()}")
+        conn.close()
+
+    # 3) A motion that overruns its timeout
+    with RobotStandIn(motion_time={"move": 0.5}, completion=True) as slow:
+        conn = RobotConnection(slow.host, slow.port, name="Slow", protocol=PROTOCOL_FRAMED,
+                               motion_timeouts={"move": 0.2})
+        try:
+            send_plan_to_robot(conn, PLAN[:1])
+            print("3) FAIL: timeout not detected")
+        except MotionTimeoutError as e:
+            print(f"3) {e}")
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    main()
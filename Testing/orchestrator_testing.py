@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import time
+
+from Execution.client_script import RobotConnection, RobotCommandError, execute_command, PROTOCOL_FRAMED
+from Execution.robot_stand_in import RobotStandIn
+from DoubleRobotSystem.orchestrator import DualRobotOrchestrator, run_cycle, ZONE_BINS, ZONE_TABLE
+
+# Simulated durations (seconds)
+WORKER_MOTIONS = {"move": 0.6, "pick_up": 0.3, "place": 0.3}
+CAMERA_MOTIONS = {"home": 0.8, "bins": 0.8}
+CAPTURE        = 0.05
+SEGMENT        = 0.7
+
+BINS = [(172.8, -226.4, 107.4), (166.7, -273.3, 108.2)]
+PLAN = ["move(81.3,-310.6,100,74.31,0.13,-5.22)", "pick_up(81.3,-310.6,100)",
+        "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)",
+        "move(40.8,-298.7,99.5,89.14,0.21,1.49)", "pick_up(40.8,-298.7,99.5)",
+        "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)"]
+
+captures = []
+
+def capture():
+    time.sleep(CAPTURE)
+    captures.append(time.perf_counter())
+    return "frame"
+
+def segment(frame):
+    time.sleep(SEGMENT)
+    return {"frame": frame}
+
+def sequential(worker, vision):
+    """The current DualRobotSystem order: whole plan, then home + table, then bins + bin view."""
+    t0 = time.perf_counter()
+    for cmd in PLAN:
+        execute_command(worker, cmd)
+    execute_command(vision, "home")
+    segment(capture())
+    execute_command(vision, "bins")
+    segment(capture())
+    return time.perf_counter() - t0
+
+def main():
+    with RobotStandIn(motion_time=WORKER_MOTIONS, completion=True) as w, \
+         RobotStandIn(motion_time=CAMERA_MOTIONS, completion=True) as v:
+        worker = RobotConnection(w.host, w.port, name="Worker", protocol=PROTOCOL_FRAMED)
+        vision = RobotConnection(v.host, v.port, name="Vision", protocol=PROTOCOL_FRAMED)
+
+        before = sequential(worker, vision)
+        execute_command(vision, "home")
+
+        orchestrator = DualRobotOrchestrator(worker, vision, BINS, capture, segment, segment)
+        t0 = time.perf_counter()
+        run_cycle(orchestrator, PLAN)
+        after = time.perf_counter() - t0
+        print(f"\nSequential: {before:.2f} s, orchestrated: {after:.2f} s ({before - after:.2f} s saved)")
+
+        # Interlock check: the camera's bin-view spans never overlap the worker's bin-zone motions
+        spans = orchestrator.timeline.spans
+        worker_bins = [(s, e) for lane, label, s, e in spans if lane == "worker" and ZONE_BINS in label]
+        camera_bins = [(s, e) for lane, label, s, e in spans
+                       if lane == "camera" and label in ("move bins", "capture bins", "move home")]
+        clash = any(a < d and c < b for a, b in worker_bins for c, d in camera_bins)
+        print(f"Arms never share the bin zone: {'FAIL' if clash else 'PASS'}")
+
+        # The table is captured only once the motion that takes the worker out of the table zone is over
+        worker_spans = sorted((s, e, label) for lane, label, s, e in spans if lane == "worker")
+        last_table = max(i for i, (_, _, label) in enumerate(worker_spans) if ZONE_TABLE in label)
+        left_table = worker_spans[last_table + 1][1] if last_table + 1 < len(worker_spans) else worker_spans[-1][1]
+        capture_table = next(s for lane, label, s, _ in spans if label == "capture table")
+        print(f"Table captured after the worker left it: {'PASS' if capture_table >= left_table else 'FAIL'} "
+              f"(left {left_table:.2f} s, captured {capture_table:.2f} s)")
+
+        worker.close()
+        vision.close()
+
+    # A worker failure stops the cycle before the camera captures the half-done table
+    with RobotStandIn(motion_time=WORKER_MOTIONS, completion=True, reject=("40.8",)) as w, \
+         RobotStandIn(motion_time=CAMERA_MOTIONS, completion=True) as v:
+        worker = RobotConnection(w.host, w.port, name="Worker", protocol=PROTOCOL_FRAMED)
+        vision = RobotConnection(v.host, v.port, name="Vision", protocol=PROTOCOL_FRAMED)
+        captures.clear()
+        try:
+            run_cycle(DualRobotOrchestrator(worker, vision, BINS, capture, segment, segment), PLAN)
+            print("Worker failure stops the camera: FAIL (cycle completed)")
+        except RobotCommandError as e:
+            print(f"Worker failure stops the camera: {'FAIL' if captures else 'PASS'} ({e})")
+        worker.close()
+        vision.close()
+
+    # Without DONE events zones would be released on a timing guess, so concurrent mode is refused
+    with RobotStandIn(motion_time=WORKER_MOTIONS) as w, RobotStandIn(motion_time=CAMERA_MOTIONS) as v:
+        worker = RobotConnection(w.host, w.port, name="Worker")
+        vision = RobotConnection(v.host, v.port, name="Vision")
+        try:
+            run_cycle(DualRobotOrchestrator(worker, vision, BINS, capture, segment, segment), PLAN)
+            print("Line protocol refused: FAIL")
+        except RuntimeError as e:
+            print(f"Line protocol refused: {'PASS' if not w.received else 'FAIL'} ({e})")
+        worker.close()
+        vision.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import time
+
+from Execution.client_script import RobotConnection, stream_commands_to_robot, PlanStreamError, PROTOCOL_FRAMED
+from Execution.command_parser import parse_command
+from Execution.robot_stand_in import RobotStandIn
+from Planning.gpt_functions import generate_task_details, instructions_messages, set_backend, stream_instructions
+from Planning.llm_backends import MockBackend
+
+# Streamed planning against the stand-in: GPT's reply arrives in small chunks that split command
+# lines, each complete line is sent as soon as it exists, and the stream stops at the first failure.
+
+CHUNK = 7            # characters per streamed chunk, so most lines arrive in several pieces
+CHUNK_DELAY = 0.005
+MOTION_TIME = {"move": 0.05, "pick_up": 0.02, "place": 0.02}
+
+OBJECTS = {
+    "red block": {"position": (81.3, -310.6, 100.0), "orientation": (74.31, 0.13, -5.22)},
+    "green block": {"position": (40.8, -298.7, 99.5), "orientation": (89.14, 0.21, 1.49)},
+    "Green Bin": {"position": (172.8, -226.4, 107.4), "orientation": (93.9, -0.83, 47.41)},
+}
+DETAILS = generate_task_details("Put the red block and the green block in the green bin.", OBJECTS)
+
+
+class ChunkedBackend(MockBackend):
+    """Mock backend that streams its reply CHUNK characters at a time, optionally cut off after `limit`."""
+
+    def __init__(self, limit=None):
+        super().__init__()
+        self.limit = limit
+
+    def _stream(self, model, messages, **params):
+        reply = self.reply_for(messages)
+        if self.limit is not None:
+            reply = reply[:self.limit]
+        for i in range(0, len(reply), CHUNK):
+            time.sleep(CHUNK_DELAY)
+            yield reply[i:i + CHUNK], None
+        yield "", "length" if self.limit is not None else "stop"
+
+
+def run(robot, backend):
+    """Streams the plan for DETAILS to `robot`; returns (commands sent or the PlanStreamError, seconds)."""
+    set_backend(backend)
+    conn = RobotConnection(robot.host, robot.port, name="Stream", protocol=PROTOCOL_FRAMED)
+    t0 = time.perf_counter()
+    try:
+        result = stream_commands_to_robot(conn, stream_instructions(DETAILS, use_cache=False))
+    except PlanStreamError as e:
+        result = e
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return result, elapsed
+
+
+def main():
+    backend_reply = ChunkedBackend().reply_for(instructions_messages(DETAILS))
+    expected = [parse_command(line) for line in backend_reply.split("\n") if line.strip()]
+
+    # 1) Partial lines are reassembled: the robot gets exactly the planned commands, in order
+    with RobotStandIn(motion_time=MOTION_TIME, completion=True) as robot:
+        sent, elapsed = run(robot, ChunkedBackend())
+        ok = sent == len(expected) and list(map(parse_command, robot.received)) == expected
+        print(f"1) {'PASS' if ok else 'FAIL'}: {sent} commands streamed in {elapsed:.2f} s "
+              f"from {-(-len(backend_reply) // CHUNK)} chunks")
+
+    # 2) The robot rejects the second pick_up: the stream stops there and its place is never sent
+    with RobotStandIn(motion_time=MOTION_TIME, completion=True, reject=("pick_up(40.8",)) as robot:
+        result, _ = run(robot, ChunkedBackend())
+        ok = isinstance(result, PlanStreamError) and len(robot.received) == 6
+        print(f"2) {'PASS' if ok else 'FAIL'}: {len(robot.received)} commands reached the robot, {result}")
+
+    # 3) A reply cut off mid-line (finish_reason "length"): the partial command never reaches the robot
+    limit = len(backend_reply) - 10
+    with RobotStandIn(motion_time=MOTION_TIME, completion=True) as robot:
+        result, _ = run(robot, ChunkedBackend(limit=limit))
+        ok = isinstance(result, PlanStreamError) and len(robot.received) == len(expected) - 1
+        print(f"3) {'PASS' if ok else 'FAIL'}: {len(robot.received)} of {len(expected)} commands sent, {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,12 @@ import os
 import traceback
 
 
-from Planning.gpt_functions import extract_task_objects, generate_task_details
+from Planning.gpt_functions import extract_task_objects, generate_task_details, llm_cache
 from Execution.client_script import generate_instructions, clean_command
 
+# Cached replies would repeat earlier answers instead of measuring the model; opt in with FYP_EVAL_CACHE=1
+USE_CACHE = os.environ.get("FYP_EVAL_CACHE", "0") == "1"
+
 # Object 1: red block
 x_red_block, y_red_block, z_red_block = 1, 2, 3
 roll_red_block, pitch_red_block, yaw_red_block = 4, 5, 6
@@ -496,7 +499,7 @@ def evaluate_list(prompt_list, regime_name, model_name):
 
         # --- 1) Object extraction ---
         try:
-            extracted = extract_task_objects(prompt_text)
+            extracted = extract_task_objects(prompt_text, use_cache=USE_CACHE)
         except Exception:
             print("Error during extract_task_objects():")
             traceback.print_exc()
@@ -523,7 +526,7 @@ def evaluate_list(prompt_list, regime_name, model_name):
 
         try:
             # Now generate instructions with the chosen model_name
-            raw_cmds = generate_instructions(task_details, model_name)
+            raw_cmds = generate_instructions(task_details, model_name, use_cache=USE_CACHE)
         except Exception:
             print("Error during generate_instructions():")
             traceback.print_exc()
@@ -614,6 +617,8 @@ def main():
         print(f"  Overall object-extraction: {total_ext}/{total_prompts} = {total_ext/total_prompts:.2%}")
         print(f"  Overall move-generation:   {total_move}/{total_prompts} = {total_move/total_prompts:.2%}")
 
+    if USE_CACHE:
+        print(f"\nLLM cache: {llm_cache.stats()}")
     print("\nThank you for evaluating. Goodbye.")
 
 
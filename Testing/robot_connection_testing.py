@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+from Execution.client_script import RobotConnection, send_command_to_robot
+from Execution.robot_stand_in import RobotStandIn
+
+COMMANDS = ["move(81.3,-310.6,100,74.31,0.13,-5.22)", "pick_up(81.3,-310.6,100)",
+            "move(172.8,-226.4,107.4,93.9,-0.83,47.41)", "place(172.8,-226.4,107.4)"]
+
+def main():
+    with RobotStandIn(motion_time=0.05) as robot:
+        conn = RobotConnection(robot.host, robot.port, name="StandIn", backoff=0.05)
+
+        # 1) One connection reused for a whole plan and for vision moves
+        for cmd in COMMANDS:
+            send_command_to_robot(conn, cmd)
+        print("home ->", conn.exchange("home"))
+        print(f"1) {robot.connections} connection(s) for {len(robot.received)} commands")
+
+        # 2) Robot drops the link while idle: the next command reconnects transparently
+        robot.kick()
+        time.sleep(0.1)
+        send_command_to_robot(conn, COMMANDS[0])
+        print(f"2) After drop: {robot.connections} connection(s), reconnects = {conn.reconnects}")
+
+        # 3) Several threads sharing the connection never interleave their exchanges
+        replies = []
+        def worker(i):
+            replies.append(conn.exchange("bins" if i % 2 else COMMANDS[i % 4]))
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ok = replies.count("DONE") == 10 and replies.count("OK") == 10
+        print(f"3) Concurrent exchanges: {len(replies)} replies, {'PASS' if ok else 'FAIL'}")
+
+        print(f"Metrics: {conn.metrics()}")
+        conn.close()
+
+    # 4) Nothing listening: retries with backoff, then ConnectionError
+    dead = RobotConnection("127.0.0.1", robot.port, name="Dead", retries=3, backoff=0.05)
+    t0 = time.perf_counter()
+    try:
+        dead.exchange("home")
+        print("4) FAIL: connected to a closed port")
+    except ConnectionError as e:
+        print(f"4) {e} after {time.perf_counter() - t0:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,11 @@ import sys
 import os
 import socket
 import time
-from Execution.client_script import send_command_to_robot
+from Execution.client_script import RobotConnection, PROTOCOL_FRAMED, execute_command
 
 HOST      =  "XXXX"  # Replace with your Robot 1’s IP
 PORT      =  "XXXX"             # Replace with your Robot 1’s TCP port
-DELAY     = 1.5              # Seconds to wait between each move (increase if needed)
+DELAY     = 1.5              # Fallback wait per move if the robot does not report DONE
 TIMEOUT   = 5                # seconds for socket timeout
 
 fixed_poses = [
@@ -122,23 +122,24 @@ def format_move_command(pose):
 def main():
     print("Opening TCP connection to robot at {}:{} ...".format(HOST, PORT))
     try:
-        sock = socket.create_connection((HOST, PORT), timeout=TIMEOUT)
+        sock = RobotConnection(HOST, PORT, name="Robot 1", connect_timeout=TIMEOUT, protocol=PROTOCOL_FRAMED)
+        sock.connect()
     except Exception as e:
         print(f"ERROR: Unable to connect to {HOST}:{PORT} → {e}")
         return
 
-    print("Connected. Sending poses one by one with a delay of {}s.\n".format(DELAY))
+    print("Connected. Sending poses one by one, waiting for each move to finish.\n")
 
     for index, pose in enumerate(fixed_poses, start=1):
         cmd_str = format_move_command(pose)
         print(f"[{index}/{len(fixed_poses)}] Sending command: {cmd_str}")
+        # Returns on the robot’s “DONE”, or after DELAY if it does not report completion
         try:
-            send_command_to_robot(sock, cmd_str)
+            execute_command(sock, cmd_str, fallback_delay=DELAY)
         except Exception as e:
             print(f"  ERROR: Failed to send '{cmd_str}': {e}")
-        # Wait for the robot’s “DONE” (or simply to complete) before moving on:
-        time.sleep(DELAY)
 
+    print(f"Measured motion times: {sock.motion_stats()}")
     sock.close()
     print("\nAll {0} poses have been sent. Script complete.".format(len(fixed_poses)))
 
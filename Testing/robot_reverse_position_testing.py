@@ -4,12 +4,12 @@ import os
 import socket
 import time
 import json
-from Execution.client_script import send_command_to_robot
+from Execution.client_script import RobotConnection, PROTOCOL_FRAMED, execute_command
 
 # ─── Configuration ─────────────────────────────────────────────────────────────
 HOST          = "XXXX"     # Robot 1 IP address
 PORT          = "XXXX"               # Robot 1 TCP port
-DELAY_SECONDS = 5.0                # Seconds to wait between moves
+DELAY_SECONDS = 5.0                # Fallback wait per move if the robot does not report DONE
 MAPPING_JSON  = os.path.join("point_mapping.json")
 
 
@@ -29,7 +29,8 @@ def main():
 
     # 3) Connect to Robot 1 via TCP
     try:
-        sock = socket.create_connection((HOST, PORT), timeout=5)
+        sock = RobotConnection(HOST, PORT, name="Robot 1", connect_timeout=5, protocol=PROTOCOL_FRAMED)
+        sock.connect()
     except Exception as e:
         print(f"Error: Could not connect to {HOST}:{PORT} → {e}")
         return
@@ -44,14 +45,12 @@ def main():
         print(f"[{idx}/{total}] Key = {key} → 6D = {pose6d}")
         print(f"Sending command: {cmd}")
         try:
-            send_command_to_robot(sock, cmd)
+            execute_command(sock, cmd, fallback_delay=DELAY_SECONDS)
         except Exception as e:
             print(f"Error sending command for key {key}: {e}")
             break
 
-        print(f"Waiting for {DELAY_SECONDS} seconds before next move...")
-        time.sleep(DELAY_SECONDS)
-
+    print(f"Measured motion times: {sock.motion_stats()}")
     sock.close()
     print("Finished sending all reversed-point commands.")
 
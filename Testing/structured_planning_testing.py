@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import time
+
+from Planning.gpt_functions import (extract_task_features, extract_task_objects, generate_task_details,
+                                    generate_instructions, plan_task_structured)
+from Planning.template_planner import fill_command_template
+from Planning.gpt_functions import set_backend
+from Planning.llm_backends import HTTPBackend
+from Planning.mock_llm_server import MockLLMServer
+
+LATENCY = 1.0   # seconds per simulated GPT round trip
+TASK    = "Pick up the red block and the apple and place them in the Green Bin."
+
+# Poses "found by perception" for the test scene
+SCENE = {
+    "red block": {"position": (81.3, -310.6, 100.0), "orientation": (74.31, 0.13, -5.22)},
+    "apple": {"position": (40.8, -298.7, 99.5), "orientation": (89.14, 0.21, 1.49)},
+    "Green Bin": {"position": (172.8, -226.4, 107.4), "orientation": (93.9, -0.83, 47.41)},
+    "Blue Bin": {"position": (166.7, -273.3, 108.2), "orientation": (73.14, -1.83, 12.7)},
+}
+
+def main():
+    with MockLLMServer(latency=LATENCY) as server:
+        set_backend(HTTPBackend(server.url))
+
+        # 1) Current pipeline: features, objects (twice), then instructions
+        t0 = time.perf_counter()
+        extract_task_features(TASK, use_cache=False)
+        extract_task_objects(TASK, use_cache=False)
+        extract_task_objects(TASK, use_cache=False)
+        details = generate_task_details(TASK, SCENE)
+        before_cmds = generate_instructions(details, use_cache=False)
+        before = time.perf_counter() - t0
+        print(f"Before: {before:.2f} s over {server.requests} requests")
+
+        # 2) Single structured call, template filled after "perception"
+        server.requests = 0
+        t0 = time.perf_counter()
+        plan = plan_task_structured(TASK, use_cache=False)
+        after_cmds = fill_command_template(plan["commands"], SCENE)
+        after = time.perf_counter() - t0
+        print(f"After:  {after:.2f} s over {server.requests} request(s)")
+
+        print("\nStructured plan:", plan)
+        for before_cmd, after_cmd in zip(before_cmds, after_cmds):
+            print(f"    {before_cmd:45s} | {after_cmd}")
+
+if __name__ == "__main__":
+    main()
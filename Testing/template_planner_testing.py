@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import re
+import time
+
+from Planning.template_planner import plan_pick_and_place
+from Testing.prompt_testing import tight_prompt_list, free_prompt_list, test_scene_objects_dict
+
+# Conformance check for the local template planner against the prompt_testing corpus.
+# A prompt either matches the expected command list exactly or falls back to GPT (None);
+# a wrong plan is a failure.
+
+# plan_commands() always passes both bins. The corpus has a single "bin", so the green bin stands in
+# its place (the expected commands still apply) and the blue bin is at plan_commands()' pose.
+BINS = {
+    "Green Bin": test_scene_objects_dict["bin"],
+    "Blue Bin": {"position": (166.7, -273.3, 108.2), "orientation": (73.14, -1.83, 12.7)},
+}
+
+# Tasks that name an object without asking for it to be moved; the planner must leave them to GPT
+# rather than moving every object it sees mentioned
+NOT_PICK_AND_PLACE = [
+    "Put the red block in the green bin but leave the apple on the table.",
+    "Put the red block in the green bin, the apple stays.",
+    "Put the red block in the green bin. Do nothing with the apple.",
+    "Put the red block in the green bin and hand me the apple.",
+]
+
+def evaluate_list(prompt_list, regime_name):
+    passed = fallback = failed = 0
+    for idx, (prompt_text, expected_objects, expected_numeric_commands) in enumerate(prompt_list, start=1):
+        # As in plan_commands(): the task's objects plus both bins
+        objects = {name: test_scene_objects_dict[name] for name in expected_objects if "bin" not in name}
+        objects.update(BINS)
+        t0 = time.perf_counter()
+        commands = plan_pick_and_place(prompt_text, objects)
+        elapsed_us = (time.perf_counter() - t0) * 1e6
+
+        if commands is None:
+            fallback += 1
+            result = "FALLBACK"
+        elif commands == expected_numeric_commands:
+            passed += 1
+            result = "PASS"
+        else:
+            failed += 1
+            result = "FAIL"
+        print(f"[{regime_name} #{idx}] {result:8s} ({elapsed_us:.0f} us) {prompt_text}")
+        if result == "FAIL":
+            print("    expected:", expected_numeric_commands)
+            print("    got:     ", commands)
+    return passed, fallback, failed
+
+def name_the_bin(prompt_list):
+    """The corpus with "the bin" written as "the green bin", as a user would when both bins are on the table."""
+    return [(re.sub(r"\bthe bin\b", "the green bin", text, flags=re.IGNORECASE), objects, commands)
+            for text, objects, commands in prompt_list]
+
+def evaluate(tight, free, label):
+    totals = [0, 0, 0]
+    for prompt_list, name in ((tight, "tight"), (free, "free")):
+        results = evaluate_list(prompt_list, name)
+        totals = [t + r for t, r in zip(totals, results)]
+    passed, fallback, failed = totals
+    return f"{label}: planned locally: {passed}, fell back to GPT: {fallback}, wrong plans: {failed}"
+
+def check_not_pick_and_place():
+    objects = {name: test_scene_objects_dict[name] for name in ("red block", "apple")}
+    objects.update(BINS)
+    wrong = 0
+    for prompt_text in NOT_PICK_AND_PLACE:
+        commands = plan_pick_and_place(prompt_text, objects)
+        result = "FALLBACK" if commands is None else "FAIL"
+        wrong += commands is not None
+        print(f"[negative] {result:8s} {prompt_text}")
+        if commands is not None:
+            print("    got:     ", commands)
+    return f"Not pick-and-place: fell back to GPT: {len(NOT_PICK_AND_PLACE) - wrong}, wrong plans: {wrong}"
+
+def main():
+    # With two bins an unnamed "the bin" is ambiguous, so those prompts go to GPT
+    as_written = evaluate(tight_prompt_list, free_prompt_list, "Corpus as written")
+    named = evaluate(name_the_bin(tight_prompt_list), name_the_bin(free_prompt_list), "Bin named")
+    negative = check_not_pick_and_place()
+    print(f"\n{as_written}\n{named}\n{negative}")
+
+if __name__ == "__main__":
+    main()
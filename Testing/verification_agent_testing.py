@@ -1,15 +1,14 @@
 import sys
 import os
-import socket
 import time
 import torch
 import matplotlib.pyplot as plt
 import time
 
-from SingleRobotSystem.single_robot_system import load_robot_coord_mapping
 from Planning.gpt_functions import extract_task_objects, generate_open_verification_prompt, chat_with_gpt
 from Perception.segmentation_layer import perform_segmentation, encode_and_match
-from Mapping.image_to_robo_mapping import find_closest_gripper_point
+from Mapping.image_to_robo_mapping import find_closest_gripper_point, load_robot_coord_mapping
+from Execution.client_script import execute_command, get_robot_connection, close_robot_connections
 
 VISION_IP      = 'XXXX'  # Camera robot IP
 VISION_PORT    = 'XXXX'
@@ -40,13 +39,10 @@ def send_vision_command(cmd: str):
     """
     Send 'home' or 'bins' to the vision robot and wait for 'DONE'.
     """
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.connect((VISION_IP, VISION_PORT))
-        sock.sendall(f"{cmd}\n".encode())
-        response = sock.recv(1024).decode().strip()
-        if response != "DONE":
-            print(f"[Verifier] Unexpected response: {response}")
-        time.sleep(1)
+    resp = execute_command(get_robot_connection(VISION_IP, VISION_PORT, "Vision"), cmd)
+    if resp != "DONE":
+        print(f"[Verifier] Unexpected response: {resp}")
+
 def verify_table_scene(task_objects, device, mapping):
     """
     Capture table-view, segment, CLIP-match, and return confidences + 6D poses.
@@ -177,3 +173,4 @@ if __name__ == "__main__":
     main()
     end = time.perf_counter()
     print(f"Elapsed time: {end - start:.4f} seconds")
+    close_robot_connections()
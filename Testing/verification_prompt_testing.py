@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import json
+import os
+import time
+
+from Planning.gpt_functions import generate_open_verification_prompt, chat_with_gpt, get_backend, set_backend
+from Planning.llm_backends import MockBackend
+from Planning.token_counter import count_tokens
+
+# Compares the prose and compact verification prompts on recorded verification scenes:
+# prompt size, latency, estimated cost, and whether both forms reach the same verdict.
+# Verdict agreement only means something for a real model: set FYP_LLM_BACKEND (openai, http) to run live,
+# which also records the replies to REPLIES_JSON. Without it the script replays those recorded replies offline,
+# or, if none are recorded yet, falls back to the mock backend and reports agreement as unverified, since the mock
+# derives its verdict from the same confidences in either prompt form.
+REPLIES_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "verification_replies.json")
+
+BIN_FIXED_POSES = {
+    "Green Bin": {"position": (172.8, -226.4, 107.4), "orientation": (93.9, -0.83, 47.41)},
+    "Blue Bin": {"position": (166.7, -273.3, 108.2), "orientation": (73.14, -1.83, 12.7)},
+}
+GREEN = (172.8, -226.4, 107.4, 93.9, -0.83, 47.41)
+
+# Verification scenes; "misplaced" is the verdict checked by eye
+CASES = [
+    {"task": "Pick up the red block and place it in the Green Bin.",
+     "table_conf": {"red block": 0.03}, "bin_conf": {"red block": 0.91},
+     "table_poses": {"red block": None}, "bin_poses": {"red block": GREEN},
+     "misplaced": []},
+    {"task": "Put the apple and the lemon in the Green Bin.",
+     "table_conf": {"apple": 0.02, "lemon": 0.87}, "bin_conf": {"apple": 0.88, "lemon": 0.05},
+     "table_poses": {"apple": None, "lemon": (40.81, -298.72, 99.5, 89.14, 0.21, 1.49)},
+     "bin_poses": {"apple": GREEN, "lemon": None},
+     "misplaced": ["lemon"]},
+    {"task": "Place the carrot, the red block and the blue block into the Green Bin.",
+     "table_conf": {"carrot": 0.0, "red block": 0.04, "blue block": 0.0},
+     "bin_conf": {"carrot": 0.79, "red block": 0.83, "blue block": 0.9},
+     "table_poses": {"carrot": None, "red block": None, "blue block": None},
+     "bin_poses": {"carrot": GREEN, "red block": GREEN, "blue block": GREEN},
+     "misplaced": []},
+    {"task": "Move the green block to the Green Bin.",
+     "table_conf": {"green block": 0.64}, "bin_conf": {"green block": 0.31},
+     "table_poses": {"green block": (81.3, -310.6, 100.0, 74.31, 0.13, -5.22)},
+     "bin_poses": {"green block": GREEN},
+     "misplaced": ["green block"]},
+    # Borderline: the block sits on the bin rim, so both views give it a similar confidence
+    {"task": "Put the blue block in the Green Bin.",
+     "table_conf": {"blue block": 0.47}, "bin_conf": {"blue block": 0.52},
+     "table_poses": {"blue block": (168.2, -241.9, 104.6, 91.7, -0.4, 40.2)},
+     "bin_poses": {"blue block": GREEN},
+     "misplaced": ["blue block"]},
+]
+
+
+def verdict(reply, objects):
+    """(complete, misplaced objects named in the reply)."""
+    if reply.strip().lower().startswith("yes"):
+        return True, []
+    return False, sorted(o for o in objects if o.lower() in reply.lower())
+
+
+def run(case, compact, recorded=None):
+    """(prompt tokens, latency, verdict, reply); replays the recorded reply instead of calling the backend if given."""
+    prompt = generate_open_verification_prompt(
+        task_description=case["task"],
+        table_confidences=case["table_conf"],
+        table_poses=case["table_poses"],
+        bin_confidences=case["bin_conf"],
+        bin_poses=case["bin_poses"],
+        bin_fixed_poses=BIN_FIXED_POSES,
+        compact=compact,
+    )
+    if recorded is not None:
+        return count_tokens(prompt), 0.0, verdict(recorded, case["table_conf"]), recorded
+    t0 = time.perf_counter()
+    reply = chat_with_gpt(prompt, use_cache=False)
+    latency = time.perf_counter() - t0
+    return count_tokens(prompt), latency, verdict(reply, case["table_conf"]), reply
+
+
+def main():
+    live = os.environ.get("FYP_LLM_BACKEND", "mock") != "mock"
+    recorded = None
+    if not live:
+        if os.path.isfile(REPLIES_JSON):
+            with open(REPLIES_JSON) as f:
+                recorded = json.load(f)
+            print(f"Replaying recorded {recorded['backend']} replies from {REPLIES_JSON}\n")
+        else:
+            set_backend(MockBackend())
+    replies = []
+    agree = correct_prose = correct_compact = 0
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    for i, case in enumerate(CASES, 1):
+        expected = (not case["misplaced"], sorted(case["misplaced"]))
+        results = {}
+        replies.append({})
+        for compact in (False, True):
+            label = "compact" if compact else "prose"
+            saved = None
+            if recorded is not None:
+                saved = recorded["cases"][i - 1][label] if i <= len(recorded["cases"]) else None
+                if saved is None:
+                    print(f"Case {i} {label}: no recorded reply, skipping")
+                    continue
+            tokens, latency, v, reply = run(case, compact, saved)
+            replies[-1][label] = reply
+            results[compact] = v
+            totals[compact][0] += tokens
+            totals[compact][1] += latency
+            print(f"Case {i} {label:7s}: {tokens:4d} tokens, {latency:.2f} s -> {v}")
+        if len(results) == 2:
+            agree += results[False] == results[True]
+        correct_prose += results.get(False) == expected
+        correct_compact += results.get(True) == expected
+        print(f"Case {i} expected: {expected}\n")
+
+    n = len(CASES)
+    print(f"Prose prompt:   {totals[False][0]} tokens, {totals[False][1]:.2f} s, {correct_prose}/{n} correct")
+    print(f"Compact prompt: {totals[True][0]} tokens, {totals[True][1]:.2f} s, {correct_compact}/{n} correct")
+    print(f"Compact uses {100 * totals[True][0] / totals[False][0]:.0f}% of the prose prompt tokens")
+    if live or recorded is not None:
+        print(f"Same verdict on {agree}/{n} cases")
+    else:
+        print("Verdict agreement unverified: the mock backend reads the same confidences from both prompt forms; "
+              "set FYP_LLM_BACKEND to record real replies")
+    if live:
+        with open(REPLIES_JSON, "w") as f:
+            json.dump({"backend": get_backend().name, "cases": replies}, f, indent=2)
+        print(f"Recorded replies to {REPLIES_JSON}")
+    if recorded is None:
+        print(f"Backend: {get_backend().stats()}")
+
+if __name__ == "__main__":
+    main()